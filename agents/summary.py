@@ -1,6 +1,7 @@
 """Summary agent - generates daily summaries and reports."""
 
 from loguru import logger
+from core import rollups
 from core.state import StoreState
 from core.schemas import SingleIntent, IntentType
 
@@ -11,6 +12,11 @@ class SummaryAgent:
     def __init__(self, state: StoreState):
         self.state = state
 
+    @staticmethod
+    def reads_history(intent: SingleIntent) -> bool:
+        """True if the intent asks about a past period (answered from the rollups, not memory)."""
+        return bool(intent.period) and intent.period != "today" and intent.intent != IntentType.CLOSE_DAY
+
     def handle(self, intent: SingleIntent) -> dict:
         """
         Handle summary requests (daily summary, profit queries, day closing).
@@ -21,17 +27,16 @@ class SummaryAgent:
         Returns:
             dict with summary data
         """
+        if self.reads_history(intent):
+            return self._period_summary(intent)
+
         # Get the daily summary
         summary = self.state.get_daily_summary()
 
         # Check if this is a day closing request
         is_closing = intent.intent == IntentType.CLOSE_DAY
 
-        inventory_snapshot = [
-            {"item": k, "qty": v.quantity, "unit": v.unit}
-            for k, v in self.state.inventory.items()
-            if v.quantity > 0
-        ]
+        inventory_snapshot = self.state.get_inventory_snapshot()
 
         return {
             "action": "closing_summary" if is_closing else "summary",
@@ -47,3 +52,27 @@ class SummaryAgent:
             "low_stock_items": summary.low_stock_items,
             "is_closing": is_closing
         }
+
+    def _period_summary(self, intent: SingleIntent) -> dict:
+        """
+        Totals for a past period, from the daily rollups. The caller saves the
+        turn's earlier entries first (see server.execute_intents).
+        """
+        try:
+            start, end = rollups.period_range(intent.period, self.state.day)
+        except ValueError:
+            return {"action": "period_summary", "error": "unknown_period", "period": intent.period}
+
+        try:
+            summary = rollups.period_summary(self.state.store_id, start, end, storage=self.state.storage)
+        except Exception as e:
+            logger.error(f"Period summary failed: {e}")
+            return {"action": "period_summary", "error": "history_unavailable", "period": intent.period}
+
+        summary.pop("daily")
+        return {
+            "action": "period_summary",
+            "period": intent.period,
+            "profit_note": "Profit = Sales Revenue - Cost of Sold Items - Expenses. Unsold inventory is NOT a loss.",
+            **summary,
+        }
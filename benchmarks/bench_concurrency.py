@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Concurrent-turn throughput: sync gunicorn workers vs the gevent worker.
+
+Starts the local Anthropic stand-in (fake_apis.py) answering after
+--llm-latency seconds, boots gunicorn in each worker mode pointed at it, and
+fires --turns /process requests with --concurrency in flight. The fast path,
+router cache and template renderer are switched off so every turn makes both
+LLM calls. Needs DATABASE_URL (the server loads state at import).
+
+    python benchmarks/bench_concurrency.py --turns 200 --concurrency 100
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from fake_apis import FakeConfig, parse_latency, start_fake_apis
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(worker_class: str, workers: int, port: int, llm_url: str, concurrency: int):
+    env = dict(
+        os.environ,
+        ANTHROPIC_API_URL=llm_url,
+        ANTHROPIC_API_KEY=os.getenv("ANTHROPIC_API_KEY", "bench"),
+        ROUTER_FAST_PATH="0",
+        ROUTER_CACHE="0",
+        RESPONSE_RENDERER="0",
+        LLM_POOL_SIZE=str(concurrency),
+        GUNICORN_WORKER_CLASS=worker_class,
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_WORKER_CONNECTIONS=str(max(concurrency, 100)),
+        PORT=str(port),
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "server:app", "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/stats", timeout=1)
+            return proc
+        except requests.exceptions.RequestException:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"gunicorn ({worker_class}) did not start")
+
+
+def run_load(port: int, turns: int, concurrency: int) -> dict:
+    url = f"http://127.0.0.1:{port}/process"
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+
+    def one_turn(i):
+        start = time.perf_counter()
+        r = session.post(url, json={"text": f"aloo kitna bacha hai {i}", "language": "hi-IN"}, timeout=120)
+        return time.perf_counter() - start, r.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one_turn, range(turns)))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(t for t, _ in results)
+    errors = sum(1 for _, status in results if status != 200)
+    return {
+        "turns": turns,
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "turns_per_s": round(turns / wall, 2),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="seconds per fake Claude call")
+    parser.add_argument("--modes", default="sync,gevent")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    fake = start_fake_apis(FakeConfig(anthropic_latency=parse_latency(f"fixed:{args.llm_latency}")))
+    llm_url = f"http://127.0.0.1:{fake.server_port}/v1/messages"
+
+    results = {}
+    for mode in args.modes.split(","):
+        port = _free_port()
+        proc = start_gunicorn(mode, args.workers, port, llm_url, args.concurrency)
+        try:
+            results[mode] = run_load(port, args.turns, args.concurrency)
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(f"{mode:>7}: {results[mode]}")
+
+    fake.shutdown()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Memory and speed of the in-memory sales ledger: list of Pydantic SaleRecords
+(the previous layout) vs the columnar SalesLedger.
+
+For each row count, reports bytes per 100k rows (tracemalloc), append cost
+per row, and the time to sum totals and group quantity by item.
+
+    python benchmarks/bench_ledger.py --rows 100000 --json ledger.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.schemas import SaleRecord
+from core.ledger import SalesLedger
+
+ITEMS = [f"item_{i}" for i in range(500)]
+UNITS = ["kg", "litre", "packet", "unit"]
+
+
+def make_rows(count: int, rng: random.Random) -> list[tuple]:
+    start = datetime(2025, 1, 1, 8, 0)
+    return [
+        (rng.choice(ITEMS), float(rng.randint(1, 5)), rng.choice(UNITS), 30.0, 30.0 * (i % 5 + 1),
+         start + timedelta(seconds=i))
+        for i in range(count)
+    ]
+
+
+def build_records(rows: list[tuple]) -> list[SaleRecord]:
+    return [
+        SaleRecord(item_name=i, quantity=q, unit=u, price_per_unit=p, total=t, timestamp=ts)
+        for i, q, u, p, t, ts in rows
+    ]
+
+
+def build_ledger(rows: list[tuple]) -> SalesLedger:
+    ledger = SalesLedger()
+    for row in rows:
+        ledger.append(*row)
+    return ledger
+
+
+def _measure(build, rows: list[tuple]):
+    """(result, bytes retained, seconds); timed in a separate run since tracemalloc slows allocation."""
+    tracemalloc.start()
+    built = build(rows)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+
+    start = time.perf_counter()
+    built = build(rows)
+    return built, size, time.perf_counter() - start
+
+
+def _ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def records_group_sum(records: list[SaleRecord]) -> dict:
+    totals = defaultdict(float)
+    for r in records:
+        totals[r.item_name] += r.quantity
+    return totals
+
+
+def bench_rows(count: int, rng: random.Random) -> dict:
+    rows = make_rows(count, rng)
+    per_100k = 100_000 / count
+
+    # Timestamps are shared with the input rows; build copies so each layout pays for its own
+    records, records_bytes, records_s = _measure(
+        lambda rs: build_records([r[:5] + (r[5] + timedelta(0),) for r in rs]), rows
+    )
+    ledger, ledger_bytes, ledger_s = _measure(build_ledger, rows)
+
+    return {
+        "rows": count,
+        "records_bytes_per_100k": int(records_bytes * per_100k),
+        "ledger_bytes_per_100k": int(ledger_bytes * per_100k),
+        "records_append_us": round(records_s / count * 1e6, 2),
+        "ledger_append_us": round(ledger_s / count * 1e6, 2),
+        "records_sum_ms": _ms(lambda: sum(r.total for r in records)),
+        "ledger_sum_ms": _ms(lambda: ledger.sum("total")),
+        "records_group_ms": _ms(lambda: records_group_sum(records)),
+        "ledger_group_ms": _ms(lambda: ledger.group_sum("quantity", by="item_name")),
+        "ledger_iterate_ms": _ms(lambda: sum(1 for _ in ledger.view())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="10000,100000")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = []
+    for count in (int(c) for c in args.rows.split(",")):
+        results.append(bench_rows(count, rng))
+        print(results[-1])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
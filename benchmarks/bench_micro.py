@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the hot in-process paths of a turn.
+
+  normalize   normalize_item on mapping hits, plurals, fuzzy typos and
+              misses, both through the LRU cache and uncached
+  state       StoreState.add_stock / record_sale / get_daily_summary with
+              10, 1k and 100k SKUs and ledger rows (in-memory SQLite
+              storage, nothing is saved); the summary is timed both
+              rebuilt and memoized
+  router      route_intent's JSON parsing of a canned Claude reply (fast
+              path and router cache off, so every call parses)
+  prompt      build_response_user_prompt serialization of agent results
+
+Each benchmark runs a warm-up pass, then --repeat timed passes with the GC
+paused; the reported time per op is the median pass (plus min and p95).
+Inputs come from a fixed seed, so runs on the same machine are comparable.
+Results go to --json together with the commit and Python version; pass an
+earlier file as --baseline to print the change per benchmark.
+
+    python benchmarks/bench_micro.py --json micro.json
+    python benchmarks/bench_micro.py --only state --sizes 10,1000 --baseline micro.json
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+from core import router
+from core.normalizer import normalize_item, singularize, ITEM_MAPPINGS
+from core.state import StoreState
+from core.storage import SQLiteBackend
+from prompts.response_prompt import build_response_user_prompt
+
+SUITES = ("normalize", "state", "router", "prompt")
+
+
+def measure(fn, args: list, repeat: int) -> dict:
+    """Time fn(arg) over every arg, repeat times; per-op times in µs."""
+    def one_pass() -> float:
+        start = time.perf_counter_ns()
+        for arg in args:
+            fn(arg)
+        return (time.perf_counter_ns() - start) / len(args) / 1000
+
+    one_pass()
+    gc.collect()
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        samples = sorted(one_pass() for _ in range(repeat))
+    finally:
+        if enabled:
+            gc.enable()
+    return {
+        "ops": len(args),
+        "median_us": round(statistics.median(samples), 3),
+        "min_us": round(samples[0], 3),
+        "p95_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+    }
+
+
+# ══════════════════════════════════════════════════════════════
+# NORMALIZER
+# ══════════════════════════════════════════════════════════════
+
+def _typo(word: str, rng: random.Random) -> str:
+    chars = list(word)
+    i = rng.randrange(1, len(chars))
+    chars.insert(i, chars[i - 1])
+    return "".join(chars)
+
+
+def bench_normalize(args, rng: random.Random) -> dict:
+    ascii_keys = [k for k in ITEM_MAPPINGS if k.isascii() and k.isalpha() and len(k) > 3]
+    hits = list(ITEM_MAPPINGS)
+    plurals = [k + "s" for k in ascii_keys if k + "s" not in ITEM_MAPPINGS and singularize(k + "s") == k]
+    typos = [t for t in (_typo(k, rng) for k in ascii_keys) if t not in ITEM_MAPPINGS]
+    misses = ["".join(rng.choice("qxzjvw") for _ in range(8)) for _ in range(200)]
+
+    uncached = normalize_item.__wrapped__
+    results = {}
+    for name, inputs in (("hit", hits), ("plural", plurals), ("fuzzy", typos), ("miss", misses)):
+        results[f"normalize_item.{name}.uncached"] = measure(uncached, inputs, args.repeat)
+        normalize_item.cache_clear()
+        results[f"normalize_item.{name}.cached"] = measure(normalize_item, inputs, args.repeat)
+    return results
+
+
+# ══════════════════════════════════════════════════════════════
+# STORE STATE
+# ══════════════════════════════════════════════════════════════
+
+def seeded_state(size: int, rng: random.Random) -> tuple[StoreState, list[str]]:
+    """State with size SKUs in stock and size sales in today's ledger."""
+    state = StoreState(
+        store_id=f"bench_{size}", write_behind=False, atomic=False,
+        storage=SQLiteBackend(f"bench_{size}", ":memory:")
+    )
+    skus = [f"sku{i:06d}" for i in range(size)]
+    for sku in skus:
+        state.add_stock(sku, 1_000_000, "kg", rng.randint(10, 90))
+    for _ in range(size):
+        state.record_sale(rng.choice(skus), rng.randint(1, 5), "kg", 100)
+    # Names as the agents pass them: already canonical, so normalize_item is a cache hit
+    return state, [normalize_item(sku) for sku in skus]
+
+
+def bench_state(args, rng: random.Random) -> dict:
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        state, skus = seeded_state(size, rng)
+        sample = [rng.choice(skus) for _ in range(args.state_ops)]
+
+        # Summaries first, while the ledger still holds exactly size rows.
+        # Cold: the memoized view is invalidated as a mutation would; warm: nothing changed.
+        cold_ops = max(3, args.state_ops * 100 // size)
+
+        def cold_summary(_):
+            state._bump_version()
+            state.get_daily_summary()
+        results[f"state.get_daily_summary.{size}"] = measure(cold_summary, sample[:cold_ops], args.repeat)
+        results[f"state.get_daily_summary.warm.{size}"] = measure(lambda _: state.get_daily_summary(), sample, args.repeat)
+        results[f"state.add_stock.{size}"] = measure(lambda sku: state.add_stock(sku, 5, "kg", 40), sample, args.repeat)
+        results[f"state.record_sale.{size}"] = measure(lambda sku: state.record_sale(sku, 1, "kg", 100), sample, args.repeat)
+        state.close()
+    return results
+
+
+# ══════════════════════════════════════════════════════════════
+# ROUTER + PROMPT
+# ══════════════════════════════════════════════════════════════
+
+_ROUTER_REPLIES = {
+    "single": {"intents": [{"intent": "sale", "item": "potato", "quantity": 2, "unit": "kg", "price_per_unit": 30}]},
+    "multi": {"intents": [
+        {"intent": "inventory_in", "item": "rice", "quantity": 25, "unit": "kg", "price_per_unit": 42},
+        {"intent": "sale", "item": "sugar", "quantity": 1, "unit": "kg", "total_amount": 48},
+        {"intent": "expense", "category": "transport", "total_amount": 120, "description": "auto bhaada"},
+    ]},
+}
+
+
+def bench_router(args, rng: random.Random) -> dict:
+    saved = router.call_claude, router.FAST_PATH_ENABLED, router.ROUTER_CACHE_ENABLED
+    router.FAST_PATH_ENABLED = router.ROUTER_CACHE_ENABLED = False
+    results = {}
+    try:
+        for name, reply in _ROUTER_REPLIES.items():
+            for fenced in (False, True):
+                text = json.dumps(reply, ensure_ascii=False, indent=2)
+                if fenced:
+                    text = f"```json\n{text}\n```"
+                router.call_claude = lambda text=text, **kwargs: text
+                label = f"route_intent.{name}{'.fenced' if fenced else ''}"
+                results[label] = measure(lambda t: router.route_intent(t, "bench"), ["aaj ka hisaab batao"] * 200, args.repeat)
+    finally:
+        router.call_claude, router.FAST_PATH_ENABLED, router.ROUTER_CACHE_ENABLED = saved
+    return results
+
+
+def bench_prompt(args, rng: random.Random) -> dict:
+    state, _ = seeded_state(1000, rng)
+    sale = {
+        "action": "sale_recorded", "item": "potato", "quantity": 2.0, "unit": "kg", "price_per_unit": 30.0,
+        "revenue": 60.0, "remaining_stock": 48.0, "remaining_unit": "kg", "daily_sales_total": 1240.0,
+    }
+    turns = {
+        "sale": ([sale], [{"low_stock": []}]),
+        "multi": ([sale, {**sale, "item": "rice"}, {"action": "expense_recorded", "category": "transport", "amount": 120.0}],
+                  [{"low_stock": ["sugar (2.0 kg)"]}]),
+        "summary_1k": ([{"action": "summary", **state.get_daily_summary().model_dump(mode="json")}], [{"low_stock": []}]),
+    }
+    state.close()
+    results = {}
+    for name, (agent_results, alerts) in turns.items():
+        results[f"build_response_user_prompt.{name}"] = {
+            **measure(lambda text: build_response_user_prompt(text, agent_results, alerts), ["do kilo aloo becha"] * 200, args.repeat),
+            "chars": len(build_response_user_prompt("do kilo aloo becha", agent_results, alerts)),
+        }
+    return results
+
+
+# ══════════════════════════════════════════════════════════════
+# MAIN
+# ══════════════════════════════════════════════════════════════
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def compare(results: dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before and before["median_us"] > 0:
+            change = (result["median_us"] - before["median_us"]) / before["median_us"] * 100
+            print(f"{name:48} {before['median_us']:>12.3f} → {result['median_us']:>12.3f} µs  {change:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", default=",".join(SUITES), help="comma-separated suites to run")
+    parser.add_argument("--sizes", default="10,1000,100000", help="SKUs and ledger rows for the state suite")
+    parser.add_argument("--state-ops", type=int, default=500, help="operations per timed pass in the state suite")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="earlier --json file to compare against")
+    args = parser.parse_args()
+
+    logger.remove()
+    suites = {"normalize": bench_normalize, "state": bench_state, "router": bench_router, "prompt": bench_prompt}
+    results = {}
+    for name in args.only.split(","):
+        suite_results = suites[name](args, random.Random(args.seed))
+        for bench, result in suite_results.items():
+            print(f"{bench:48} {result['median_us']:>12.3f} µs/op  (min {result['min_us']}, p95 {result['p95_us']})")
+        results.update(suite_results)
+
+    if args.baseline:
+        compare(results, args.baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "commit": _commit(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "taken_at": datetime.now().isoformat(timespec="seconds"),
+                "args": vars(args),
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Fuzzy item matching: linear SequenceMatcher scan vs the n-gram index.
+
+Builds synthetic catalogs of pronounceable names at each size, then times
+best-match lookups for typo'd catalog names and for names that match
+nothing. Also reports how often the index and the linear scan disagree.
+
+    python benchmarks/bench_normalizer.py --sizes 100,10000,100000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.fuzzy_index import FuzzyIndex
+
+CONSONANTS = "bcdfghjklmnprstvy"
+VOWELS = "aeiou"
+
+
+def make_catalog(size: int, rng: random.Random) -> list[str]:
+    names = set()
+    while len(names) < size:
+        syllables = rng.randint(2, 4)
+        name = "".join(rng.choice(CONSONANTS) + rng.choice(VOWELS) for _ in range(syllables))
+        if rng.random() < 0.3:
+            name += "_" + "".join(rng.choice(CONSONANTS) + rng.choice(VOWELS) for _ in range(2))
+        names.add(name)
+    return sorted(names)
+
+
+def typo(name: str, rng: random.Random) -> str:
+    chars = list(name)
+    i = rng.randrange(len(chars))
+    op = rng.random()
+    if op < 0.33:
+        chars[i] = rng.choice(CONSONANTS + VOWELS)
+    elif op < 0.66 and len(chars) > 1:
+        del chars[i]
+    else:
+        chars.insert(i, rng.choice(VOWELS))
+    return "".join(chars)
+
+
+def linear_match(names: list[str], query: str, threshold: float = 0.8) -> str:
+    best, best_score = "", 0
+    for name in names:
+        score = SequenceMatcher(None, query, name).ratio()
+        if score > best_score:
+            best, best_score = name, score
+    return best if best_score >= threshold else ""
+
+
+def _per_query_us(fn, queries: list[str]) -> float:
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return round((time.perf_counter() - start) / len(queries) * 1e6, 1)
+
+
+def bench_size(size: int, queries: int, linear_queries: int, rng: random.Random) -> dict:
+    names = make_catalog(size, rng)
+
+    start = time.perf_counter()
+    index = FuzzyIndex(names)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    typos = [typo(rng.choice(names), rng) for _ in range(queries)]
+    misses = ["zzqx" + typo(rng.choice(names), rng)[::-1] for _ in range(queries)]
+
+    sample = typos[:linear_queries]
+    disagreements = sum(index.best_match(q) != linear_match(names, q) for q in sample)
+
+    return {
+        "catalog": size,
+        "index_build_ms": round(build_ms, 1),
+        "index_typo_us": _per_query_us(index.best_match, typos),
+        "index_miss_us": _per_query_us(index.best_match, misses),
+        "linear_typo_us": _per_query_us(lambda q: linear_match(names, q), sample),
+        "linear_sample": len(sample),
+        "disagreements": disagreements,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,10000,100000")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--linear-queries", type=int, default=20, help="the linear scan is slow at 100k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        results.append(bench_size(size, args.queries, args.linear_queries, rng))
+        print(results[-1])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+save_to_db cost as the catalog grows.
+
+For each catalog size, seeds a StoreState with N items and times:
+  full      — every item dirty (what each save cost before dirty tracking)
+  one_sale  — a single sale after a clean save (the typical turn)
+  noop      — nothing changed (query turns)
+
+Writes to the real tables, so point DATABASE_URL at a scratch database;
+the inventory, sales and expenses tables are truncated between sizes.
+
+    DATABASE_URL=postgres://localhost/kirana_bench python benchmarks/bench_save.py --sizes 100,1000,10000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+from core.db import connection
+from core.state import StoreState
+
+
+def _truncate():
+    with connection() as conn:
+        conn.cursor().execute("TRUNCATE inventory, sales, expenses")
+        conn.commit()
+
+
+def _time_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 2)
+
+
+def bench_size(n: int, repeat: int) -> dict:
+    _truncate()
+    state = StoreState()
+    for i in range(n):
+        state.add_stock(f"bench_item_{i}", 100, "kg", 10)
+    state.save_to_db()
+
+    def full():
+        state._dirty_items.update(state.inventory)
+        state.save_to_db()
+
+    def one_sale():
+        state.record_sale("bench_item_0", 1, "kg", 12)
+        state.save_to_db()
+
+    return {
+        "items": n,
+        "full_ms": _time_ms(full, repeat),
+        "one_sale_ms": _time_ms(one_sale, repeat),
+        "noop_ms": _time_ms(state.save_to_db, repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        sys.exit("DATABASE_URL must point at a scratch database")
+    logger.remove()
+
+    results = []
+    for n in (int(s) for s in args.sizes.split(",")):
+        results.append(bench_size(n, args.repeat))
+        print(results[-1])
+    _truncate()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Startup (load_from_db) time against years of history.
+
+Seeds a scratch database with synthetic sales and expenses for one store
+spread over --years of past days plus a busy "today", then times a cold
+StoreState load. Loading today's ledger should stay flat as history grows:
+it is a (store_id, day) index range scan over DATE values. Also prints the
+plan for today's sales query so a sequential scan is easy to spot, and times
+a warm start from a binary snapshot (core/snapshot.py) of the same state.
+
+Writes to the real tables, so point DATABASE_URL at a scratch database;
+the bench store's rows are deleted before and after.
+
+    DATABASE_URL=postgres://localhost/kirana_bench python benchmarks/bench_startup.py --years 1,3 --json startup.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+from psycopg2.extras import execute_values
+from core.db import connection
+from core.state import StoreState, ensure_schema
+
+STORE_ID = "bench_startup"
+ITEMS = [f"bench_item_{i}" for i in range(200)]
+CATEGORIES = ["rent", "electricity", "transport", "salary", "misc"]
+
+
+def _clear():
+    with connection() as conn:
+        cursor = conn.cursor()
+        for table in ("inventory", "sales", "expenses", "sales_daily_item", "expenses_daily_category"):
+            cursor.execute(f"DELETE FROM {table} WHERE store_id = %s", (STORE_ID,))
+        conn.commit()
+
+
+def _seed(state: StoreState, days: int, sales_per_day: int, today_sales: int):
+    rng = random.Random(42)
+    today = datetime.combine(state.day, datetime.min.time())
+    with connection() as conn:
+        cursor = conn.cursor()
+        execute_values(cursor, """
+            INSERT INTO inventory (store_id, item_name, quantity, unit, avg_cost, updated_at) VALUES %s
+        """, [(STORE_ID, item, 1000, "kg", 20, state._stamp(today)) for item in ITEMS])
+
+        for ago in range(days, -1, -1):
+            start = today - timedelta(days=ago)
+            count = today_sales if ago == 0 else sales_per_day
+            sales, expenses = [], []
+            for _ in range(count):
+                at = start + timedelta(seconds=rng.randrange(86_400))
+                quantity = rng.randint(1, 5)
+                sales.append((STORE_ID, rng.choice(ITEMS), quantity, "kg", 30, quantity * 30,
+                              state._stamp(at), at.date().isoformat(), 20))
+            for _ in range(max(1, count // 20)):
+                at = start + timedelta(seconds=rng.randrange(86_400))
+                expenses.append((STORE_ID, rng.choice(CATEGORIES), rng.randint(50, 500), "",
+                                 state._stamp(at), at.date().isoformat()))
+            execute_values(cursor, """
+                INSERT INTO sales (store_id, item_name, quantity, unit, price, total, created_at, day, unit_cost) VALUES %s
+            """, sales, page_size=1000)
+            execute_values(cursor, """
+                INSERT INTO expenses (store_id, category, amount, description, created_at, day) VALUES %s
+            """, expenses, page_size=1000)
+        cursor.execute("ANALYZE sales")
+        cursor.execute("ANALYZE expenses")
+        conn.commit()
+
+
+def _today_plan(day: str) -> list[str]:
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "EXPLAIN SELECT item_name, quantity, unit, price, total, created_at FROM sales WHERE store_id = %s AND day = %s",
+            (STORE_ID, day)
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def bench_years(years: int, sales_per_day: int, today_sales: int, repeat: int) -> dict:
+    _clear()
+    seeder = StoreState(store_id=STORE_ID, write_behind=False)
+    _seed(seeder, years * 365, sales_per_day, today_sales)
+
+    def load(snapshot_path=None) -> float:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            state = StoreState(store_id=STORE_ID, write_behind=False, snapshot_path=snapshot_path)
+            state.load_from_db()
+            samples.append((time.perf_counter() - start) * 1000)
+        assert len(state.sales) == today_sales
+        return round(statistics.median(samples), 2)
+
+    load_ms = load()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"{STORE_ID}.snap")
+        writer = StoreState(store_id=STORE_ID, write_behind=False, snapshot_path=path)
+        writer.load_from_db()
+        writer.write_snapshot()
+        snapshot_bytes = os.path.getsize(path)
+        snapshot_load_ms = load(path)
+
+    plan = _today_plan(seeder._get_today_str())
+    return {
+        "years": years,
+        "history_sales": years * 365 * sales_per_day,
+        "today_sales": today_sales,
+        "load_ms": load_ms,
+        "snapshot_load_ms": snapshot_load_ms,
+        "snapshot_bytes": snapshot_bytes,
+        "index_scan": not any("Seq Scan" in line for line in plan),
+        "plan": plan,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", default="1,3")
+    parser.add_argument("--sales-per-day", type=int, default=300)
+    parser.add_argument("--today-sales", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        sys.exit("DATABASE_URL must point at a scratch database")
+    logger.remove()
+    ensure_schema()
+
+    results = []
+    try:
+        for years in (int(y) for y in args.years.split(",")):
+            results.append(bench_years(years, args.sales_per_day, args.today_sales, args.repeat))
+            print({k: v for k, v in results[-1].items() if k != "plan"})
+    finally:
+        _clear()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the Anthropic Messages API and Sarvam speech APIs.
+
+Lets /process, /process/stream, /api/stt and /api/tts be load-tested without
+spending API quota. Point the server at them with
+
+    ANTHROPIC_API_URL=http://127.0.0.1:8900/v1/messages
+    SARVAM_API_URL=http://127.0.0.1:8900
+
+(both APIs share one port). Replies are canned but shaped like the real
+ones: router calls get intent JSON for the utterance (from the local fast
+parser when it understands it), response calls a short Hindi reply, with
+usage including prompt-cache reads, and streaming calls the same text as
+SSE deltas. STT returns a transcript from --corpus, TTS a silent WAV.
+
+Latency is drawn per request from a distribution:
+
+    fixed:0.8            always 0.8 s
+    uniform:0.3,1.5      between 0.3 and 1.5 s
+    lognormal:0.8,0.4    median 0.8 s, sigma 0.4 (long right tail)
+
+Faults are injected at the given rates: 429 with retry-after, 529 overloaded
+(503 on the Sarvam routes), and timeouts that hold the request for --hang
+seconds before answering. Counts per route and status are served at
+GET /_stats.
+
+    python benchmarks/fake_apis.py --port 8900 --anthropic-latency lognormal:0.8,0.4 --rate-429 0.02
+"""
+
+import os
+import io
+import sys
+import json
+import math
+import time
+import uuid
+import wave
+import base64
+import random
+import argparse
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.fast_parser import parse_fast
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "transcripts.txt")
+
+RESPONSE_REPLIES = [
+    "लिख लिया। आलू अब 48 किलो बचा है।",
+    "ठीक है, 2 किलो चीनी 90 रुपये में बिकी। आज की बिक्री 1240 रुपये हुई।",
+    "नोट कर लिया — ऑटो का 120 रुपये खर्चा।",
+    "आज कुल 3450 रुपये की बिक्री हुई, मुनाफा 620 रुपये।",
+]
+
+
+def parse_latency(spec: str):
+    """'fixed:s' | 'uniform:lo,hi' | 'lognormal:median,sigma' → callable(rng) returning seconds."""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",")] if args else []
+    if kind == "fixed" or (not args and kind.replace(".", "", 1).isdigit()):
+        seconds = values[0] if values else float(kind)
+        return lambda rng: seconds
+    if kind == "uniform":
+        low, high = values
+        return lambda rng: rng.uniform(low, high)
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda rng: rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+    raise ValueError(f"Unknown latency distribution: {spec!r}")
+
+
+@dataclass
+class FaultConfig:
+    rate_429: float = 0.0
+    rate_529: float = 0.0
+    rate_timeout: float = 0.0
+    hang: float = 60.0  # seconds a "timeout" request is held before it is answered
+
+    def pick(self, rng: random.Random):
+        """None, 429, 529 or 'timeout' for one request."""
+        roll = rng.random()
+        for fault, rate in ((429, self.rate_429), (529, self.rate_529), ("timeout", self.rate_timeout)):
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+
+@dataclass
+class FakeConfig:
+    anthropic_latency: object = field(default_factory=lambda: parse_latency("fixed:0"))
+    sarvam_latency: object = field(default_factory=lambda: parse_latency("fixed:0"))
+    faults: FaultConfig = field(default_factory=FaultConfig)
+    transcripts: list = field(default_factory=lambda: ["do kilo aloo becha"])
+    seed: int = 0
+
+
+def _router_reply(utterance: str) -> str:
+    parsed = parse_fast(utterance)
+    if parsed is None:
+        return json.dumps({"intents": [{"intent": "query_summary", "period": "today", "confidence": 0.8}]})
+    return parsed.model_dump_json(exclude_none=True)
+
+
+def _silent_wav(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(b"\0\0" * int(16000 * seconds))
+    return buffer.getvalue()
+
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+    config: FakeConfig = FakeConfig()
+    stats: Counter = Counter()
+    _lock = threading.Lock()
+    _rng = random.Random(0)
+    _cached_systems: set = set()
+
+    # ── plumbing ──────────────────────────────────────────────
+
+    def _random(self) -> random.Random:
+        with self._lock:
+            return random.Random(self._rng.random())
+
+    def _count(self, route: str, status):
+        with self._lock:
+            self.stats[f"{route} {status}"] += 1
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json", headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode(), headers=headers)
+
+    def _fault(self, route: str, rng: random.Random, overloaded_status: int) -> bool:
+        """Apply an injected fault; True if the request was answered with it."""
+        fault = self.config.faults.pick(rng)
+        if fault is None:
+            return False
+        if fault == "timeout":
+            time.sleep(self.config.faults.hang)
+            self._count(route, "timeout")
+            self._send_json(504, {"type": "error", "error": {"type": "timeout", "message": "injected timeout"}})
+        elif fault == 429:
+            self._count(route, 429)
+            self._send_json(429, {"type": "error", "error": {"type": "rate_limit_error", "message": "injected"}},
+                            headers={"retry-after": "1"})
+        else:
+            self._count(route, overloaded_status)
+            self._send_json(overloaded_status, {"type": "error", "error": {"type": "overloaded_error", "message": "injected"}})
+        return True
+
+    def log_message(self, *args):
+        pass
+
+    # ── routes ────────────────────────────────────────────────
+
+    def do_GET(self):
+        if self.path == "/_stats":
+            with self._lock:
+                self._send_json(200, dict(self.stats))
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        try:
+            if self.path.endswith("/v1/messages"):
+                self._messages(json.loads(body))
+            elif self.path.endswith("/speech-to-text"):
+                self._stt()
+            elif self.path.endswith("/text-to-speech"):
+                self._tts(json.loads(body or b"{}"))
+            else:
+                self._send_json(404, {"error": "not found"})
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up first (e.g. its timeout fired during an injected hang)
+            self.close_connection = True
+
+    def _usage(self, payload: dict, output_text: str) -> dict:
+        system = json.dumps(payload.get("system"), ensure_ascii=False)
+        system_tokens = len(system) // 4
+        user_tokens = len(json.dumps(payload.get("messages"), ensure_ascii=False)) // 4
+        cached = "cache_control" in system
+        with self._lock:
+            seen = system in self._cached_systems
+            self._cached_systems.add(system)
+        return {
+            "input_tokens": user_tokens + (0 if cached else system_tokens),
+            "output_tokens": max(1, len(output_text) // 3),
+            "cache_read_input_tokens": system_tokens if cached and seen else 0,
+            "cache_creation_input_tokens": system_tokens if cached and not seen else 0,
+        }
+
+    def _messages(self, payload: dict):
+        rng = self._random()
+        if self._fault("anthropic", rng, 529):
+            return
+        latency = self.config.anthropic_latency(rng)
+        utterance = payload["messages"][-1]["content"]
+        if "intent classifier" in json.dumps(payload.get("system")):
+            text = _router_reply(utterance)
+        else:
+            text = rng.choice(RESPONSE_REPLIES)
+        usage = self._usage(payload, text)
+
+        if not payload.get("stream"):
+            time.sleep(latency)
+            self._count("anthropic", 200)
+            self._send_json(200, {
+                "id": f"msg_{uuid.uuid4().hex[:24]}",
+                "type": "message",
+                "role": "assistant",
+                "model": payload.get("model"),
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "usage": usage,
+            })
+            return
+
+        # Streaming: a third of the latency before the first token, the rest spread over the deltas
+        words = text.split(" ")
+        deltas = [w + (" " if i < len(words) - 1 else "") for i, w in enumerate(words)]
+        time.sleep(latency / 3)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        start_usage = {k: v for k, v in usage.items() if k != "output_tokens"}
+        events = (
+            [{"type": "message_start", "message": {"usage": start_usage}},
+             {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}]
+            + [{"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": d}} for d in deltas]
+            + [{"type": "content_block_stop", "index": 0},
+               {"type": "message_delta", "delta": {"stop_reason": "end_turn"}, "usage": {"output_tokens": usage["output_tokens"]}},
+               {"type": "message_stop"}]
+        )
+        gap = latency * 2 / 3 / max(1, len(deltas))
+        for event in events:
+            if event["type"] == "content_block_delta":
+                time.sleep(gap)
+            chunk = f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n".encode()
+            self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+        self._count("anthropic_stream", 200)
+
+    def _stt(self):
+        rng = self._random()
+        if self._fault("sarvam_stt", rng, 503):
+            return
+        time.sleep(self.config.sarvam_latency(rng))
+        self._count("sarvam_stt", 200)
+        self._send_json(200, {
+            "request_id": uuid.uuid4().hex,
+            "transcript": rng.choice(self.config.transcripts),
+            "language_code": "hi-IN",
+        })
+
+    def _tts(self, payload: dict):
+        rng = self._random()
+        if self._fault("sarvam_tts", rng, 503):
+            return
+        time.sleep(self.config.sarvam_latency(rng))
+        text = payload.get("text") or " ".join(payload.get("inputs") or [])
+        audio = base64.b64encode(_silent_wav(min(10.0, 0.06 * len(text) + 0.3))).decode()
+        self._count("sarvam_tts", 200)
+        self._send_json(200, {"request_id": uuid.uuid4().hex, "audios": [audio]})
+
+
+def load_transcripts(path: str = DEFAULT_CORPUS) -> list[str]:
+    """One utterance per line; blank lines and # comments are skipped."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def start_fake_apis(config: FakeConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve both fakes on one port in a background thread; call .shutdown() when done."""
+    handler = type("Handler", (FakeAPIHandler,), {
+        "config": config, "stats": Counter(), "_lock": threading.Lock(),
+        "_rng": random.Random(config.seed), "_cached_systems": set(),
+    })
+    ThreadingHTTPServer.daemon_threads = True
+    ThreadingHTTPServer.request_queue_size = 1024
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--anthropic-latency", default="lognormal:0.8,0.4")
+    parser.add_argument("--sarvam-latency", default="lognormal:0.4,0.3")
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-529", type=float, default=0.0)
+    parser.add_argument("--rate-timeout", type=float, default=0.0)
+    parser.add_argument("--hang", type=float, default=60.0, help="seconds an injected timeout holds the request")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="transcripts returned by STT")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = FakeConfig(
+        anthropic_latency=parse_latency(args.anthropic_latency),
+        sarvam_latency=parse_latency(args.sarvam_latency),
+        faults=FaultConfig(args.rate_429, args.rate_529, args.rate_timeout, args.hang),
+        transcripts=load_transcripts(args.corpus),
+        seed=args.seed,
+    )
+    server = start_fake_apis(config, args.host, args.port)
+    base = f"http://{args.host}:{server.server_port}"
+    print(f"ANTHROPIC_API_URL={base}/v1/messages")
+    print(f"SARVAM_API_URL={base}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
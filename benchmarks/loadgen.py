@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Load generator: replays a transcript corpus against a running deployment.
+
+Each virtual user loops over the corpus (from a different offset), sending a
+request to an endpoint drawn from --mix:
+
+    process   POST /process         {"text": utterance}
+    stream    POST /process/stream  same body, read to the last SSE event
+    stt       POST /api/stt         a short silent WAV upload
+    tts       POST /api/tts         the app's TTS request for a canned reply
+
+Requests are spread over --stores store ids (X-Store-Id). The run stops
+after --duration seconds or --requests requests, and reports throughput,
+p50/p95/p99 latency and error rate per endpoint (plus time to first byte for
+stream). Errors are broken down by status code or exception.
+
+Start the API fakes and the server pointed at them, then run the generator:
+
+    python benchmarks/fake_apis.py --port 8900 --rate-429 0.02 &
+    ANTHROPIC_API_URL=http://127.0.0.1:8900/v1/messages SARVAM_API_URL=http://127.0.0.1:8900 \\
+        ANTHROPIC_API_KEY=fake SARVAM_API_KEY=fake gunicorn server:app &
+    python benchmarks/loadgen.py --url http://127.0.0.1:5000 --concurrency 50 --duration 60 --json load.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_apis import load_transcripts, _silent_wav, RESPONSE_REPLIES, DEFAULT_CORPUS
+
+ENDPOINTS = ("process", "stream", "stt", "tts")
+
+
+def parse_mix(spec: str) -> dict[str, int]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r} (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+class Recorder:
+    """Latencies and outcomes per endpoint, shared by every virtual user."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.first_byte = defaultdict(list)
+        self.outcomes = defaultdict(Counter)
+
+    def record(self, endpoint: str, seconds: float, outcome: str, first_byte: float = None):
+        with self._lock:
+            self.outcomes[endpoint][outcome] += 1
+            if outcome == "200":
+                self.latencies[endpoint].append(seconds)
+                if first_byte is not None:
+                    self.first_byte[endpoint].append(first_byte)
+
+    def report(self, wall: float) -> dict:
+        results = {}
+        for endpoint, outcomes in sorted(self.outcomes.items()):
+            total = sum(outcomes.values())
+            latencies = sorted(self.latencies[endpoint])
+            errors = {k: v for k, v in outcomes.items() if k != "200"}
+            results[endpoint] = {
+                "requests": total,
+                "ok_per_s": round(len(latencies) / wall, 2),
+                "error_rate": round(sum(errors.values()) / total, 4),
+                "errors": errors,
+                "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+                "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            }
+            if self.first_byte[endpoint]:
+                first = sorted(self.first_byte[endpoint])
+                results[endpoint]["ttfb_p50_ms"] = round(percentile(first, 0.50) * 1000, 1)
+                results[endpoint]["ttfb_p95_ms"] = round(percentile(first, 0.95) * 1000, 1)
+        return results
+
+
+class VirtualUser:
+    def __init__(self, args, session: requests.Session, corpus: list[str], recorder: Recorder, index: int):
+        self.args = args
+        self.session = session
+        self.corpus = corpus
+        self.recorder = recorder
+        self.rng = random.Random(args.seed + index)
+        self.position = index * 7
+        self.headers = {"X-Store-Id": f"{args.store_prefix}{index % args.stores}"}
+        self.endpoints, self.weights = zip(*parse_mix(args.mix).items())
+        self.wav = _silent_wav(1.5)
+
+    def _utterance(self) -> str:
+        self.position += 1
+        return self.corpus[self.position % len(self.corpus)]
+
+    def _send(self, endpoint: str):
+        url, timeout = self.args.url.rstrip("/"), self.args.timeout
+        if endpoint == "process":
+            return self.session.post(f"{url}/process", json={"text": self._utterance(), "language": "hi-IN"},
+                                     headers=self.headers, timeout=timeout), None
+        if endpoint == "stream":
+            start = time.perf_counter()
+            response = self.session.post(f"{url}/process/stream", json={"text": self._utterance(), "language": "hi-IN"},
+                                         headers=self.headers, timeout=timeout, stream=True)
+            first_byte = None
+            with response:
+                for chunk in response.iter_content(chunk_size=None):
+                    if first_byte is None and chunk:
+                        first_byte = time.perf_counter() - start
+            return response, first_byte
+        if endpoint == "stt":
+            return self.session.post(f"{url}/api/stt", files={"file": ("turn.wav", self.wav, "audio/wav")},
+                                     data={"model": "saaras:v3", "mode": "transcribe"},
+                                     headers=self.headers, timeout=timeout), None
+        return self.session.post(f"{url}/api/tts", json={
+            "text": self.rng.choice(RESPONSE_REPLIES), "model": "bulbul:v3", "speaker": "shubh",
+            "pace": 1.2, "target_language_code": "hi-IN", "speech_sample_rate": 24000,
+        }, headers=self.headers, timeout=timeout), None
+
+    def run(self, deadline: float, budget: "Budget"):
+        while time.perf_counter() < deadline and budget.take():
+            endpoint = self.rng.choices(self.endpoints, self.weights)[0]
+            start = time.perf_counter()
+            try:
+                response, first_byte = self._send(endpoint)
+                outcome = str(response.status_code)
+            except requests.exceptions.RequestException as e:
+                first_byte, outcome = None, type(e).__name__
+            self.recorder.record(endpoint, time.perf_counter() - start, outcome, first_byte)
+
+
+class Budget:
+    """Request count shared by all virtual users (unlimited when None)."""
+
+    def __init__(self, total=None):
+        self.remaining = total
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        if self.remaining is None:
+            return True
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--mix", default="process=6,stream=2,stt=1,tts=1")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    parser.add_argument("--requests", type=int, help="stop after this many requests instead")
+    parser.add_argument("--stores", type=int, default=10, help="distinct store ids to spread load over")
+    parser.add_argument("--store-prefix", default="load_")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    corpus = load_transcripts(args.corpus)
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency))
+    recorder = Recorder()
+    budget = Budget(args.requests)
+    deadline = time.perf_counter() + (args.duration if args.requests is None else float("inf"))
+
+    users = [VirtualUser(args, session, corpus, recorder, i) for i in range(args.concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for future in [pool.submit(user.run, deadline, budget) for user in users]:
+            future.result()
+    wall = time.perf_counter() - start
+
+    results = recorder.report(wall)
+    total = sum(r["requests"] for r in results.values())
+    summary = {
+        "wall_s": round(wall, 2),
+        "requests": total,
+        "requests_per_s": round(total / wall, 2) if wall else 0.0,
+        "error_rate": round(sum(r["error_rate"] * r["requests"] for r in results.values()) / total, 4) if total else 0.0,
+    }
+    for endpoint, result in results.items():
+        print(f"{endpoint:>8}: {result}")
+    print(f"   total: {summary}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "summary": summary, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
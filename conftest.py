@@ -0,0 +1,31 @@
+"""Shared test fixtures: StoreStates on a throwaway SQLite file, so no test needs Postgres."""
+
+import pytest
+
+from core.state import StoreState
+from core.storage import SQLiteBackend
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "stores.sqlite3")
+
+
+@pytest.fixture
+def make_state(db_path):
+    """
+    Build StoreStates persisted to the test's SQLite file. Each one gets its
+    own connection, like separate workers sharing a store. Synchronous saves
+    unless write_behind is passed.
+    """
+    states = []
+
+    def make(store_id: str = "default", **kwargs) -> StoreState:
+        kwargs.setdefault("write_behind", False)
+        state = StoreState(store_id=store_id, storage=SQLiteBackend(store_id, db_path), **kwargs)
+        states.append(state)
+        return state
+
+    yield make
+    for state in states:
+        state.storage.close()
@@ -0,0 +1,214 @@
+"""
+Pooled PostgreSQL connections (one pool per worker process).
+
+Use `connection()` instead of psycopg2.connect:
+
+    with connection() as conn:
+        cursor = conn.cursor()
+        ...
+        conn.commit()
+
+Connections are health-checked on checkout and replaced if the server
+went away (e.g. after a DB restart). Broken connections are discarded
+on return rather than handed to the next caller.
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+import psycopg2
+import psycopg2.extensions
+from loguru import logger
+from core import metrics
+
+
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Ping connections that sat idle longer than this (0 = ping on every checkout)
+DB_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_HEALTH_CHECK_INTERVAL", "30"))
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the checkout timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded, blocking connection pool.
+    Thread-safe (and greenlet-safe once gevent has patched threading).
+    """
+
+    def __init__(
+        self,
+        connect: Callable,
+        minconn: int = 1,
+        maxconn: int = 5,
+        timeout: float = 10.0,
+        health_check_interval: float = 30.0
+    ):
+        self._connect = connect
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self._idle: list[tuple] = []  # (conn, returned_at)
+        self._size = 0               # open connections, idle + checked out
+        self._cond = threading.Condition()
+
+        for _ in range(minconn):
+            try:
+                self._idle.append((self._new_conn(), time.monotonic()))
+                self._size += 1
+            except psycopg2.Error as e:
+                logger.warning(f"DB pool warm-up failed: {e}")
+                break
+
+    def _new_conn(self):
+        conn = self._connect()
+        metrics.inc("db_pool_connections_opened")
+        return conn
+
+    def _is_healthy(self, conn, idle_for: float) -> bool:
+        if conn.closed:
+            return False
+        if idle_for < self.health_check_interval:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        """Check out a healthy connection, waiting up to `timeout` for one to free up."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+
+        with self._cond:
+            while not self._idle and self._size >= self.maxconn:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    metrics.inc("db_pool_timeouts")
+                    raise PoolTimeout(f"No DB connection free after {self.timeout}s")
+                self._cond.wait(remaining)
+
+            if self._idle:
+                conn, returned_at = self._idle.pop()
+            else:
+                conn, returned_at = None, None
+                self._size += 1  # reserve the slot before connecting outside the lock
+
+        metrics.observe("db_pool_wait_seconds", time.monotonic() - start)
+        metrics.inc("db_pool_checkouts")
+
+        try:
+            if conn is not None and not self._is_healthy(conn, time.monotonic() - returned_at):
+                logger.warning("Dropping dead DB connection, reconnecting")
+                metrics.inc("db_pool_reconnects")
+                self._close_quietly(conn)
+                conn = None
+            if conn is None:
+                conn = self._new_conn()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def putconn(self, conn, discard: bool = False):
+        """Return a connection. Broken or mid-transaction connections are cleaned up or closed."""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        with self._cond:
+            if discard or conn.closed:
+                self._close_quietly(conn)
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of the block."""
+        conn = self.getconn()
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def closeall(self):
+        with self._cond:
+            for conn, _ in self._idle:
+                self._close_quietly(conn)
+            self._size -= len(self._idle)
+            self._idle.clear()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        wait = metrics.get_histogram("db_pool_wait_seconds")
+        with self._cond:
+            idle, size = len(self._idle), self._size
+        return {
+            "min": self.minconn,
+            "max": self.maxconn,
+            "open": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "checkouts": metrics.get("db_pool_checkouts"),
+            "connections_opened": metrics.get("db_pool_connections_opened"),
+            "reconnects": metrics.get("db_pool_reconnects"),
+            "timeouts": metrics.get("db_pool_timeouts"),
+            "wait": wait.to_dict() if wait else None,
+        }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Process-wide pool for DATABASE_URL, re-created after fork."""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                dsn = os.getenv("DATABASE_URL")
+                _pool = ConnectionPool(
+                    lambda: psycopg2.connect(dsn),
+                    minconn=DB_POOL_MIN,
+                    maxconn=DB_POOL_MAX,
+                    timeout=DB_POOL_TIMEOUT,
+                    health_check_interval=DB_HEALTH_CHECK_INTERVAL,
+                )
+                _pool_pid = pid
+    return _pool
+
+
+def connection():
+    """Shortcut for get_pool().connection()."""
+    return get_pool().connection()
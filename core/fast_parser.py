@@ -0,0 +1,471 @@
+"""
+Deterministic fast-path intent parser. No LLM.
+Handles formulaic utterances ("50 kilo aloo aaya 30 rupaye kilo",
+"200 ka bijli bill bhara") locally and returns None for anything it is
+not sure about, so the router can fall back to Claude.
+Trigger words mirror ROUTER_SYSTEM_PROMPT.
+"""
+
+import re
+from typing import Optional
+from core.schemas import RouterOutput, SingleIntent, IntentType
+from core.normalizer import lookup_item, lookup_category
+
+
+# Confidence reported on intents produced by the fast path
+FAST_PATH_CONFIDENCE = 0.95
+
+
+# ══════════════════════════════════════════════════════════════
+# TRIGGER PHRASES (from ROUTER_SYSTEM_PROMPT)
+# ══════════════════════════════════════════════════════════════
+
+TRIGGERS = {
+    IntentType.INVENTORY_IN: [
+        "aaya", "aaye", "aayi", "aa gaya", "aa gaye", "laya", "laye", "kharida", "kharide",
+        "आया", "आए", "आये", "आई", "आ गया", "आ गए", "लाया", "खरीदा",
+    ],
+    IntentType.INVENTORY_OUT: [
+        "nikal diya", "kharab", "wapas", "damaged",
+        "निकाल दिया", "खराब", "ख़राब", "वापस",
+    ],
+    IntentType.SALE: [
+        "becha", "beche", "bechi", "bika", "bike", "biki", "bech diya", "bik gaya", "bikri", "sale", "sold",
+        "बेचा", "बेचे", "बेची", "बिका", "बिके", "बिकी", "बेच दिया", "बिक गया", "बिक्री",
+    ],
+    IntentType.EXPENSE: [
+        "kharcha", "kharch", "bhara", "bhari", "bill", "diya", "diye", "de diya", "paid",
+        "खर्चा", "खर्च", "भरा", "भरी", "बिल", "दिया", "दिए", "दे दिया",
+    ],
+    IntentType.QUERY_STOCK: [
+        "kitna hai", "kitna bacha", "kitna bacha hai", "kitne bache", "stock check", "kitna stock",
+        "कितना है", "कितना बचा", "कितना बचा है", "कितने बचे",
+    ],
+    IntentType.QUERY_SUMMARY: [
+        "aaj ka hisab", "aaj ka hisaab", "hisab", "hisaab", "kitna bana", "kamai", "summary",
+        "total bata", "total batao",
+        "आज का हिसाब", "हिसाब", "कितना बना", "कमाई",
+    ],
+    IntentType.QUERY_PROFIT: [
+        "munafa", "munaafa", "profit", "faayda", "fayda", "kitna kamaya",
+        "मुनाफा", "मुनाफ़ा", "फायदा", "फ़ायदा", "कितना कमाया",
+    ],
+    IntentType.CLOSE_DAY: [
+        "din khatam", "dukaan band", "dukan band", "aaj bas", "chal nikal", "closing time",
+        "दिन खत्म", "दिन ख़त्म", "दुकान बंद", "आज बस",
+    ],
+    IntentType.GREETING: [
+        "namaste", "namaskar", "hello", "hi", "kaise ho",
+        "नमस्ते", "नमस्कार", "हेलो", "कैसे हो",
+    ],
+}
+
+# Corrections and negations need context the fast path doesn't have
+BLOCKERS = {
+    "nahi", "nahin", "galat", "sahi", "theek", "thik", "correction", "fix", "update", "change",
+    "नहीं", "नही", "गलत", "ग़लत", "सही", "ठीक",
+}
+
+CONJUNCTIONS = {"aur", "and", "phir", "fir", "plus", "और", "फिर"}
+
+FILLERS = {
+    "hai", "hain", "he", "tha", "the", "thi", "ho", "hua", "hue", "bhai", "bhaiya", "bhaiyya", "ji",
+    "aaj", "abhi", "maine", "humne", "hamne", "ne", "mera", "meri", "apna", "maal", "stock", "sab",
+    "sirf", "to", "toh", "bhi", "please", "ko", "se", "mein", "me", "batao", "bata", "bolo", "dikhao",
+    "kitna", "kya", "total", "kul", "today", "a", "an", "of", "is", "was", "for", "at", "saman", "samaan",
+    "है", "हैं", "था", "थे", "थी", "हो", "हुआ", "भाई", "भैया", "जी", "आज", "अभी", "मैंने", "ने", "माल",
+    "स्टॉक", "सब", "सिर्फ", "तो", "भी", "को", "से", "में", "बताओ", "बता", "बोलो", "कितना", "क्या", "कुल", "सामान",
+}
+
+
+# ══════════════════════════════════════════════════════════════
+# NUMERALS AND UNITS
+# ══════════════════════════════════════════════════════════════
+
+NUMBER_WORDS = {
+    "zero": 0, "shunya": 0, "ek": 1, "do": 2, "teen": 3, "char": 4, "chaar": 4,
+    "paanch": 5, "panch": 5, "chhe": 6, "che": 6, "chah": 6, "saat": 7, "aath": 8,
+    "nau": 9, "das": 10, "gyarah": 11, "gyaarah": 11, "barah": 12, "baarah": 12,
+    "terah": 13, "chaudah": 14, "pandrah": 15, "solah": 16, "satrah": 17,
+    "atharah": 18, "unnis": 19, "bees": 20, "pachees": 25, "pachchis": 25,
+    "tees": 30, "paintees": 35, "chalis": 40, "chaalis": 40, "paintalis": 45,
+    "pachas": 50, "pachaas": 50, "sattar": 70, "pachattar": 75, "assi": 80, "nabbe": 90,
+    "aadha": 0.5, "adha": 0.5, "pauna": 0.75, "dedh": 1.5, "dhai": 2.5, "dhaai": 2.5,
+    "एक": 1, "दो": 2, "तीन": 3, "चार": 4, "पांच": 5, "पाँच": 5, "छह": 6, "छः": 6, "छे": 6,
+    "सात": 7, "आठ": 8, "नौ": 9, "दस": 10, "ग्यारह": 11, "बारह": 12, "तेरह": 13, "चौदह": 14,
+    "पंद्रह": 15, "सोलह": 16, "सत्रह": 17, "अठारह": 18, "उन्नीस": 19, "बीस": 20, "पच्चीस": 25,
+    "तीस": 30, "पैंतीस": 35, "चालीस": 40, "पैंतालीस": 45, "पचास": 50, "साठ": 60,
+    "सत्तर": 70, "पचहत्तर": 75, "अस्सी": 80, "नब्बे": 90,
+    "आधा": 0.5, "पौना": 0.75, "डेढ़": 1.5, "डेढ": 1.5, "ढाई": 2.5,
+}
+
+# "saadhe teen" = 3.5, "sava do" = 2.25, "paune paanch" = 4.75
+NUMBER_MODIFIERS = {
+    "saadhe": 0.5, "sadhe": 0.5, "sava": 0.25, "sawa": 0.25, "paune": -0.25,
+    "साढ़े": 0.5, "साढे": 0.5, "सवा": 0.25, "पौने": -0.25,
+}
+
+MULTIPLIERS = {
+    "sau": 100, "hazaar": 1000, "hazar": 1000, "hajar": 1000, "lakh": 100000,
+    "सौ": 100, "हज़ार": 1000, "हजार": 1000, "लाख": 100000,
+}
+
+UNITS = {
+    "kilo": "kg", "kg": "kg", "kgs": "kg", "kilogram": "kg", "किलो": "kg", "केजी": "kg",
+    "gram": "gram", "grams": "gram", "gm": "gram", "ग्राम": "gram",
+    "litre": "litre", "liter": "litre", "litres": "litre", "liters": "litre", "ltr": "litre",
+    "लीटर": "litre", "लिटर": "litre",
+    "packet": "packet", "packets": "packet", "pack": "packet", "pkt": "packet", "पैकेट": "packet",
+    "piece": "piece", "pieces": "piece", "pcs": "piece", "unit": "piece", "dana": "piece",
+    "पीस": "piece", "दाना": "piece",
+    "dozen": "dozen", "darjan": "dozen", "दर्जन": "dozen",
+    "quintal": "quintal", "क्विंटल": "quintal",
+    "bora": "bora", "bori": "bora", "sack": "bora", "बोरा": "bora", "बोरी": "bora",
+}
+
+CURRENCY = {
+    "rupaye", "rupaiye", "rupay", "rupee", "rupees", "rupiya", "rs", "₹",
+    "रुपये", "रुपए", "रुपया", "रूपये", "रूपए",
+}
+KA = {"ka", "ki", "ke", "का", "की", "के"}
+WALA = {"wala", "wali", "wale", "वाला", "वाली", "वाले"}
+PER = {"per", "prati", "प्रति"}
+
+_DEVANAGARI_DIGITS = str.maketrans("०१२३४५६७८९", "0123456789")
+_DIGIT_RE = re.compile(r"^\d+(\.\d+)?$")
+_SPLIT_RE = re.compile(r"[\s,!?।|;:\"'()]+")
+
+_PHRASES: dict[tuple, IntentType] = {
+    tuple(phrase.split()): intent
+    for intent, phrases in TRIGGERS.items()
+    for phrase in phrases
+}
+_MAX_PHRASE_LEN = max(len(p) for p in _PHRASES)
+
+
+# ══════════════════════════════════════════════════════════════
+# TOKENIZATION
+# ══════════════════════════════════════════════════════════════
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase, unify digits, split glued numbers/units ("50kg"), drop punctuation."""
+    text = text.lower().translate(_DEVANAGARI_DIGITS).replace("₹", " ₹ ")
+    text = re.sub(r"(\d)(?=[^\d\s.,])", r"\1 ", text)
+    text = re.sub(r"(?<=\d),(?=\d{3})", "", text)  # 1,500 → 1500
+    text = re.sub(r"\.(?!\d)", " ", text)          # sentence dots, keep 2.5
+    return [t for t in _SPLIT_RE.split(text) if t]
+
+
+def _is_number_word(word: str) -> bool:
+    return bool(_DIGIT_RE.match(word)) or word in NUMBER_WORDS
+
+
+def _number_value(word: str) -> float:
+    if _DIGIT_RE.match(word):
+        return float(word)
+    return float(NUMBER_WORDS[word])
+
+
+def parse_number(words: list[str], i: int) -> Optional[tuple[float, int]]:
+    """
+    Parse a spoken number starting at words[i].
+    Handles digits, Hindi/Hinglish words, fractions and sau/hazaar groups
+    ("dhai sau" → 250, "saadhe teen kilo" → 3.5, "do sau pachas" → 250).
+
+    Returns:
+        (value, index after the number) or None if words[i] doesn't start a number
+    """
+    total = 0.0
+    chunk = 0.0
+    seen = False
+    last_was_small = False
+    j = i
+
+    while j < len(words):
+        w = words[j]
+        if w in NUMBER_MODIFIERS and j + 1 < len(words) and _is_number_word(words[j + 1]):
+            if last_was_small:
+                break
+            chunk += _number_value(words[j + 1]) + NUMBER_MODIFIERS[w]
+            seen, last_was_small = True, True
+            j += 2
+        elif _is_number_word(w):
+            if last_was_small:
+                break
+            chunk += _number_value(w)
+            seen, last_was_small = True, True
+            j += 1
+        elif w in MULTIPLIERS:
+            mult = MULTIPLIERS[w]
+            if mult == 100:
+                chunk = (chunk or 1) * mult
+            else:
+                total += (chunk or 1) * mult
+                chunk = 0.0
+            seen, last_was_small = True, False
+            j += 1
+        else:
+            break
+
+    if not seen:
+        return None
+    return total + chunk, j
+
+
+def _classify(words: list[str]) -> Optional[list[tuple[str, object]]]:
+    """
+    Turn one clause into typed tokens:
+    num, unit, cur, ka, wala, per, item, cat, trig.
+    Returns None if the clause contains a blocker or an unknown word.
+    """
+    tokens = []
+    i = 0
+    while i < len(words):
+        w = words[i]
+        if w in BLOCKERS:
+            return None
+
+        matched = False
+        for n in range(min(_MAX_PHRASE_LEN, len(words) - i), 0, -1):
+            phrase = tuple(words[i:i + n])
+            if phrase in _PHRASES:
+                tokens.append(("trig", _PHRASES[phrase]))
+                i += n
+                matched = True
+                break
+        if matched:
+            continue
+
+        number = parse_number(words, i)
+        if number is not None:
+            tokens.append(("num", number[0]))
+            i = number[1]
+            continue
+
+        if w in UNITS:
+            tokens.append(("unit", UNITS[w]))
+        elif w in CURRENCY:
+            tokens.append(("cur", None))
+        elif w in KA:
+            tokens.append(("ka", None))
+        elif w in WALA:
+            tokens.append(("wala", None))
+        elif w in PER:
+            tokens.append(("per", None))
+        elif lookup_item(w):
+            tokens.append(("item", lookup_item(w)))
+        elif lookup_category(w):
+            tokens.append(("cat", lookup_category(w)))
+        elif w in FILLERS:
+            pass
+        else:
+            return None
+        i += 1
+
+    # "₹ 200" reads the same as "200 rupaye"
+    for k in range(len(tokens) - 1):
+        if tokens[k][0] == "cur" and tokens[k + 1][0] == "num":
+            tokens[k], tokens[k + 1] = tokens[k + 1], tokens[k]
+    return tokens
+
+
+# ══════════════════════════════════════════════════════════════
+# SLOT EXTRACTION
+# ══════════════════════════════════════════════════════════════
+
+def _kind(tokens: list, i: int) -> Optional[str]:
+    return tokens[i][0] if i < len(tokens) else None
+
+
+def _extract_amounts(tokens: list) -> Optional[dict]:
+    """
+    Read quantities and prices off the typed tokens (PRICE PATTERNS in the prompt):
+      "50 kilo"            → quantity 50 kg
+      "30 rupaye kilo"     → price_per_unit 30 (per kg)
+      "30 ka kilo"         → price_per_unit 30
+      "50 wala"            → price_per_unit 50
+      "200 ka" / "200 rupaye ka" → total_amount 200
+      "40 rupaye"          → money, ambiguous (per unit or total)
+      bare number          → bare
+    """
+    slots = {"quantities": [], "prices": [], "totals": [], "ambiguous": [], "bare": []}
+    i = 0
+    while i < len(tokens):
+        kind, value = tokens[i]
+        if kind != "num":
+            i += 1
+            continue
+
+        nxt, after = _kind(tokens, i + 1), _kind(tokens, i + 2)
+        if nxt == "unit":
+            slots["quantities"].append((value, tokens[i + 1][1]))
+            i += 2
+        elif nxt == "cur" and after == "unit":
+            slots["prices"].append((value, tokens[i + 2][1]))
+            i += 3
+        elif nxt == "cur" and after == "per" and _kind(tokens, i + 3) == "unit":
+            slots["prices"].append((value, tokens[i + 3][1]))
+            i += 4
+        elif nxt == "cur" and after == "ka":
+            slots["totals"].append(value)
+            i += 3
+        elif nxt == "cur":
+            slots["ambiguous"].append(value)
+            i += 2
+        elif nxt in ("ka", "per") and after == "unit":
+            slots["prices"].append((value, tokens[i + 2][1]))
+            i += 3
+        elif nxt == "ka":
+            slots["totals"].append(value)
+            i += 2
+        elif nxt == "wala":
+            slots["prices"].append((value, None))
+            i += 2
+        elif nxt == "item":
+            slots["quantities"].append((value, None))
+            i += 1
+        else:
+            slots["bare"].append(value)
+            i += 1
+    return slots
+
+
+def _stray_units(tokens: list) -> bool:
+    """A unit that isn't attached to a number ("aloo kitna kilo")."""
+    for i, (kind, _) in enumerate(tokens):
+        if kind == "unit":
+            prev = _kind(tokens, i - 1) if i > 0 else None
+            prev2 = _kind(tokens, i - 2) if i > 1 else None
+            if prev != "num" and not (prev in ("cur", "ka", "per") and prev2 in ("num", "cur")):
+                return True
+    return False
+
+
+def _build_item_intent(intent: IntentType, items: list, slots: dict) -> Optional[SingleIntent]:
+    if len(items) != 1 or slots["ambiguous"] or len(slots["quantities"]) > 1:
+        return None
+    if len(slots["prices"]) > 1 or len(slots["totals"]) > 1:
+        return None
+
+    quantities = slots["quantities"]
+    if not quantities and len(slots["bare"]) == 1:
+        quantities = [(slots["bare"][0], None)]
+    elif slots["bare"]:
+        return None
+    if len(quantities) != 1:
+        return None
+
+    quantity, unit = quantities[0]
+    price, price_unit = slots["prices"][0] if slots["prices"] else (None, None)
+    total = slots["totals"][0] if slots["totals"] else None
+
+    if intent == IntentType.INVENTORY_OUT and (price is not None or total is not None):
+        return None
+    if unit and price_unit and unit != price_unit:
+        return None
+    unit = unit or price_unit
+
+    if total is None and price is not None:
+        total = quantity * price
+
+    return SingleIntent(
+        intent=intent,
+        item=items[0],
+        quantity=quantity,
+        unit=unit,
+        price_per_unit=price,
+        total_amount=total,
+        confidence=FAST_PATH_CONFIDENCE,
+    )
+
+
+def _build_expense_intent(categories: list, slots: dict, description: str) -> Optional[SingleIntent]:
+    if len(set(categories)) != 1 or slots["quantities"] or slots["prices"]:
+        return None
+    amounts = slots["totals"] + slots["ambiguous"] + slots["bare"]
+    if len(amounts) != 1:
+        return None
+    return SingleIntent(
+        intent=IntentType.EXPENSE,
+        category=categories[0],
+        total_amount=amounts[0],
+        description=description,
+        confidence=FAST_PATH_CONFIDENCE,
+    )
+
+
+def parse_clause(words: list[str]) -> Optional[SingleIntent]:
+    """Parse one clause (no conjunctions). None if not confident."""
+    tokens = _classify(words)
+    if not tokens:
+        return None
+
+    intents = {value for kind, value in tokens if kind == "trig"}
+    items = [value for kind, value in tokens if kind == "item"]
+    categories = [value for kind, value in tokens if kind == "cat"]
+    has_numbers = any(kind == "num" for kind, _ in tokens)
+
+    # bijli / kiraya / rent are expense triggers on their own
+    if not intents and categories:
+        intents = {IntentType.EXPENSE}
+    if len(intents) != 1 or _stray_units(tokens):
+        return None
+    intent = intents.pop()
+
+    if intent in (IntentType.INVENTORY_IN, IntentType.INVENTORY_OUT, IntentType.SALE):
+        if categories:
+            return None
+        return _build_item_intent(intent, items, _extract_amounts(tokens))
+
+    if intent == IntentType.EXPENSE:
+        if items:
+            return None
+        return _build_expense_intent(categories, _extract_amounts(tokens), " ".join(words))
+
+    if has_numbers or categories:
+        return None
+
+    if intent == IntentType.QUERY_STOCK:
+        if len(items) > 1:
+            return None
+        return SingleIntent(
+            intent=intent,
+            item=items[0] if items else None,
+            confidence=FAST_PATH_CONFIDENCE,
+        )
+
+    if items:
+        return None
+    return SingleIntent(intent=intent, confidence=FAST_PATH_CONFIDENCE)
+
+
+def parse_fast(text: str) -> Optional[RouterOutput]:
+    """
+    Try to route text without the LLM.
+
+    Returns:
+        RouterOutput when every clause parsed with high confidence, else None
+    """
+    words = tokenize(text)
+    if not words:
+        return None
+
+    clauses: list[list[str]] = [[]]
+    for w in words:
+        if w in CONJUNCTIONS:
+            clauses.append([])
+        else:
+            clauses[-1].append(w)
+
+    intents = []
+    for clause in clauses:
+        if not clause:
+            continue
+        intent = parse_clause(clause)
+        if intent is None:
+            return None
+        intents.append(intent)
+
+    if not intents:
+        return None
+    return RouterOutput(intents=intents)
@@ -0,0 +1,89 @@
+"""
+Indexed fuzzy matching for item names.
+
+A character n-gram inverted index narrows the catalog to names that share spelling
+with the query and fall in the length window the threshold allows; only those
+are scored with SequenceMatcher. Scores and the threshold mean exactly what
+they did with the old linear scan (SequenceMatcher.ratio), so answers only
+differ for a match that shares no n-gram with the query, or that ranks below
+max_candidates on shared n-grams.
+
+Bigrams are the default: short typo'd names ("yogt" → yogurt) often share
+no trigram with their match.
+"""
+
+import math
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Iterable
+
+
+def ngrams(word: str, n: int = 2) -> set[str]:
+    """Character n-grams of the space-padded word ("aloo" → " a", "al", "lo", "oo", "o ")."""
+    padded = f" {word} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class FuzzyIndex:
+    """Best-match lookup over a fixed set of canonical names."""
+
+    def __init__(self, names: Iterable[str], n: int = 2, max_candidates: int = 64):
+        """
+        Args:
+            names: Canonical names to match against
+            n: N-gram length used for the index
+            max_candidates: Names scored per query, most shared n-grams first
+        """
+        # Ordered by length so each posting list can be cut to the length window with bisect
+        self.names = sorted(set(names), key=lambda name: (len(name), name))
+        self._lengths = [len(name) for name in self.names]
+        self.n = n
+        self.max_candidates = max_candidates
+        self._postings: dict[str, list[int]] = {}
+        for i, name in enumerate(self.names):
+            for gram in ngrams(name, n):
+                self._postings.setdefault(gram, []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def candidates(self, query: str, threshold: float) -> list[int]:
+        """Ids of names worth scoring, most shared n-grams first."""
+        # ratio = 2·matches / (len_a + len_b) ≤ 2·min(len_a, len_b) / (len_a + len_b)
+        n = len(query)
+        eps = 1e-9
+        min_len = math.ceil(threshold * n / (2 - threshold) - eps) if threshold < 2 else n
+        max_len = math.floor(n * (2 - threshold) / threshold + eps) if threshold > 0 else max(self._lengths, default=0)
+        lo = bisect_left(self._lengths, min_len)
+        hi = bisect_right(self._lengths, max_len)
+        if lo >= hi:
+            return []
+
+        shared = Counter()
+        for gram in ngrams(query, self.n):
+            postings = self._postings.get(gram)
+            if postings:
+                shared.update(postings[bisect_left(postings, lo):bisect_left(postings, hi)])
+
+        top = heapq.nsmallest(self.max_candidates, shared.items(), key=lambda kv: (-kv[1], kv[0]))
+        return [i for i, _ in top]
+
+    def best_match(self, query: str, threshold: float = 0.8) -> str:
+        """
+        Highest-scoring name with SequenceMatcher ratio ≥ threshold
+        (ties go to the alphabetically first), or "" if none.
+        """
+        best_name, best_score = "", 0.0
+        for i in self.candidates(query, threshold):
+            name = self.names[i]
+            matcher = SequenceMatcher(None, query, name)
+            # quick_ratio is an upper bound on ratio; skip names that cannot win
+            if matcher.quick_ratio() < max(threshold, best_score):
+                continue
+            score = matcher.ratio()
+            if score > best_score or (score == best_score and name < best_name):
+                best_name, best_score = name, score
+
+        return best_name if best_score >= threshold else ""
@@ -0,0 +1,254 @@
+"""
+Write-behind persistence: a local fsync'd journal in front of Postgres.
+
+save_to_db appends the turn's changes to the journal (one JSON line, fsync'd)
+and returns. A background flusher batches pending entries into Postgres and
+drops them from the journal once the transaction commits. On startup the
+journal is flushed before state is loaded, so nothing acknowledged to the
+shopkeeper is lost if the worker dies between the turn and the flush.
+
+Entries carry a sequence number; the last one committed is stored in Postgres
+(journal_checkpoint) in the same transaction as the rows, so a crash between
+commit and truncation never writes an entry twice.
+
+WRITE_BEHIND=1 turns it on. There is one journal file per store, owned by a
+single process: opening one takes an exclusive lock on "<journal>.lock", and a
+second worker opening the same journal fails with JournalInUse instead of
+sharing (and rewriting) it.
+"""
+
+import os
+import json
+import fcntl
+import time
+import uuid
+import atexit
+import threading
+from typing import Callable, Optional
+from loguru import logger
+from core import metrics
+
+
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "0") == "1"
+JOURNAL_PATH = os.getenv("JOURNAL_PATH", "state_journal.jsonl")
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "1.0"))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "100"))
+
+
+def journal_path_for(store_id: str) -> str:
+    """
+    Journal file for a store: JOURNAL_PATH with the store id before the
+    extension ("state_journal.shop_42.jsonl"). Store ids are validated by the
+    registry, so they are safe in a file name.
+    """
+    root, ext = os.path.splitext(JOURNAL_PATH)
+    return f"{root}.{store_id}{ext}"
+
+
+class JournalInUse(RuntimeError):
+    """Another process (or Journal) already has this journal file open."""
+
+
+class Journal:
+    """
+    Append-only JSON-lines file of pending changes.
+
+    The first line is a header {"journal_id": ..., "seq": last_discarded};
+    every other line is {"seq": n, "inventory": [...], "expenses": [...], "sales": [...]}.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # The journal itself is replaced on every compaction, so the lock lives in a sidecar file
+        self._owner = _lock_exclusive(f"{path}.lock")
+        self._lock = threading.Lock()
+        self._pending: list[dict] = []
+        self.journal_id = uuid.uuid4().hex
+        self._last_seq = 0
+
+        if os.path.exists(path):
+            self._read()
+        else:
+            self._compact()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _read(self):
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+        for i, line in enumerate(lines):
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Only the last line can be torn by a crash mid-append
+                logger.warning(f"Journal {self.path}: skipping unreadable line {i + 1}")
+                continue
+            if "journal_id" in entry:
+                self.journal_id = entry["journal_id"]
+                self._last_seq = max(self._last_seq, entry["seq"])
+            else:
+                self._pending.append(entry)
+                self._last_seq = max(self._last_seq, entry["seq"])
+
+        if self._pending:
+            logger.info(f"📒 Journal {self.path}: {len(self._pending)} entries to replay")
+
+    def _compact(self):
+        """Rewrite the file with just the header and the still-pending entries."""
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"journal_id": self.journal_id, "seq": self._last_seq}) + "\n")
+            for entry in self._pending:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        _fsync_dir(self.path)
+
+    def append(self, inventory: list, expenses: list, sales: list) -> int:
+        """Durably record one save's changes. Returns the entry's sequence number."""
+        with self._lock:
+            self._last_seq += 1
+            entry = {"seq": self._last_seq, "inventory": inventory, "expenses": expenses, "sales": sales}
+            with metrics.timer("journal_fsync_seconds"):
+                self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._pending.append(entry)
+            return entry["seq"]
+
+    def pending(self, limit: Optional[int] = None) -> list[dict]:
+        """Oldest pending entries first."""
+        with self._lock:
+            return list(self._pending[:limit])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def discard_through(self, seq: int):
+        """Drop entries up to seq once they are committed to Postgres."""
+        with self._lock:
+            self._pending = [e for e in self._pending if e["seq"] > seq]
+            self._file.close()
+            self._compact()
+            self._file = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._owner.close()
+
+
+def _lock_exclusive(lock_path: str):
+    """Open lock_path holding an exclusive flock (released when the file is closed)."""
+    owner = open(lock_path, "a")
+    try:
+        fcntl.flock(owner.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        owner.close()
+        raise JournalInUse(
+            f"Journal {lock_path[:-len('.lock')]} is open in another worker; "
+            f"write-behind needs one worker per journal (GUNICORN_WORKERS=1 or a JOURNAL_PATH per worker)"
+        ) from None
+    return owner
+
+
+def _fsync_dir(path: str):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class WriteBehindFlusher:
+    """
+    Moves journal entries into Postgres in batches.
+
+    `write_batch(journal_id, entries)` must commit the entries' rows and the
+    checkpoint in one transaction. flush() does the same work synchronously
+    (startup replay, shutdown, tests).
+    """
+
+    def __init__(
+        self,
+        journal: Journal,
+        write_batch: Callable[[str, list], None],
+        interval: float = WRITE_BEHIND_FLUSH_INTERVAL,
+        batch_size: int = WRITE_BEHIND_BATCH_SIZE
+    ):
+        self.journal = journal
+        self.write_batch = write_batch
+        self.interval = interval
+        self.batch_size = batch_size
+
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def notify(self):
+        """Called after an append; flushes early once a full batch is waiting."""
+        if len(self.journal) >= self.batch_size:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write every pending entry to Postgres. Returns the number flushed."""
+        flushed = 0
+        with self._flush_lock:
+            while True:
+                entries = self.journal.pending(self.batch_size)
+                if not entries:
+                    break
+                with metrics.timer("write_behind_flush_seconds"):
+                    self.write_batch(self.journal.journal_id, entries)
+                self.journal.discard_through(entries[-1]["seq"])
+                metrics.inc("write_behind_flushed_entries", len(entries))
+                flushed += len(entries)
+        return flushed
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                metrics.inc("write_behind_errors")
+                logger.error(f"Write-behind flush failed ({len(self.journal)} entries pending): {e}")
+
+    def stop(self):
+        """Stop the background thread after a final flush."""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.interval + 5)
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Write-behind final flush failed, {len(self.journal)} entries left in journal: {e}")
+        atexit.unregister(self.stop)
+
+    def stats(self) -> dict:
+        flush = metrics.get_histogram("write_behind_flush_seconds")
+        return {
+            "pending": len(self.journal),
+            "flushed_entries": metrics.get("write_behind_flushed_entries"),
+            "errors": metrics.get("write_behind_errors"),
+            "interval_s": self.interval,
+            "batch_size": self.batch_size,
+            "flush": flush.to_dict() if flush else None,
+        }
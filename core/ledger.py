@@ -0,0 +1,252 @@
+"""
+Columnar, append-only sales and expense ledgers.
+
+Each column is a typed array (array.array): numbers as doubles, timestamps as
+int64 microseconds since the epoch (naive shop-local time, like the
+timestamps stored in Postgres), and strings (item, unit, category,
+description) as ids into the ledger's intern table. A row costs a few dozen
+bytes instead of a Pydantic record with a datetime and its __dict__.
+
+Rows are only ever appended, so a LedgerView (ledger + fixed row range) is a
+consistent, zero-copy snapshot: later appends don't show up in it. Ledgers
+are never truncated in place; dropping rows builds a new ledger.
+"""
+
+import sys
+from abc import ABC, abstractmethod
+from array import array
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+from itertools import islice
+from typing import Iterator, NamedTuple, Optional
+
+
+EPOCH = datetime(1970, 1, 1)
+DAY_US = 86_400_000_000
+
+# Column kinds → array typecodes ("s" strings are interned ids, "t" timestamps)
+_TYPECODES = {"d": "d", "s": "I", "t": "q"}
+
+
+def to_epoch_us(timestamp: datetime) -> int:
+    return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+
+def from_epoch_us(us: int) -> datetime:
+    return EPOCH + timedelta(microseconds=us)
+
+
+class SaleRow(NamedTuple):
+    item_name: str
+    quantity: float
+    unit: str
+    price_per_unit: float
+    total: float
+    timestamp: datetime
+    unit_cost: float = 0.0  # item's avg cost when sold; COGS = quantity × unit_cost
+
+
+class ExpenseRow(NamedTuple):
+    category: str
+    amount: float
+    description: str
+    timestamp: datetime
+
+
+class Interner:
+    """Two-way map between strings and small integer ids."""
+
+    def __init__(self):
+        self.values: list[str] = []
+        self._ids: dict[str, int] = {}
+
+    def id(self, value: str) -> int:
+        found = self._ids.get(value)
+        if found is None:
+            found = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return found
+
+    def __getitem__(self, index: int) -> str:
+        return self.values[index]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def nbytes(self) -> int:
+        return (
+            sys.getsizeof(self.values) + sys.getsizeof(self._ids)
+            + sum(sys.getsizeof(v) for v in self.values)
+        )
+
+
+class ColumnarLedger(ABC):
+    """
+    Append-only table of typed columns. Subclasses set row_type and schema and
+    spell out append (it runs on every sale, so it avoids a per-field loop).
+    """
+
+    row_type: type = tuple
+    # Field name → column kind ("d" double, "s" interned string, "t" timestamp)
+    schema: dict[str, str] = {}
+
+    def __init__(self):
+        self.strings = Interner()
+        self.columns: dict[str, array] = {
+            name: array(_TYPECODES[kind]) for name, kind in self.schema.items()
+        }
+        self._fields = [(self.columns[name], kind) for name, kind in self.schema.items()]
+
+    @abstractmethod
+    def append(self, *values):
+        """Add one row (values in schema order); returns it as a row_type."""
+
+    def __len__(self) -> int:
+        return len(self._fields[0][0])
+
+    def row(self, index: int):
+        strings = self.strings.values
+        values = []
+        for column, kind in self._fields:
+            value = column[index]
+            if kind == "s":
+                value = strings[value]
+            elif kind == "t":
+                value = from_epoch_us(value)
+            values.append(value)
+        return self.row_type(*values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ledger index out of range")
+        return self.row(index)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.view())
+
+    def view(self, start: int = 0, end: Optional[int] = None) -> "LedgerView":
+        """Rows [start, end) as of now; appends made later are not visible in the view."""
+        return LedgerView(self, start, len(self) if end is None else end)
+
+    def sum(self, field: str) -> float:
+        return self.view().sum(field)
+
+    def group_sum(self, field: str, by: str) -> dict[str, float]:
+        return self.view().group_sum(field, by)
+
+    def days(self) -> Iterator[date]:
+        """Distinct days (of the timestamp column) present in the ledger."""
+        return (from_epoch_us(d * DAY_US).date() for d in {t // DAY_US for t in self.columns["timestamp"]})
+
+    def since(self, cutoff: datetime) -> "ColumnarLedger":
+        """New ledger (and intern table) holding only rows stamped at or after cutoff."""
+        cutoff_us = to_epoch_us(cutoff)
+        kept = type(self)()
+        for i, t in enumerate(self.columns["timestamp"]):
+            if t >= cutoff_us:
+                kept.append(*self.row(i))
+        return kept
+
+    def nbytes(self) -> int:
+        """Bytes held by the columns and the intern table."""
+        arrays = sum(sys.getsizeof(column) for column in self.columns.values())
+        return sys.getsizeof(self) + arrays + self.strings.nbytes()
+
+
+class LedgerView:
+    """Fixed row range of a ledger; iterating decodes rows lazily, nothing is copied."""
+
+    __slots__ = ("ledger", "start", "end")
+
+    def __init__(self, ledger: ColumnarLedger, start: int, end: int):
+        self.ledger = ledger
+        self.start = start
+        self.end = max(start, end)
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __iter__(self) -> Iterator:
+        # Decode column by column, then zip into rows
+        strings = self.ledger.strings.values
+        decoded = []
+        for name, kind in self.ledger.schema.items():
+            column = self.column(name)
+            if kind == "s":
+                column = map(strings.__getitem__, column)
+            elif kind == "t":
+                column = map(from_epoch_us, column)
+            decoded.append(column)
+        return map(self.ledger.row_type, *decoded)
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ledger view index out of range")
+        return self.ledger.row(self.start + index)
+
+    def column(self, field: str) -> Iterator:
+        """Raw column values in the view (interned ids for strings, epoch µs for timestamps)."""
+        return islice(self.ledger.columns[field], self.start, self.end)
+
+    def sum(self, field: str) -> float:
+        return sum(self.column(field))
+
+    def group_sum(self, field: str, by: str) -> dict[str, float]:
+        """Σ field per distinct value of the string column `by`."""
+        totals: dict[int, float] = defaultdict(float)
+        for key, value in zip(self.column(by), self.column(field)):
+            totals[key] += value
+        strings = self.ledger.strings.values
+        return {strings[key]: total for key, total in totals.items()}
+
+
+class SalesLedger(ColumnarLedger):
+    row_type = SaleRow
+    schema = {
+        "item_name": "s",
+        "quantity": "d",
+        "unit": "s",
+        "price_per_unit": "d",
+        "total": "d",
+        "timestamp": "t",
+        "unit_cost": "d",
+    }
+
+    def append(self, item_name: str, quantity: float, unit: str, price_per_unit: float,
+               total: float, timestamp: datetime, unit_cost: float = 0.0) -> SaleRow:
+        row = SaleRow(item_name, float(quantity), unit, float(price_per_unit), float(total), timestamp,
+                      float(unit_cost))
+        columns, intern = self.columns, self.strings.id
+        columns["item_name"].append(intern(item_name))
+        columns["quantity"].append(row.quantity)
+        columns["unit"].append(intern(unit))
+        columns["price_per_unit"].append(row.price_per_unit)
+        columns["total"].append(row.total)
+        columns["timestamp"].append(to_epoch_us(timestamp))
+        columns["unit_cost"].append(row.unit_cost)
+        return row
+
+
+class ExpenseLedger(ColumnarLedger):
+    row_type = ExpenseRow
+    schema = {
+        "category": "s",
+        "amount": "d",
+        "description": "s",
+        "timestamp": "t",
+    }
+
+    def append(self, category: str, amount: float, description: str, timestamp: datetime) -> ExpenseRow:
+        row = ExpenseRow(category, float(amount), description, timestamp)
+        columns, intern = self.columns, self.strings.id
+        columns["category"].append(intern(category))
+        columns["amount"].append(row.amount)
+        columns["description"].append(intern(description))
+        columns["timestamp"].append(to_epoch_us(timestamp))
+        return row
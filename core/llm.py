@@ -1,13 +1,185 @@
 """
 LLM helper using raw Anthropic REST API (no SDK).
+One pooled keep-alive session per worker process, split connect/read
+timeouts, and jittered retries on 429/529/5xx within a per-call deadline.
 """
 
+import os
+import json
+import time
+import random
+import threading
 import requests
+from urllib.parse import urlparse
+from typing import Iterator, Union
+from requests.adapters import HTTPAdapter
 from loguru import logger
+from core import metrics
+
+
+ANTHROPIC_API_URL = os.getenv("ANTHROPIC_API_URL", "https://api.anthropic.com/v1/messages")
+CLAUDE_MODEL = "claude-sonnet-4-20250514"
+
+# Connections kept open per worker and host (all greenlets/threads share one pool).
+# Raise it under the gevent worker so concurrent turns don't open throwaway connections.
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "4"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "3.05"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+# Wall-clock budget for one call, retries included. A turn makes up to two calls
+# (router, response), so keep twice this under GUNICORN_TIMEOUT (60 s).
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "25"))
+
+# 529 = Anthropic "overloaded"
+RETRY_STATUSES = {429, 500, 502, 503, 504, 529}
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Process-wide pooled session. Re-created after fork so gunicorn workers
+    never share sockets with the master.
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=LLM_POOL_SIZE, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session, _session_pid = session, pid
+    return _session
+
+
+def _host_pools(url: str) -> list:
+    """urllib3 connection pools the session holds for url's host."""
+    manager = get_session().get_adapter(url).poolmanager
+    host = urlparse(url).hostname
+    return [manager.pools[key] for key in manager.pools.keys() if key.key_host == host]
+
+
+def get_pool_stats(url: str = ANTHROPIC_API_URL) -> dict:
+    """Connection-reuse numbers for the Anthropic host pool."""
+    pools = _host_pools(url)
+    num_requests = sum(p.num_requests for p in pools)
+    num_connections = sum(p.num_connections for p in pools)
+    return {
+        "pool_size": LLM_POOL_SIZE,
+        "requests": num_requests,
+        "connections_opened": num_connections,
+        "reuse_ratio": 1 - num_connections / num_requests if num_requests else 0.0,
+        "retries": metrics.get("llm_http_retries"),
+    }
+
+
+def _retry_delay(attempt: int, response=None) -> float:
+    """retry-after if the server sent one, else full-jitter exponential backoff."""
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), LLM_BACKOFF_MAX)
+            except ValueError:
+                pass
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt)))
+
+
+def _can_retry(attempt: int, delay: float, deadline: float) -> bool:
+    """Retries left, and the backoff still leaves the next attempt at least a connect timeout."""
+    return attempt < LLM_MAX_RETRIES and time.monotonic() + delay + LLM_CONNECT_TIMEOUT < deadline
+
+
+def post_with_retries(url: str, headers: dict, payload: dict, stream: bool = False) -> requests.Response:
+    """
+    POST on the pooled session, retrying transient failures until LLM_DEADLINE.
+    Each attempt's timeouts are cut to the time left, so a call never outlives
+    the deadline by more than one socket read (a timed-out read is not retried
+    once the budget is gone). With stream=True only the status line is retried;
+    the body is left to the caller.
+    """
+    session = get_session()
+    deadline = time.monotonic() + LLM_DEADLINE
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        remaining = max(deadline - time.monotonic(), 0.001)
+        timeout = (min(LLM_CONNECT_TIMEOUT, remaining), min(LLM_READ_TIMEOUT, remaining))
+        try:
+            response = session.post(url, headers=headers, json=payload, timeout=timeout, stream=stream)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            metrics.inc("llm_http_errors", labels={"kind": type(e).__name__})
+            delay = _retry_delay(attempt)
+            if not _can_retry(attempt, delay, deadline):
+                raise
+            logger.warning(f"Claude API {type(e).__name__}, retrying in {delay:.2f}s")
+        else:
+            metrics.inc("llm_http_responses", labels={"status": str(response.status_code)})
+            if response.status_code not in RETRY_STATUSES:
+                return response
+            delay = _retry_delay(attempt, response)
+            if not _can_retry(attempt, delay, deadline):
+                return response
+            response.close()
+            logger.warning(f"Claude API {response.status_code}, retrying in {delay:.2f}s")
+
+        metrics.inc("llm_http_retries")
+        time.sleep(delay)
+
+
+def _headers(api_key: str) -> dict:
+    return {
+        "x-api-key": api_key,
+        "anthropic-version": "2023-06-01",
+        "content-type": "application/json",
+    }
+
+
+def cacheable_system(text: str) -> list[dict]:
+    """
+    Wrap a static system prompt as a prompt-cached block.
+    Anthropic only caches prefixes above the model minimum (1024 tokens for Sonnet);
+    shorter blocks are sent normally.
+    """
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
+
+def record_usage(usage: dict):
+    """Log token usage, including prompt-cache reads/writes, and count it."""
+    if not usage:
+        return
+    counts = {
+        "input": usage.get("input_tokens") or 0,
+        "output": usage.get("output_tokens") or 0,
+        "cache_read": usage.get("cache_read_input_tokens") or 0,
+        "cache_creation": usage.get("cache_creation_input_tokens") or 0,
+    }
+    for kind, n in counts.items():
+        if n:
+            metrics.inc("llm_tokens", n, labels={"type": kind})
+    logger.info(
+        f"Claude usage: input={counts['input']} output={counts['output']} "
+        f"cache_read={counts['cache_read']} cache_creation={counts['cache_creation']}"
+    )
+
+
+def _payload(system_prompt: Union[str, list], user_text: str, max_tokens: int, temperature: float) -> dict:
+    return {
+        "model": CLAUDE_MODEL,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "system": system_prompt,
+        "messages": [{"role": "user", "content": user_text}],
+    }
 
 
 def call_claude(
-    system_prompt: str,
+    system_prompt: Union[str, list],
     user_text: str,
     api_key: str,
     max_tokens: int = 500,
@@ -17,7 +189,7 @@ def call_claude(
     Call Claude API using raw REST requests.
 
     Args:
-        system_prompt: System instructions
+        system_prompt: System instructions (string, or content blocks e.g. from cacheable_system)
         user_text: User message
         api_key: Anthropic API key
         max_tokens: Max tokens in response
@@ -27,27 +199,61 @@ def call_claude(
         Response text from Claude
     """
     try:
-        response = requests.post(
-            "https://api.anthropic.com/v1/messages",
-            headers={
-                "x-api-key": api_key,
-                "anthropic-version": "2023-06-01",
-                "content-type": "application/json",
-            },
-            json={
-                "model": "claude-sonnet-4-20250514",
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-                "system": system_prompt,
-                "messages": [{"role": "user", "content": user_text}],
-            },
-            timeout=30
+        response = post_with_retries(
+            ANTHROPIC_API_URL,
+            headers=_headers(api_key),
+            payload=_payload(system_prompt, user_text, max_tokens, temperature),
         )
         response.raise_for_status()
 
         result = response.json()
+        record_usage(result.get("usage"))
         return result["content"][0]["text"]
 
     except requests.exceptions.RequestException as e:
         logger.error(f"Claude API error: {e}")
         raise
+
+
+def stream_claude(
+    system_prompt: Union[str, list],
+    user_text: str,
+    api_key: str,
+    max_tokens: int = 500,
+    temperature: float = 0.1
+) -> Iterator[str]:
+    """
+    Call Claude with the streaming Messages API.
+
+    Yields:
+        Text deltas as they arrive
+    """
+    payload = _payload(system_prompt, user_text, max_tokens, temperature)
+    payload["stream"] = True
+
+    try:
+        response = post_with_retries(ANTHROPIC_API_URL, headers=_headers(api_key), payload=payload, stream=True)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Claude API error: {e}")
+        raise
+
+    response.encoding = "utf-8"
+    usage = {}
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            event = json.loads(line[len("data:"):].strip())
+            event_type = event.get("type")
+            if event_type == "content_block_delta" and event["delta"].get("type") == "text_delta":
+                yield event["delta"]["text"]
+            elif event_type == "message_start":
+                usage.update(event.get("message", {}).get("usage") or {})
+            elif event_type == "message_delta":
+                usage.update(event.get("usage") or {})
+            elif event_type == "error":
+                raise RuntimeError(f"Claude stream error: {event.get('error')}")
+    finally:
+        response.close()
+        record_usage(usage)
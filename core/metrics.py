@@ -0,0 +1,208 @@
+"""
+Process-local metrics: counters and latency histograms.
+Cheap enough to call on every request. Read via snapshot() (served on /stats)
+or render_prometheus() (served on /metrics).
+
+stage() times one step of a request into request_stage_seconds{stage} and,
+between begin_trace() and end_trace(), also keeps it for that request's
+Server-Timing header.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+# Latency bucket upper bounds (seconds)
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+_lock = threading.Lock()
+_counters: dict[tuple, float] = {}
+_histograms: dict[tuple, "Histogram"] = {}
+# Per-request stage timings; gevent patches threading, so this is per greenlet too
+_trace = threading.local()
+
+
+class Histogram:
+    """Fixed-bucket histogram (count, sum, per-bucket counts)."""
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                return
+        self.bucket_counts[-1] += 1
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile (upper bound of the bucket that contains it)."""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        running = 0
+        for i, n in enumerate(self.bucket_counts):
+            running += n
+            if running >= target:
+                return self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+        return self.buckets[-1]
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5) * 1000, 3),
+            "p95_ms": round(self.quantile(0.95) * 1000, 3),
+        }
+
+
+def _key(name: str, labels: Optional[dict]) -> tuple:
+    return (name, tuple(sorted(labels.items())) if labels else ())
+
+
+def _format_key(key: tuple) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def inc(name: str, amount: float = 1.0, labels: Optional[dict] = None):
+    """Increment a counter."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0.0) + amount
+
+
+def get(name: str, labels: Optional[dict] = None) -> float:
+    """Current value of a counter (0 if never incremented)."""
+    with _lock:
+        return _counters.get(_key(name, labels), 0.0)
+
+
+def observe(name: str, seconds: float, labels: Optional[dict] = None):
+    """Record one latency observation (in seconds)."""
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = Histogram()
+        hist.observe(seconds)
+
+
+def get_histogram(name: str, labels: Optional[dict] = None) -> Optional[Histogram]:
+    with _lock:
+        return _histograms.get(_key(name, labels))
+
+
+@contextmanager
+def timer(name: str, labels: Optional[dict] = None):
+    """Time a block and record it in the named histogram."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, labels)
+
+
+def begin_trace():
+    """Start collecting stage timings for the current request."""
+    _trace.stages = []
+
+
+def end_trace() -> list[tuple[str, float]]:
+    """(stage, seconds) recorded since begin_trace(), in order; stops collecting."""
+    stages = getattr(_trace, "stages", None) or []
+    _trace.stages = None
+    return stages
+
+
+def record_stage(name: str, seconds: float):
+    """Record a stage that was timed by the caller."""
+    observe("request_stage_seconds", seconds, {"stage": name})
+    stages = getattr(_trace, "stages", None)
+    if stages is not None:
+        stages.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as one stage of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def ratio(numerator: str, denominator_parts: list[str]) -> float:
+    """numerator / sum(denominator_parts), 0 when nothing was counted."""
+    total = sum(get(n) for n in denominator_parts)
+    return get(numerator) / total if total else 0.0
+
+
+def snapshot() -> dict:
+    """JSON-friendly view of all counters and histograms."""
+    with _lock:
+        return {
+            "counters": {_format_key(k): v for k, v in sorted(_counters.items())},
+            "latency": {_format_key(k): h.to_dict() for k, h in sorted(_histograms.items())},
+        }
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _prometheus_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def render_prometheus() -> str:
+    """All counters and histograms in the Prometheus text exposition format (0.0.4)."""
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(
+            (key, list(h.buckets), list(h.bucket_counts), h.count, h.sum) for key, h in _histograms.items()
+        )
+
+    lines = []
+    typed = set()
+    for (name, labels), value in counters:
+        metric = f"{name}_total"
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{_prometheus_labels(labels)} {value:g}")
+
+    for (name, labels), buckets, bucket_counts, count, total in histograms:
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} histogram")
+        running = 0
+        for bound, n in zip([*buckets, "+Inf"], bucket_counts):
+            running += n
+            le = bound if bound == "+Inf" else f"{bound:g}"
+            lines.append(f"{name}_bucket{_prometheus_labels(labels + (('le', le),))} {running}")
+        lines.append(f"{name}_sum{_prometheus_labels(labels)} {total:.6f}")
+        lines.append(f"{name}_count{_prometheus_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Clear everything (used by tests)."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
@@ -0,0 +1,365 @@
+"""
+Versioned schema migrations for the Postgres tables.
+
+schema_migrations records the versions applied. migrate() takes an advisory
+lock (so workers starting together don't race), runs whatever is newer than
+the recorded version, in order, and commits once. Migrations must be safe to
+run against databases created before this table existed: they check what is
+there before changing it.
+
+Monthly range partitions for sales/expenses are opt-in:
+
+    python -m core.migrations partition-ledgers
+"""
+
+import argparse
+from datetime import date
+from typing import Callable
+import psycopg2.errors
+from loguru import logger
+
+
+# Arbitrary constant for pg_advisory_xact_lock
+_MIGRATION_LOCK_KEY = 0x6B6972616E61
+
+LEDGER_TABLES = ("sales", "expenses")
+
+
+# ══════════════════════════════════════════════════════════════
+# MIGRATIONS
+# ══════════════════════════════════════════════════════════════
+
+def _baseline(cursor, default_store_id: str, timezone: str):
+    """Tables as of the multi-store release (TEXT dates, no migration tracking)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS inventory (
+            store_id TEXT NOT NULL DEFAULT %s,
+            item_name TEXT,
+            quantity DOUBLE PRECISION,
+            unit TEXT,
+            avg_cost DOUBLE PRECISION,
+            updated_at TEXT,
+            PRIMARY KEY (store_id, item_name)
+        )
+    """, (default_store_id,))
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS expenses (
+            id SERIAL PRIMARY KEY,
+            store_id TEXT NOT NULL DEFAULT %s,
+            category TEXT,
+            amount DOUBLE PRECISION,
+            description TEXT,
+            created_at TEXT,
+            day TEXT
+        )
+    """, (default_store_id,))
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sales (
+            id SERIAL PRIMARY KEY,
+            store_id TEXT NOT NULL DEFAULT %s,
+            item_name TEXT,
+            quantity DOUBLE PRECISION,
+            unit TEXT,
+            price DOUBLE PRECISION,
+            total DOUBLE PRECISION,
+            created_at TEXT,
+            day TEXT
+        )
+    """, (default_store_id,))
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_summary (
+            store_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            total_sales DOUBLE PRECISION,
+            total_expenses DOUBLE PRECISION,
+            cogs DOUBLE PRECISION,
+            profit DOUBLE PRECISION,
+            sales_count INTEGER,
+            expense_count INTEGER,
+            closed_at TEXT,
+            PRIMARY KEY (store_id, day)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS journal_checkpoint (
+            journal_id TEXT PRIMARY KEY,
+            seq BIGINT NOT NULL
+        )
+    """)
+
+    # Single-store databases: existing rows belong to the default store
+    for table in ("inventory", "expenses", "sales"):
+        cursor.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS store_id TEXT NOT NULL DEFAULT %s",
+            (default_store_id,)
+        )
+    cursor.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_index i
+                JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+                WHERE i.indrelid = 'inventory'::regclass AND i.indisprimary AND a.attname = 'store_id'
+            ) THEN
+                ALTER TABLE inventory DROP CONSTRAINT IF EXISTS inventory_pkey;
+                ALTER TABLE inventory ADD PRIMARY KEY (store_id, item_name);
+            END IF;
+        END $$
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS expenses_store_day_idx ON expenses (store_id, day)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS sales_store_day_idx ON sales (store_id, day)")
+
+    # Daily rollups (core/rollups.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sales_daily_item (
+            store_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            item_name TEXT NOT NULL,
+            quantity DOUBLE PRECISION NOT NULL DEFAULT 0,
+            revenue DOUBLE PRECISION NOT NULL DEFAULT 0,
+            cogs DOUBLE PRECISION NOT NULL DEFAULT 0,
+            sale_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (store_id, day, item_name)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS expenses_daily_category (
+            store_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            category TEXT NOT NULL,
+            amount DOUBLE PRECISION NOT NULL DEFAULT 0,
+            expense_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (store_id, day, category)
+        )
+    """)
+
+
+# (table, column, target type) for columns that used to be ISO-8601 TEXT
+_TEMPORAL_COLUMNS = [
+    ("inventory", "updated_at", "TIMESTAMPTZ"),
+    ("sales", "created_at", "TIMESTAMPTZ"),
+    ("sales", "day", "DATE"),
+    ("expenses", "created_at", "TIMESTAMPTZ"),
+    ("expenses", "day", "DATE"),
+    ("daily_summary", "day", "DATE"),
+    ("daily_summary", "closed_at", "TIMESTAMPTZ"),
+    ("sales_daily_item", "day", "DATE"),
+    ("expenses_daily_category", "day", "DATE"),
+]
+
+
+def _column_type(cursor, table: str, column: str) -> str:
+    cursor.execute(
+        "SELECT data_type FROM information_schema.columns WHERE table_name = %s AND column_name = %s",
+        (table, column)
+    )
+    row = cursor.fetchone()
+    return row[0] if row else ""
+
+
+def _temporal_columns(cursor, default_store_id: str, timezone: str):
+    """
+    Convert TEXT timestamps/days to TIMESTAMPTZ/DATE in place (ALTER ... USING
+    rewrites each table once) and index the ledgers for per-day and per-item
+    range scans. Stored timestamps were naive shop-local times.
+    """
+    for table, column, target in _TEMPORAL_COLUMNS:
+        if _column_type(cursor, table, column) != "text":
+            continue
+        if target == "DATE":
+            using = f"NULLIF({column}, '')::date"
+        else:
+            using = f"NULLIF({column}, '')::timestamp AT TIME ZONE %(tz)s"
+        cursor.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE {target} USING {using}",
+            {"tz": timezone}
+        )
+        logger.info(f"🛠️ Migrated {table}.{column} to {target}")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS sales_store_item_day_idx ON sales (store_id, item_name, day)")
+
+
+def _sale_unit_cost(cursor, default_store_id: str, timezone: str):
+    """
+    Freeze each sale's cost: COGS is Σ quantity × unit_cost everywhere. Existing
+    sales get the per-unit COGS their daily rollup recorded (so history doesn't
+    change), else the item's current avg cost.
+    """
+    cursor.execute("ALTER TABLE sales ADD COLUMN IF NOT EXISTS unit_cost DOUBLE PRECISION")
+    cursor.execute("""
+        UPDATE sales s SET unit_cost = COALESCE(
+            (SELECT r.cogs / NULLIF(r.quantity, 0) FROM sales_daily_item r
+             WHERE r.store_id = s.store_id AND r.day = s.day AND r.item_name = s.item_name),
+            (SELECT inv.avg_cost FROM inventory inv
+             WHERE inv.store_id = s.store_id AND inv.item_name = s.item_name),
+            0)
+        WHERE s.unit_cost IS NULL
+    """)
+    cursor.execute("ALTER TABLE sales ALTER COLUMN unit_cost SET DEFAULT 0, ALTER COLUMN unit_cost SET NOT NULL")
+
+
+# Append only; never renumber or edit a released migration
+MIGRATIONS: list[tuple[int, str, Callable]] = [
+    (1, "baseline tables", _baseline),
+    (2, "DATE/TIMESTAMPTZ ledger columns + item/day index", _temporal_columns),
+    (3, "per-sale unit_cost for COGS", _sale_unit_cost),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(cursor) -> int:
+    cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return 0
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    return cursor.fetchone()[0]
+
+
+def is_current(conn) -> bool:
+    """True if every migration is recorded (one query, no lock); used to skip migrate() on warm starts."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+        version = cursor.fetchone()[0]
+    except psycopg2.errors.UndefinedTable:
+        conn.rollback()
+        return False
+    conn.rollback()
+    return version >= SCHEMA_VERSION
+
+
+def migrate(conn, default_store_id: str, timezone: str) -> int:
+    """Bring the schema up to SCHEMA_VERSION; returns the number of migrations applied."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (_MIGRATION_LOCK_KEY,))
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMPTZ DEFAULT now()
+        )
+    """)
+    version = current_version(cursor)
+
+    applied = 0
+    for number, description, apply in MIGRATIONS:
+        if number <= version:
+            continue
+        logger.info(f"🛠️ Applying schema migration {number}: {description}")
+        apply(cursor, default_store_id, timezone)
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+            (number, description)
+        )
+        applied += 1
+
+    ensure_partitions(cursor)
+    conn.commit()
+    return applied
+
+
+# ══════════════════════════════════════════════════════════════
+# MONTHLY PARTITIONS (opt-in)
+# ══════════════════════════════════════════════════════════════
+
+# Partitions created ahead of the current month at every startup
+PARTITION_MONTHS_AHEAD = 3
+
+
+def _month_start(day: date, months_after: int = 0) -> date:
+    month = day.month - 1 + months_after
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def is_partitioned(cursor, table: str) -> bool:
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = %s",
+        (table,)
+    )
+    return cursor.fetchone() is not None
+
+
+def _create_month_partition(cursor, table: str, month: date):
+    name = f"{table}_y{month.year}m{month.month:02d}"
+    cursor.execute("SAVEPOINT month_partition")
+    try:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)",
+            (month, _month_start(month, 1))
+        )
+        cursor.execute("RELEASE SAVEPOINT month_partition")
+    except Exception as e:
+        # Rows for that month already sit in the default partition
+        cursor.execute("ROLLBACK TO SAVEPOINT month_partition")
+        logger.warning(f"Could not create partition {name}: {e}")
+
+
+def ensure_partitions(cursor, today: date = None, months_ahead: int = PARTITION_MONTHS_AHEAD):
+    """Create upcoming monthly partitions for ledger tables that are partitioned."""
+    today = today or date.today()
+    for table in LEDGER_TABLES:
+        if is_partitioned(cursor, table):
+            for ahead in range(months_ahead + 1):
+                _create_month_partition(cursor, table, _month_start(today, ahead))
+
+
+def partition_ledgers(conn, months_ahead: int = PARTITION_MONTHS_AHEAD):
+    """
+    Rebuild sales and expenses as tables range-partitioned by month on day.
+    Copies every row, so run it in a maintenance window on large databases.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (_MIGRATION_LOCK_KEY,))
+    for table in LEDGER_TABLES:
+        if is_partitioned(cursor, table):
+            logger.info(f"{table} is already partitioned")
+            continue
+
+        old = f"{table}_unpartitioned"
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {old}")
+        cursor.execute(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey")
+        cursor.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE (day)")
+        cursor.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id, day)")
+        cursor.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+        cursor.execute(f"SELECT MIN(day) FROM {old}")
+        first = cursor.fetchone()[0] or date.today()
+        month, last = _month_start(first), _month_start(date.today(), months_ahead)
+        while month <= last:
+            _create_month_partition(cursor, table, month)
+            month = _month_start(month, 1)
+
+        cursor.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+        cursor.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        cursor.execute(f"DROP TABLE {old}")
+        logger.info(f"🗂️ Partitioned {table} by month")
+
+    # Index names were freed by dropping the old tables
+    cursor.execute("CREATE INDEX IF NOT EXISTS expenses_store_day_idx ON expenses (store_id, day)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS sales_store_day_idx ON sales (store_id, day)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS sales_store_item_day_idx ON sales (store_id, item_name, day)")
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Postgres schema migrations")
+    parser.add_argument("command", choices=["migrate", "status", "partition-ledgers"])
+    parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    args = parser.parse_args()
+
+    from core.db import connection
+    from core.state import ensure_schema
+    ensure_schema()
+    with connection() as conn:
+        if args.command == "partition-ledgers":
+            partition_ledgers(conn, args.months_ahead)
+        cursor = conn.cursor()
+        print({
+            "version": current_version(cursor),
+            "latest": SCHEMA_VERSION,
+            "partitioned": {t: is_partitioned(cursor, t) for t in LEDGER_TABLES},
+        })
+
+
+if __name__ == "__main__":
+    main()
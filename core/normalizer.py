@@ -3,8 +3,14 @@ Item and category normalization with Hindi→English translation.
 Ensures consistent storage keys regardless of how items are spoken.
 """
 
+import os
 import re
-from difflib import SequenceMatcher
+from functools import lru_cache
+from core.fuzzy_index import FuzzyIndex
+
+
+# normalize_item/normalize_category results kept per worker (mappings are static)
+NORMALIZE_CACHE_SIZE = int(os.getenv("NORMALIZE_CACHE_SIZE", "4096"))
 
 
 # ══════════════════════════════════════════════════════════════
@@ -155,10 +161,17 @@ CATEGORY_MAPPINGS = {
 }
 
 
+# Precomputed once: canonical names and the fuzzy index over them
+CANONICAL_ITEMS = frozenset(ITEM_MAPPINGS.values())
+CANONICAL_CATEGORIES = frozenset(CATEGORY_MAPPINGS.values())
+_ITEM_INDEX = FuzzyIndex(CANONICAL_ITEMS)
+
+
 # ══════════════════════════════════════════════════════════════
 # NORMALIZATION FUNCTIONS
 # ══════════════════════════════════════════════════════════════
 
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
 def normalize_item(item_name: str) -> str:
     """
     Normalize item name to canonical English form.
@@ -199,6 +212,7 @@ def normalize_item(item_name: str) -> str:
     return singular
 
 
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
 def normalize_category(category: str) -> str:
     """
     Normalize expense category to standard English form.
@@ -248,7 +262,7 @@ def singularize(word: str) -> str:
 
 def fuzzy_match_item(item: str, threshold: float = 0.8) -> str:
     """
-    Fuzzy match against known items to handle typos.
+    Fuzzy match against known items to handle typos (n-gram indexed, see core/fuzzy_index.py).
 
     Args:
         item: Item name to match
@@ -257,29 +271,40 @@ def fuzzy_match_item(item: str, threshold: float = 0.8) -> str:
     Returns:
         Best matching canonical item, or empty string if no match
     """
-    # Get all canonical item names (values from mapping)
-    canonical_items = set(ITEM_MAPPINGS.values())
+    return _ITEM_INDEX.best_match(item, threshold)
 
-    best_match = None
-    best_score = 0
 
-    for canonical in canonical_items:
-        score = SequenceMatcher(None, item, canonical).ratio()
-        if score > best_score:
-            best_score = score
-            best_match = canonical
-
-    if best_score >= threshold:
-        return best_match
+def lookup_item(word: str) -> str:
+    """
+    Exact (non-fuzzy) item lookup: mapping key, plural of a key,
+    or an already-canonical name.
 
+    Returns:
+        Canonical item name, or empty string if the word is not a known item
+    """
+    normalized = word.lower().strip()
+    if normalized in ITEM_MAPPINGS:
+        return ITEM_MAPPINGS[normalized]
+    singular = singularize(normalized)
+    if singular in ITEM_MAPPINGS:
+        return ITEM_MAPPINGS[singular]
+    if normalized in CANONICAL_ITEMS:
+        return normalized
+    if singular in CANONICAL_ITEMS:
+        return singular
     return ""
 
 
+def lookup_category(word: str) -> str:
+    """Exact category lookup. Returns empty string if unknown (no 'other' default)."""
+    return CATEGORY_MAPPINGS.get(word.lower().strip(), "")
+
+
 def get_all_known_items() -> list[str]:
     """Get list of all known canonical item names."""
-    return sorted(set(ITEM_MAPPINGS.values()))
+    return sorted(CANONICAL_ITEMS)
 
 
 def get_all_known_categories() -> list[str]:
     """Get list of all known canonical categories."""
-    return sorted(set(CATEGORY_MAPPINGS.values()))
+    return sorted(CANONICAL_CATEGORIES)
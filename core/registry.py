@@ -0,0 +1,240 @@
+"""
+Per-store StoreState registry.
+
+One deployment serves many shops. Each request names its shop (store id);
+the registry creates and loads that shop's StoreState on first use and keeps
+at most STORE_REGISTRY_MAX_HOT of them in memory. When a new store would go
+over the limit, the least recently used idle store is saved, closed and
+dropped; it is loaded again from storage (and its snapshot, when
+STATE_SNAPSHOT_DIR is set) the next time it is asked for.
+
+Stores in use by a request (registry.use) are never evicted.
+"""
+
+import os
+import re
+import atexit
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Optional
+from loguru import logger
+from core import metrics
+from core.snapshot import SnapshotScheduler, STATE_SNAPSHOT_DIR
+from core.state import StoreState, DEFAULT_STORE_ID
+
+
+STORE_REGISTRY_MAX_HOT = int(os.getenv("STORE_REGISTRY_MAX_HOT", "256"))
+
+# Store ids end up in SQL parameters, journal and SQLite file names and log lines
+STORE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class InvalidStoreId(ValueError):
+    """Store id missing characters we allow or too long."""
+
+
+def validate_store_id(store_id: Optional[str]) -> str:
+    """Return the store id (default if blank), or raise InvalidStoreId."""
+    if not store_id:
+        return DEFAULT_STORE_ID
+    if not STORE_ID_PATTERN.match(store_id):
+        raise InvalidStoreId(f"Invalid store id: {store_id!r}")
+    return store_id
+
+
+def _load_store(store_id: str) -> StoreState:
+    state = StoreState(store_id=store_id)
+    state.load_from_db()
+    return state
+
+
+class StoreRegistry:
+    """LRU map of store id → loaded StoreState."""
+
+    def __init__(
+        self,
+        loader: Callable[[str], StoreState] = _load_store,
+        max_hot: int = STORE_REGISTRY_MAX_HOT
+    ):
+        """
+        Args:
+            loader: Builds and loads the state for a store id
+            max_hot: Stores kept in memory before idle ones are evicted
+        """
+        self._loader = loader
+        self.max_hot = max_hot
+
+        self._stores: "OrderedDict[str, StoreState]" = OrderedDict()
+        self._pins: dict[str, int] = {}
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.RLock()
+
+    def __contains__(self, store_id: str) -> bool:
+        with self._lock:
+            return store_id in self._stores
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._stores)
+
+    def get(self, store_id: str) -> StoreState:
+        """The store's state, loading it on first use."""
+        while True:
+            with self._lock:
+                state = self._stores.get(store_id)
+                if state is not None:
+                    self._stores.move_to_end(store_id)
+                    metrics.inc("store_registry_hits")
+                    return state
+                load_lock = self._load_locks.setdefault(store_id, threading.Lock())
+
+            # Load outside the registry lock so one slow load doesn't stall other shops
+            with load_lock:
+                with self._lock:
+                    state = self._stores.get(store_id)
+                    if state is not None:
+                        self._stores.move_to_end(store_id)
+                        return state
+                    if self._load_locks.get(store_id) is not load_lock:
+                        # Waited on an eviction's save; whoever loads next uses a fresh lock
+                        continue
+
+                with metrics.timer("store_registry_load_seconds"):
+                    state = self._loader(store_id)
+                metrics.inc("store_registry_loads")
+
+                with self._lock:
+                    self._stores[store_id] = state
+                    self._load_locks.pop(store_id, None)
+            self._evict_idle(keep=store_id)
+            return state
+
+    @contextmanager
+    def use(self, store_id: str):
+        """Borrow a store for a request; it cannot be evicted until the block exits."""
+        with self._lock:
+            self._pins[store_id] = self._pins.get(store_id, 0) + 1
+        try:
+            yield self.get(store_id)
+        finally:
+            with self._lock:
+                self._pins[store_id] -= 1
+                if not self._pins[store_id]:
+                    del self._pins[store_id]
+            self._evict_idle()
+
+    def _evict_idle(self, keep: Optional[str] = None):
+        """Drop least recently used unpinned stores until within max_hot."""
+        while True:
+            with self._lock:
+                if len(self._stores) <= self.max_hot:
+                    return
+                victim = next((sid for sid in self._stores if sid not in self._pins and sid != keep), None)
+                if victim is None:
+                    return
+                detached = self._detach(victim)
+            if not self._close_detached(victim, *detached):
+                return
+
+    def _detach(self, store_id: str) -> Optional[tuple[StoreState, threading.Lock]]:
+        """
+        Pop a store and mark it as loading (registry lock held), so a get() for
+        it waits until the save lands instead of reading storage before it.
+        """
+        state = self._stores.pop(store_id, None)
+        if state is None:
+            return None
+        # Hot stores have no load lock (get() drops it when the load finishes), so this never blocks
+        load_lock = self._load_locks[store_id] = threading.Lock()
+        load_lock.acquire()
+        return state, load_lock
+
+    def _close_detached(self, store_id: str, state: StoreState, load_lock: threading.Lock) -> bool:
+        """Save and close a detached store outside the registry lock; puts it back if the save fails."""
+        try:
+            try:
+                state.save_to_db()
+                state.close()
+            except Exception as e:
+                logger.error(f"Could not flush store {store_id} for eviction, keeping it hot: {e}")
+                with self._lock:
+                    self._stores[store_id] = state
+                    self._stores.move_to_end(store_id, last=False)
+                return False
+            metrics.inc("store_registry_evictions")
+            logger.info(f"Evicted store {store_id} ({len(self)} hot)")
+            return True
+        finally:
+            with self._lock:
+                if self._load_locks.get(store_id) is load_lock:
+                    del self._load_locks[store_id]
+            load_lock.release()
+
+    def evict(self, store_id: str) -> bool:
+        """Save, close and forget a store. Returns False (and keeps it) if the save fails."""
+        with self._lock:
+            detached = self._detach(store_id)
+        if detached is None:
+            return True
+        return self._close_detached(store_id, *detached)
+
+    def close_all(self):
+        """Save and close every hot store (shutdown)."""
+        with self._lock:
+            store_ids = list(self._stores)
+        for store_id in store_ids:
+            self.evict(store_id)
+
+    def hot_stores(self) -> list[StoreState]:
+        with self._lock:
+            return list(self._stores.values())
+
+    def stats(self, top: int = 10) -> dict:
+        with self._lock:
+            stores = list(self._stores.items())
+            pinned = len(self._pins)
+
+        sizes = sorted(
+            ((store_id, state.memory_estimate()) for store_id, state in stores),
+            key=lambda s: s[1], reverse=True
+        )
+        by_id = dict(stores)
+        return {
+            "hot": len(stores),
+            "max_hot": self.max_hot,
+            "in_use": pinned,
+            "loads": metrics.get("store_registry_loads"),
+            "hits": metrics.get("store_registry_hits"),
+            "evictions": metrics.get("store_registry_evictions"),
+            "memory_bytes": sum(size for _, size in sizes),
+            "largest": [
+                {
+                    "store_id": store_id,
+                    "memory_bytes": size,
+                    "items": len(by_id[store_id].inventory),
+                    "sales": len(by_id[store_id].sales),
+                    "expenses": len(by_id[store_id].expenses),
+                    "write_behind": by_id[store_id].write_behind_stats(),
+                }
+                for store_id, size in sizes[:top]
+            ],
+        }
+
+
+_registry: Optional[StoreRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> StoreRegistry:
+    """Process-wide registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = StoreRegistry()
+                if STATE_SNAPSHOT_DIR:
+                    # Periodic snapshots of hot stores, and a final one per store at exit
+                    SnapshotScheduler(_registry.hot_stores).start()
+                    atexit.register(_registry.close_all)
+    return _registry
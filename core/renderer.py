@@ -0,0 +1,238 @@
+"""
+Deterministic response renderer. No LLM.
+Turns simple agent results into the same spoken confirmations the response
+prompt's templates describe (prompts/response_prompt._get_templates).
+Returns None whenever any result needs the LLM's judgement.
+"""
+
+import os
+from typing import Optional
+from core.schemas import InventoryItem
+from core.normalizer import ITEM_MAPPINGS, CATEGORY_MAPPINGS
+from prompts.response_prompt import get_name_display
+
+
+# Set RESPONSE_RENDERER=0 to always let Claude write the reply
+RENDERER_ENABLED = os.getenv("RESPONSE_RENDERER", "1") != "0"
+
+RENDERABLE_ACTIONS = {
+    "stock_added", "sale_recorded", "expense_recorded", "stock_info", "summary", "closing_summary",
+}
+
+# Stock level each action reports; a negative one (sold more than was tracked)
+# needs the LLM to phrase it, not "-3 kg left"
+STOCK_FIELDS = {"sale_recorded": "remaining_stock", "stock_added": "current_stock", "stock_info": "quantity"}
+
+# Low stock mentions are capped so the reply stays short when spoken
+MAX_LOW_STOCK_MENTIONS = 3
+
+UNIT_NAMES_HI = {
+    "kg": "किलो", "gram": "ग्राम", "litre": "लीटर", "packet": "पैकेट", "piece": "पीस",
+    "dozen": "दर्जन", "quintal": "क्विंटल", "bora": "बोरा", "unit": "",
+}
+
+UNIT_NAMES_EN = {"gram": "grams", "unit": ""}
+_EN_PLURAL_UNITS = {"litre", "packet", "piece", "dozen", "quintal", "bora"}
+
+
+def _is_devanagari(word: str) -> bool:
+    return any("ऀ" <= ch <= "ॿ" for ch in word)
+
+
+def _first_devanagari(mappings: dict) -> dict:
+    """canonical → first Devanagari spelling listed for it."""
+    names = {}
+    for spoken, canonical in mappings.items():
+        if _is_devanagari(spoken) and canonical not in names:
+            names[canonical] = spoken
+    return names
+
+
+ITEM_NAMES_HI = _first_devanagari(ITEM_MAPPINGS)
+CATEGORY_NAMES_HI = _first_devanagari(CATEGORY_MAPPINGS)
+
+
+# ══════════════════════════════════════════════════════════════
+# FORMATTING
+# ══════════════════════════════════════════════════════════════
+
+def format_number(value) -> str:
+    """50.0 → "50", 2.5 → "2.5", 33.333 → "33.33"."""
+    value = round(float(value or 0), 2)
+    if value == int(value):
+        return str(int(value))
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def format_money(value) -> str:
+    return f"₹{format_number(value)}"
+
+
+def item_display(item: str, is_english: bool) -> str:
+    if not item:
+        return ""
+    if not is_english and item in ITEM_NAMES_HI:
+        return ITEM_NAMES_HI[item]
+    return item.replace("_", " ")
+
+
+def category_display(category: str, is_english: bool) -> str:
+    if not is_english and category in CATEGORY_NAMES_HI:
+        return CATEGORY_NAMES_HI[category]
+    return category or ("other" if is_english else "अन्य")
+
+
+def quantity_display(quantity, unit: str, item: str, is_english: bool) -> str:
+    """"50 किलो आलू" / "3 packets maggi"."""
+    unit = unit or "unit"
+    if is_english:
+        unit_name = UNIT_NAMES_EN.get(unit, unit)
+        if unit in _EN_PLURAL_UNITS and float(quantity or 0) != 1:
+            unit_name += "s"
+    else:
+        unit_name = UNIT_NAMES_HI.get(unit, unit)
+    parts = [format_number(quantity), unit_name, item_display(item, is_english)]
+    return " ".join(p for p in parts if p)
+
+
+def _unit_only(unit: str, is_english: bool) -> str:
+    unit = unit or "unit"
+    if is_english:
+        return UNIT_NAMES_EN.get(unit, unit)
+    return UNIT_NAMES_HI.get(unit, unit)
+
+
+# ══════════════════════════════════════════════════════════════
+# PER-ACTION TEMPLATES
+# ══════════════════════════════════════════════════════════════
+
+def _render_stock_added(r: dict, name: str, en: bool) -> str:
+    what = quantity_display(r["quantity"], r.get("unit"), r["item"], en)
+    price = r.get("price_per_unit") or 0
+    per_unit = _unit_only(r.get("unit"), en)
+    stock = quantity_display(r.get("current_stock"), r.get("current_unit"), "", en)
+    if en:
+        if price:
+            return f"Got it {name} — {what} at {format_money(price)}" + (f" per {per_unit}" if per_unit else "") + \
+                f". Total {format_money(r.get('total_value'))} worth of stock."
+        return f"Got it {name} — {what} added. Now {stock} in stock."
+    if price:
+        return f"लिख लिया {name} — {what}, {format_money(price)}" + (f" {per_unit}" if per_unit else "") + \
+            f"। कुल {format_money(r.get('total_value'))} का माल।"
+    return f"लिख लिया {name} — {what} आया। अब कुल {stock} है।"
+
+
+def _render_sale(r: dict, name: str, en: bool) -> str:
+    what = quantity_display(r["quantity"], r.get("unit"), r["item"], en)
+    left = quantity_display(r.get("remaining_stock"), r.get("remaining_unit"), "", en)
+    revenue = r.get("revenue") or 0
+    if en:
+        sold = f"Done, sold {what}" + (f" for {format_money(revenue)}" if revenue else "") + "."
+        return f"{sold} {left} left in stock."
+    sold = f"ठीक है, {what} बेचा" + (f" {format_money(revenue)} में" if revenue else "") + "।"
+    return f"{sold} बाकी {left} बचा है।"
+
+
+def _render_expense(r: dict, name: str, en: bool) -> str:
+    category = category_display(r.get("category"), en)
+    if en:
+        return f"Noted {format_money(r['amount'])} expense for {category}."
+    return f"{format_money(r['amount'])} {category} का खर्चा लिखा।"
+
+
+def _render_stock_info(r: dict, name: str, en: bool) -> str:
+    if r.get("note") == "item_not_found":
+        item = item_display(r["item"], en)
+        return f"We don't have any {item} in stock right now." if en else f"अभी {item} का स्टॉक नहीं है।"
+    what = quantity_display(r["quantity"], r.get("unit"), r["item"], en)
+    return f"Right now we have {what} in stock." if en else f"अभी {what} बचा है।"
+
+
+def _render_summary(r: dict, name: str, en: bool) -> str:
+    profit = r.get("profit") or 0
+    if en:
+        result = f"profit {format_money(profit)}" if profit >= 0 else f"loss {format_money(-profit)}"
+        text = f"Today's summary — sales {format_money(r['total_sales'])}, " \
+               f"expenses {format_money(r['total_expenses'])}, {result}."
+    else:
+        result = f"मुनाफा {format_money(profit)}" if profit >= 0 else f"घाटा {format_money(-profit)}"
+        text = f"आज का हिसाब — बिक्री {format_money(r['total_sales'])}, " \
+               f"खर्चा {format_money(r['total_expenses'])}, {result}।"
+
+    if r.get("action") == "closing_summary":
+        value = format_money(r.get("inventory_value"))
+        if en:
+            text += f" Stock worth {value} is still in the shop. See you tomorrow {name}."
+        else:
+            text += f" दुकान में {value} का माल बचा है। कल मिलते हैं {name}।"
+    return text
+
+
+_RENDERERS = {
+    "stock_added": _render_stock_added,
+    "sale_recorded": _render_sale,
+    "expense_recorded": _render_expense,
+    "stock_info": _render_stock_info,
+    "summary": _render_summary,
+    "closing_summary": _render_summary,
+}
+
+
+def _render_low_stock(items: list[InventoryItem], en: bool) -> str:
+    mentions = ", ".join(_low_stock_mention(item, en) for item in items[:MAX_LOW_STOCK_MENTIONS])
+    return f"Heads up, running low on {mentions}." if en else f"ध्यान दें, कम स्टॉक: {mentions}।"
+
+
+def _low_stock_mention(item: InventoryItem, en: bool) -> str:
+    """"आलू 3 किलो" / "potato 3 kg"."""
+    return f"{item_display(item.item_name, en)} {quantity_display(item.quantity, item.unit, '', en)}"
+
+
+def _is_plain(r: dict) -> bool:
+    if r.get("action") not in RENDERABLE_ACTIONS or "error" in r:
+        return False
+    stock = r.get(STOCK_FIELDS.get(r["action"], ""))
+    return not (isinstance(stock, (int, float)) and stock < 0)
+
+
+def can_render(agent_results: list, language: str = "hi-IN") -> bool:
+    """True if every result is a plain (error-free, not oversold) action with a local template."""
+    if not agent_results or not (language.startswith("hi") or language.startswith("en")):
+        return False
+    return all(_is_plain(r) for r in agent_results)
+
+
+def render_response(
+    agent_results: list,
+    low_stock: list[InventoryItem],
+    shopkeeper_name: str = "भैया",
+    shopkeeper_honorific: str = "",
+    language: str = "hi-IN"
+) -> Optional[str]:
+    """
+    Render the spoken reply without the LLM.
+
+    Args:
+        agent_results: Results from the agents for this turn
+        low_stock: Items currently under the low stock threshold
+        shopkeeper_name / shopkeeper_honorific: Persona, as in the response prompt
+        language: Detected language code (only Hindi and English are rendered)
+
+    Returns:
+        Response text, or None if the LLM should write it
+    """
+    if not can_render(agent_results, language):
+        return None
+
+    en = language.startswith("en")
+    name = get_name_display(shopkeeper_name, shopkeeper_honorific, language)
+
+    try:
+        sentences = [_RENDERERS[r["action"]](r, name, en) for r in agent_results]
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    if low_stock:
+        sentences.append(_render_low_stock(low_stock, en))
+
+    return " ".join(sentences)
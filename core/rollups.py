@@ -0,0 +1,243 @@
+"""
+Historical analytics over materialized daily rollups.
+
+Two tables (created by core.migrations) summarize the raw ledgers:
+  sales_daily_item         store × day × item      → quantity, revenue, cogs, sales
+  expenses_daily_category  store × day × category  → amount, expenses
+
+They are updated in the same transaction that inserts the raw rows
+(save_to_db, write-behind flush, atomic statements), so they never drift
+from the ledgers. COGS is Σ quantity × unit_cost, the item's avg cost frozen
+on each sale row when it was sold, everywhere: in memory, here, in
+daily_summary and in the backfill. Range queries read at most days × items rows per store
+instead of scanning every sale. Existing data is rolled up with:
+
+    python -m core.rollups backfill [--store STORE_ID]
+"""
+
+import argparse
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Optional
+from loguru import logger
+from psycopg2.extras import execute_values
+from core.db import connection
+
+
+# ══════════════════════════════════════════════════════════════
+# INCREMENTAL MAINTENANCE
+# ══════════════════════════════════════════════════════════════
+
+_UPSERT_SALES_SQL = """
+    INSERT INTO sales_daily_item AS r (store_id, day, item_name, quantity, revenue, cogs, sale_count)
+    VALUES %s
+    ON CONFLICT (store_id, day, item_name) DO UPDATE SET
+        quantity = r.quantity + EXCLUDED.quantity,
+        revenue = r.revenue + EXCLUDED.revenue,
+        cogs = r.cogs + EXCLUDED.cogs,
+        sale_count = r.sale_count + EXCLUDED.sale_count
+"""
+
+_UPSERT_EXPENSES_SQL = """
+    INSERT INTO expenses_daily_category AS r (store_id, day, category, amount, expense_count)
+    VALUES %s
+    ON CONFLICT (store_id, day, category) DO UPDATE SET
+        amount = r.amount + EXCLUDED.amount,
+        expense_count = r.expense_count + EXCLUDED.expense_count
+"""
+
+
+def aggregate_sales(sale_rows: list) -> list[tuple]:
+    """
+    Sales table rows (store_id, item, quantity, unit, price, total, created_at, day, unit_cost)
+    → one (store_id, day, item, quantity, revenue, cogs, count) row per store × day × item.
+    """
+    totals = defaultdict(lambda: [0.0, 0.0, 0.0, 0])
+    for store_id, item_name, quantity, _unit, _price, total, _created_at, day, unit_cost in sale_rows:
+        bucket = totals[(store_id, day, item_name)]
+        bucket[0] += quantity
+        bucket[1] += total
+        bucket[2] += quantity * unit_cost
+        bucket[3] += 1
+    return [key + tuple(values) for key, values in totals.items()]
+
+
+def aggregate_expenses(expense_rows: list) -> list[tuple]:
+    """
+    Expenses table rows (store_id, category, amount, description, created_at, day)
+    → one (store_id, day, category, amount, count) row per store × day × category.
+    """
+    totals = defaultdict(lambda: [0.0, 0])
+    for store_id, category, amount, _description, _created_at, day in expense_rows:
+        bucket = totals[(store_id, day, category)]
+        bucket[0] += amount
+        bucket[1] += 1
+    return [key + tuple(values) for key, values in totals.items()]
+
+
+def write_rollups(cursor, expense_rows: list, sale_rows: list):
+    """Fold newly inserted ledger rows into the rollups (caller commits)."""
+    if sale_rows:
+        execute_values(cursor, _UPSERT_SALES_SQL, aggregate_sales(sale_rows), page_size=1000)
+    if expense_rows:
+        execute_values(cursor, _UPSERT_EXPENSES_SQL, aggregate_expenses(expense_rows), page_size=1000)
+
+
+# ══════════════════════════════════════════════════════════════
+# BACKFILL
+# ══════════════════════════════════════════════════════════════
+
+def backfill(store_id: Optional[str] = None) -> dict:
+    """
+    Rebuild the rollups from the raw sales and expenses tables (one store, or all).
+    Runs in one transaction, so readers see either the old or the new rollups.
+    """
+    where, params = ("WHERE store_id = %s", (store_id,)) if store_id else ("", ())
+
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"DELETE FROM sales_daily_item {where}", params)
+        cursor.execute(f"DELETE FROM expenses_daily_category {where}", params)
+        cursor.execute(f"""
+            INSERT INTO sales_daily_item (store_id, day, item_name, quantity, revenue, cogs, sale_count)
+            SELECT store_id, day, item_name, SUM(quantity), SUM(total), SUM(quantity * unit_cost), COUNT(*)
+            FROM sales {where}
+            GROUP BY store_id, day, item_name
+        """, params)
+        item_days = cursor.rowcount
+        cursor.execute(f"""
+            INSERT INTO expenses_daily_category (store_id, day, category, amount, expense_count)
+            SELECT store_id, day, category, SUM(amount), COUNT(*)
+            FROM expenses {where}
+            GROUP BY store_id, day, category
+        """, params)
+        category_days = cursor.rowcount
+        conn.commit()
+
+    logger.info(f"📊 Rollups rebuilt for {store_id or 'all stores'}: "
+                f"{item_days} item-days, {category_days} category-days")
+    return {"item_days": item_days, "category_days": category_days}
+
+
+# ══════════════════════════════════════════════════════════════
+# QUERIES
+# ══════════════════════════════════════════════════════════════
+
+PERIODS = ("today", "yesterday", "this_week", "last_week", "this_month", "last_month", "this_year")
+
+
+def period_range(period: str, today: date) -> tuple[date, date]:
+    """Inclusive (start, end) dates for a named period; weeks start on Monday."""
+    if period == "today":
+        return today, today
+    if period == "yesterday":
+        day = today - timedelta(days=1)
+        return day, day
+    if period == "this_week":
+        return today - timedelta(days=today.weekday()), today
+    if period == "last_week":
+        end = today - timedelta(days=today.weekday() + 1)
+        return end - timedelta(days=6), end
+    if period == "this_month":
+        return today.replace(day=1), today
+    if period == "last_month":
+        end = today.replace(day=1) - timedelta(days=1)
+        return end.replace(day=1), end
+    if period == "this_year":
+        return today.replace(month=1, day=1), today
+    raise ValueError(f"Unknown period: {period!r}")
+
+
+def _fetch(sql: str, params: tuple, storage=None) -> list[tuple]:
+    """Run a query on the store's backend (core.storage), or on the Postgres pool if none is given."""
+    if storage is not None:
+        return storage.fetch(sql, params)
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def profit_trend(store_id: str, start: date, end: date, storage=None) -> list[dict]:
+    """Per-day sales, COGS, expenses and profit for days with any activity in [start, end]."""
+    rows = _fetch("""
+        SELECT day, SUM(revenue), SUM(cogs), SUM(expenses) FROM (
+            SELECT day, revenue, cogs, 0 AS expenses FROM sales_daily_item
+            WHERE store_id = %s AND day BETWEEN %s AND %s
+            UNION ALL
+            SELECT day, 0, 0, amount FROM expenses_daily_category
+            WHERE store_id = %s AND day BETWEEN %s AND %s
+        ) t
+        GROUP BY day ORDER BY day
+    """, (store_id, start, end) * 2, storage)
+    return [
+        {
+            "day": str(day),
+            "total_sales": sales,
+            "cost_of_goods_sold": cogs,
+            "total_expenses": expenses,
+            "profit": sales - cogs - expenses,
+        }
+        for day, sales, cogs, expenses in rows
+    ]
+
+
+def top_items(store_id: str, start: date, end: date, n: int = 5, by: str = "revenue", storage=None) -> list[dict]:
+    """Best-selling items in [start, end] by revenue, quantity or profit."""
+    order = {"revenue": "revenue", "quantity": "quantity", "profit": "revenue - cogs"}[by]
+    rows = _fetch(f"""
+        SELECT item_name, SUM(quantity) AS quantity, SUM(revenue) AS revenue, SUM(cogs) AS cogs
+        FROM sales_daily_item
+        WHERE store_id = %s AND day BETWEEN %s AND %s
+        GROUP BY item_name
+        ORDER BY {order} DESC, item_name
+        LIMIT %s
+    """, (store_id, start, end, n), storage)
+    return [
+        {"item": item, "quantity": quantity, "revenue": revenue, "profit": revenue - cogs}
+        for item, quantity, revenue, cogs in rows
+    ]
+
+
+def expenses_by_category(store_id: str, start: date, end: date, storage=None) -> list[dict]:
+    rows = _fetch("""
+        SELECT category, SUM(amount) FROM expenses_daily_category
+        WHERE store_id = %s AND day BETWEEN %s AND %s
+        GROUP BY category ORDER BY SUM(amount) DESC
+    """, (store_id, start, end), storage)
+    return [{"category": category, "amount": amount} for category, amount in rows]
+
+
+def period_summary(store_id: str, start: date, end: date, top_n: int = 5, storage=None) -> dict:
+    """Totals, best sellers and expense breakdown for a date range."""
+    trend = profit_trend(store_id, start, end, storage)
+    total_sales = sum(d["total_sales"] for d in trend)
+    cogs = sum(d["cost_of_goods_sold"] for d in trend)
+    expenses = sum(d["total_expenses"] for d in trend)
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "total_sales": total_sales,
+        "cost_of_goods_sold": cogs,
+        "total_expenses": expenses,
+        "profit": total_sales - cogs - expenses,
+        "active_days": len(trend),
+        "top_items": top_items(store_id, start, end, n=top_n, storage=storage),
+        "expenses_by_category": expenses_by_category(store_id, start, end, storage),
+        "daily": trend,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the daily sales/expense rollups")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--store", help="only this store (default: all stores)")
+    args = parser.parse_args()
+
+    from core.state import ensure_schema
+    ensure_schema()
+    print(backfill(args.store))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,56 @@
 """
 Central router: intent classification + structured data extraction.
-Uses Claude via raw REST API.
+Tries the deterministic fast path, then the router cache, then Claude via raw REST API.
 """
 
+import os
 import json
+import time
 from loguru import logger
+from core import metrics
 from core.schemas import RouterOutput, SingleIntent, IntentType
-from core.llm import call_claude
+from core.llm import call_claude, cacheable_system
+from core.fast_parser import parse_fast
+from core.router_cache import get_router_cache, ROUTER_CACHE_ENABLED
 from prompts.router_prompt import ROUTER_SYSTEM_PROMPT
 
 
+# Static prompt → prompt-cached on Anthropic's side
+ROUTER_SYSTEM_BLOCKS = cacheable_system(ROUTER_SYSTEM_PROMPT)
+
+# Set ROUTER_FAST_PATH=0 to send every utterance to Claude
+FAST_PATH_ENABLED = os.getenv("ROUTER_FAST_PATH", "1") != "0"
+
+
+def _try_fast_path(text: str):
+    """Run the local parser, recording hit/miss and parse latency."""
+    start = time.perf_counter()
+    try:
+        result = parse_fast(text)
+    except Exception as e:
+        logger.warning(f"Fast-path parser error, falling back to LLM: {e}")
+        result = None
+    metrics.observe("router_fast_path_parse_seconds", time.perf_counter() - start)
+
+    if result is None:
+        metrics.inc("router_fast_path_misses")
+    else:
+        metrics.inc("router_fast_path_hits")
+    return result
+
+
+def get_fast_path_stats() -> dict:
+    """Fast-path hit rate and parse latency (for /stats)."""
+    parse = metrics.get_histogram("router_fast_path_parse_seconds")
+    return {
+        "enabled": FAST_PATH_ENABLED,
+        "hits": metrics.get("router_fast_path_hits"),
+        "misses": metrics.get("router_fast_path_misses"),
+        "hit_rate": metrics.ratio("router_fast_path_hits", ["router_fast_path_hits", "router_fast_path_misses"]),
+        "parse_latency": parse.to_dict() if parse else None,
+    }
+
+
 def route_intent(text: str, api_key: str) -> RouterOutput:
     """
     Classify intent and extract structured data from transcribed text.
@@ -26,10 +67,22 @@ def route_intent(text: str, api_key: str) -> RouterOutput:
         logger.warning("Text too short, returning greeting intent")
         return RouterOutput(intents=[SingleIntent(intent=IntentType.GREETING, confidence=0.5)])
 
+    if FAST_PATH_ENABLED:
+        fast_output = _try_fast_path(text)
+        if fast_output is not None:
+            logger.info(f"⚡ Fast path extracted {len(fast_output.intents)} intent(s) from: '{text[:50]}...'")
+            return fast_output
+
+    if ROUTER_CACHE_ENABLED:
+        cached_output = get_router_cache().get(text)
+        if cached_output is not None:
+            logger.info(f"♻️ Router cache hit: {len(cached_output.intents)} intent(s) for '{text[:50]}...'")
+            return cached_output
+
     try:
         # Call Claude for classification + extraction
         response_text = call_claude(
-            system_prompt=ROUTER_SYSTEM_PROMPT,
+            system_prompt=ROUTER_SYSTEM_BLOCKS,
             user_text=text,
             api_key=api_key,
             max_tokens=500,
@@ -51,6 +104,8 @@ def route_intent(text: str, api_key: str) -> RouterOutput:
             router_output = RouterOutput(**parsed)
 
             logger.info(f"✅ Router extracted {len(router_output.intents)} intent(s) from: '{text[:50]}...'")
+            if ROUTER_CACHE_ENABLED:
+                get_router_cache().put(text, router_output)
             return router_output
 
         except (json.JSONDecodeError, ValueError) as e:
@@ -0,0 +1,189 @@
+"""
+Router result cache: canonical transcript → parsed RouterOutput.
+
+Only the *parse* is cached, never its effect. Agents run on every request,
+so a cached "2 kilo aloo becha" is still applied to state each time it is said;
+repeated queries ("aaj ka hisab batao") simply skip the Claude round trip.
+
+Memory tier is a bounded LRU with TTL. Set ROUTER_CACHE_PATH to add an
+on-disk SQLite tier that survives restarts.
+
+Keys carry a parser version (hash of the router prompt, Claude model and
+RouterOutput schema), so changing any of them invalidates cached parses;
+disk rows from other versions are dropped when the table is opened.
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+from loguru import logger
+from core import metrics
+from core.schemas import RouterOutput, IntentType
+from core.fast_parser import tokenize
+from core.llm import CLAUDE_MODEL
+from prompts.router_prompt import ROUTER_SYSTEM_PROMPT
+
+
+ROUTER_CACHE_ENABLED = os.getenv("ROUTER_CACHE", "1") != "0"
+ROUTER_CACHE_SIZE = int(os.getenv("ROUTER_CACHE_SIZE", "1024"))
+ROUTER_CACHE_TTL = float(os.getenv("ROUTER_CACHE_TTL", str(6 * 3600)))
+ROUTER_CACHE_PATH = os.getenv("ROUTER_CACHE_PATH", "")
+
+
+def canonicalize_transcript(text: str) -> str:
+    """
+    Cache key for a transcript: Unicode NFC, case folded, Devanagari digits
+    mapped to Latin, punctuation dropped, whitespace collapsed.
+    "Aaj ka hisab batao?" and "aaj  ka hisab batao" share a key.
+    """
+    return " ".join(tokenize(unicodedata.normalize("NFC", text).casefold()))
+
+
+def parser_version() -> str:
+    """Short hash of everything a cached parse depends on: router prompt, model, output schema."""
+    schema = json.dumps(RouterOutput.model_json_schema(), sort_keys=True)
+    digest = hashlib.sha256("\0".join((ROUTER_SYSTEM_PROMPT, CLAUDE_MODEL, schema)).encode())
+    return digest.hexdigest()[:12]
+
+
+class RouterCache:
+    """Thread-safe LRU + TTL cache of RouterOutput, with optional SQLite tier."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 6 * 3600, path: str = "", version: str = ""):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.version = version or parser_version()
+        self._entries: OrderedDict[str, tuple[float, RouterOutput]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._open_disk(path)
+
+    def _open_disk(self, path: str):
+        try:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS router_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT,
+                    created_at REAL
+                )
+            """)
+            # Parses from another prompt/model/schema would never be hit again
+            dropped = self._db.execute(
+                "DELETE FROM router_cache WHERE substr(key, 1, ?) != ?", (len(self._prefix), self._prefix)
+            ).rowcount
+            self._db.commit()
+            if dropped:
+                logger.info(f"🧹 Router cache dropped {dropped} entries from other parser versions")
+        except sqlite3.Error as e:
+            logger.warning(f"Router cache disk tier disabled ({path}): {e}")
+            self._db = None
+
+    def get(self, text: str) -> Optional[RouterOutput]:
+        """Return a private copy of the cached parse, or None."""
+        key = self._key(text)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, output = entry
+                if now - created_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    metrics.inc("router_cache_hits", labels={"tier": "memory"})
+                    return output.model_copy(deep=True)
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM router_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and now - row[1] <= self.ttl:
+                    output = RouterOutput(**json.loads(row[0]))
+                    self._store(key, row[1], output)
+                    metrics.inc("router_cache_hits", labels={"tier": "disk"})
+                    return output.model_copy(deep=True)
+
+        metrics.inc("router_cache_misses")
+        return None
+
+    def put(self, text: str, output: RouterOutput):
+        """Cache a successful parse. Unknown/failed parses are never cached."""
+        if not output.intents or any(i.intent == IntentType.UNKNOWN for i in output.intents):
+            return
+        key = self._key(text)
+        now = time.time()
+        output = output.model_copy(deep=True)
+
+        with self._lock:
+            self._store(key, now, output)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO router_cache (key, value, created_at) VALUES (?, ?, ?)",
+                        (key, output.model_dump_json(), now)
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Router cache disk write failed: {e}")
+
+    @property
+    def _prefix(self) -> str:
+        return f"{self.version}:"
+
+    def _key(self, text: str) -> str:
+        return self._prefix + canonicalize_transcript(text)
+
+    def _store(self, key: str, created_at: float, output: RouterOutput):
+        self._entries[key] = (created_at, output)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            metrics.inc("router_cache_evictions")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM router_cache")
+                self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        hits = metrics.get("router_cache_hits", {"tier": "memory"}) + metrics.get("router_cache_hits", {"tier": "disk"})
+        misses = metrics.get("router_cache_misses")
+        return {
+            "enabled": ROUTER_CACHE_ENABLED,
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "disk_path": self.path or None,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+
+_cache: Optional[RouterCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_router_cache() -> RouterCache:
+    """Process-wide router cache (created on first use)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = RouterCache(ROUTER_CACHE_SIZE, ROUTER_CACHE_TTL, ROUTER_CACHE_PATH)
+    return _cache
@@ -1,9 +1,10 @@
 """Pydantic models for Dukaan Buddy."""
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime
 from enum import Enum
+from core.ledger import LedgerView
 
 
 class IntentType(str, Enum):
@@ -29,6 +30,7 @@ class SingleIntent(BaseModel):
     total_amount: Optional[float] = None
     category: Optional[str] = None
     description: Optional[str] = None
+    period: Optional[str] = None  # summary/profit range: today, yesterday, this_week, ... (core/rollups.py)
     confidence: float = Field(default=1.0, ge=0.0, le=1.0)
 
 
@@ -70,3 +72,18 @@ class DailySummary(BaseModel):
     low_stock_items: list[str]
     cogs: float = 0.0
     inventory_value: float = 0.0
+
+
+class StoreSnapshot(BaseModel):
+    """Point-in-time copy of a store for lock-free readers."""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    store_id: str
+    version: int
+    inventory: dict[str, InventoryItem]
+    sales: LedgerView        # of SaleRow
+    expenses: LedgerView     # of ExpenseRow
+    total_sales: float
+    total_expenses: float
+    cogs: float
+    inventory_value: float
@@ -0,0 +1,209 @@
+"""
+Versioned binary snapshots of a store's ledgers for today.
+
+A cold start used to rebuild every ledger row of the day from Postgres. With STATE_SNAPSHOT_DIR set, each store writes its columns to
+<dir>/<store_id>.snap periodically and when it is closed. The next start
+memory-maps the file, copies the columns straight into typed arrays, and then
+asks Postgres only for what was written after the snapshot:
+
+  * sales/expenses with id > the snapshot's watermark (plus a count of the
+    rows at or below it, which must match the snapshot's ledger; otherwise
+    another writer was involved and the store falls back to a full load)
+
+Inventory is not snapshotted: it is one row per item, updated in place with
+app-clock timestamps, so it is always read in full.
+
+File layout (native byte order, recorded in the header):
+
+    "KBSS" | format u16 | byte order u8 | meta length u32 | meta (JSON) | payload
+
+meta holds the store id, schema version, business day, watermarks, a CRC-32
+of the payload and (name, typecode, offset, length) for every section.
+Sections are raw array bytes; strings are stored as an offset array plus a
+UTF-8 blob. Any mismatch (format, schema version, store, checksum) makes the
+loader return None and the store loads from Postgres as before.
+"""
+
+import os
+import sys
+import json
+import mmap
+import zlib
+import struct
+import threading
+from array import array
+from datetime import date
+from typing import Optional
+from loguru import logger
+from core import metrics
+from core.ledger import ColumnarLedger
+
+
+STATE_SNAPSHOT_DIR = os.getenv("STATE_SNAPSHOT_DIR", "")
+STATE_SNAPSHOT_INTERVAL = float(os.getenv("STATE_SNAPSHOT_INTERVAL", "300"))
+
+MAGIC = b"KBSS"
+FORMAT_VERSION = 2
+_PREFIX = struct.Struct("<4sHBI")
+_BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+
+
+def snapshot_path_for(store_id: str) -> Optional[str]:
+    """Snapshot file for a store, or None when snapshots are off. Store ids are validated by the registry."""
+    if not STATE_SNAPSHOT_DIR:
+        return None
+    return os.path.join(STATE_SNAPSHOT_DIR, f"{store_id}.snap")
+
+
+class Snapshot:
+    """Decoded snapshot: meta fields plus the columns, ready to be adopted by a StoreState."""
+
+    def __init__(self, meta: dict, sections: dict[str, array], strings: dict[str, list[str]]):
+        self.meta = meta
+        self.sections = sections
+        self.strings = strings
+
+    @property
+    def day(self) -> date:
+        return date.fromisoformat(self.meta["day"])
+
+    def ledger(self, name: str, ledger_type: type) -> ColumnarLedger:
+        """Rebuild a ledger from its columns (one bulk copy per column)."""
+        ledger = ledger_type()
+        for value in self.strings[f"{name}.strings"]:
+            ledger.strings.id(value)
+        for field in ledger.schema:
+            ledger.columns[field].extend(self.sections[f"{name}.{field}"])
+        return ledger
+
+
+# ══════════════════════════════════════════════════════════════
+# WRITING
+# ══════════════════════════════════════════════════════════════
+
+def _string_sections(name: str, values: list[str]) -> list[tuple[str, array]]:
+    blob = bytearray()
+    offsets = array("Q", [0])
+    for value in values:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return [(f"{name}.offsets", offsets), (f"{name}.blob", array("B", bytes(blob)))]
+
+
+def encode(meta: dict, ledgers: dict[str, ColumnarLedger]) -> bytes:
+    """Serialize a snapshot. ledgers maps a section prefix ("sales") to its ledger."""
+    sections: list[tuple[str, array]] = []
+    for name, ledger in ledgers.items():
+        sections += _string_sections(f"{name}.strings", ledger.strings.values)
+        sections += [(f"{name}.{field}", column) for field, column in ledger.columns.items()]
+
+    payload = bytearray()
+    layout = []
+    for name, column in sections:
+        # Keep every section 8-byte aligned within the payload
+        payload += b"\0" * (-len(payload) % 8)
+        data = column.tobytes()
+        layout.append([name, column.typecode, len(payload), len(data)])
+        payload += data
+
+    meta = {**meta, "sections": layout, "crc32": zlib.crc32(payload)}
+    meta_bytes = json.dumps(meta).encode("utf-8")
+    return _PREFIX.pack(MAGIC, FORMAT_VERSION, _BYTE_ORDER, len(meta_bytes)) + meta_bytes + bytes(payload)
+
+
+def write(path: str, data: bytes):
+    """Atomically replace the snapshot file (write to .tmp, fsync, rename)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    metrics.inc("snapshot_writes")
+
+
+# ══════════════════════════════════════════════════════════════
+# LOADING
+# ══════════════════════════════════════════════════════════════
+
+def _decode_strings(sections: dict[str, array], name: str) -> list[str]:
+    offsets = sections.pop(f"{name}.offsets")
+    blob = sections.pop(f"{name}.blob").tobytes()
+    return [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+def read(path: str, schema_version: int) -> Optional[Snapshot]:
+    """Map and decode a snapshot; None if missing, unreadable or from another format/schema version."""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                return _decode(view, schema_version, path)
+            finally:
+                view.release()
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, struct.error) as e:
+        logger.warning(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+
+
+def _decode(view: memoryview, schema_version: int, path: str) -> Optional[Snapshot]:
+    magic, fmt, byte_order, meta_len = _PREFIX.unpack_from(view)
+    if magic != MAGIC or fmt != FORMAT_VERSION or byte_order != _BYTE_ORDER:
+        logger.info(f"Snapshot {path} is from another format ({magic!r} v{fmt}), ignoring it")
+        return None
+    start = _PREFIX.size + meta_len
+    meta = json.loads(bytes(view[_PREFIX.size:start]))
+    if meta["schema_version"] != schema_version:
+        logger.info(f"Snapshot {path} predates schema version {schema_version}, ignoring it")
+        return None
+
+    sections = {}
+    with view[start:] as payload:
+        if zlib.crc32(payload) != meta["crc32"]:
+            raise ValueError("checksum mismatch")
+        for name, typecode, offset, length in meta.pop("sections"):
+            column = array(typecode)
+            column.frombytes(payload[offset:offset + length])
+            sections[name] = column
+
+    string_names = [name[:-len(".offsets")] for name in list(sections) if name.endswith(".offsets")]
+    strings = {name: _decode_strings(sections, name) for name in string_names}
+    return Snapshot(meta, sections, strings)
+
+
+# ══════════════════════════════════════════════════════════════
+# PERIODIC WRITER
+# ══════════════════════════════════════════════════════════════
+
+class SnapshotScheduler:
+    """Background thread that asks every hot store to snapshot itself every interval seconds."""
+
+    def __init__(self, stores, interval: float = STATE_SNAPSHOT_INTERVAL):
+        """
+        Args:
+            stores: Callable returning the StoreStates to snapshot
+        """
+        self.stores = stores
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="state-snapshot", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            for state in self.stores():
+                try:
+                    state.write_snapshot()
+                except Exception as e:
+                    metrics.inc("snapshot_errors")
+                    logger.error(f"Snapshot of store {state.store_id} failed: {e}")
+
+    def stop(self):
+        self._stop.set()
@@ -1,14 +1,89 @@
 """
-In-memory store state backed by PostgreSQL (sync version).
+In-memory store state backed by a storage backend (sync version).
+One StoreState per shop; rows are keyed by store_id (see core/registry.py) and
+persisted through core/storage.py (Postgres, or one SQLite file per store).
+
+Each store has a single writer at a time: mutations and save_to_db hold the
+store's lock, and a request holds it across its whole agent turn plus save.
+Readers that don't need the lock use snapshot(), a copy built under it.
+
+Only the current business day's ledger is kept in memory. At midnight in the
+shop's timezone the closed day's totals go to the daily_summary table and its
+sales and expenses are dropped from memory (they stay in storage).
 """
 
 import os
-import psycopg2
-from datetime import datetime, date
+import functools
+import operator
+import sys
+import threading
+from time import perf_counter
+from datetime import datetime, date, time, timedelta, tzinfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from loguru import logger
-from typing import Optional, Union
-from core.schemas import InventoryItem, ExpenseRecord, SaleRecord, DailySummary
+from typing import Callable, Optional, Union
+from core.schemas import InventoryItem, DailySummary, StoreSnapshot
+from core.ledger import SalesLedger, ExpenseLedger, SaleRow, ExpenseRow
 from core.normalizer import normalize_item, normalize_category
+from core import metrics, snapshot
+from core.snapshot import Snapshot
+from core.storage import StorageBackend, open_backend, ensure_postgres_schema
+from core.journal import (
+    Journal, WriteBehindFlusher, WRITE_BEHIND, JOURNAL_PATH, journal_path_for,
+    WRITE_BEHIND_FLUSH_INTERVAL, WRITE_BEHIND_BATCH_SIZE
+)
+
+
+# Store used when a request names none (and for rows written before stores existed)
+DEFAULT_STORE_ID = os.getenv("DEFAULT_STORE_ID", "default")
+
+# ATOMIC_INVENTORY=1: storage owns stock levels. Every stock change and sale is
+# one atomic statement whose RETURNING row refreshes the local copy, so several
+# workers can sell the same item without overwriting each other's quantities.
+ATOMIC_INVENTORY = os.getenv("ATOMIC_INVENTORY", "0") == "1"
+
+# The business day (and its midnight rollover) follows the shop's clock, not the server's
+SHOP_TIMEZONE = os.getenv("SHOP_TIMEZONE", "Asia/Kolkata")
+# Seconds before retrying a rollover whose save failed
+ROLLOVER_RETRY_SECONDS = float(os.getenv("ROLLOVER_RETRY_SECONDS", "60"))
+
+def ensure_schema():
+    """Bring the Postgres schema up to date (once per process); SQLite stores do this per file."""
+    ensure_postgres_schema(DEFAULT_STORE_ID, SHOP_TIMEZONE)
+
+
+def _load_timezone(name: str) -> Optional[tzinfo]:
+    """The shop's timezone, or None (server local time) if the name is unknown."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"Unknown SHOP_TIMEZONE {name!r}, using the server's local time")
+        return None
+
+
+def _serialized(method):
+    """Run a StoreState method under the store's lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _sizeof_record(record) -> int:
+    """Shallow-deep size of a pydantic record: the object, its __dict__ and field values."""
+    fields = record.__dict__
+    return sys.getsizeof(record) + sys.getsizeof(fields) + sum(sys.getsizeof(v) for v in fields.values())
+
+
+def _estimate_records(records: list, sample: int) -> int:
+    """Bytes for a list of records, extrapolated from an evenly spaced sample."""
+    if not records:
+        return sys.getsizeof(records)
+    step = max(1, len(records) // sample)
+    picked = records[::step][:sample]
+    per_record = sum(_sizeof_record(r) for r in picked) / len(picked)
+    return sys.getsizeof(records) + int(per_record * len(records))
 
 
 class StoreState:
@@ -19,64 +94,90 @@ class StoreState:
 
     def __init__(
         self,
+        store_id: str = DEFAULT_STORE_ID,
         shopkeeper_name: str = "भैया",
         shopkeeper_honorific: str = "",
-        low_stock_threshold: float = 5.0
+        low_stock_threshold: float = 5.0,
+        write_behind: Optional[bool] = None,
+        journal_path: Optional[str] = None,
+        atomic: Optional[bool] = None,
+        timezone: Optional[str] = None,
+        snapshot_path: Optional[str] = None,
+        storage: Optional[StorageBackend] = None
     ):
+        """
+        Args:
+            store_id: Shop whose rows this state reads and writes
+            write_behind: Journal saves locally and flush to Postgres in the
+                background (defaults to WRITE_BEHIND). False saves synchronously.
+            journal_path: Journal file used in write-behind mode
+                (JOURNAL_PATH for the default store, one file per store otherwise)
+            atomic: Apply stock changes and sales as atomic Postgres statements
+                (defaults to ATOMIC_INVENTORY). Exclusive with write_behind.
+            timezone: IANA name of the shop's timezone (defaults to SHOP_TIMEZONE)
+            snapshot_path: Binary snapshot used for warm starts (defaults to one
+                file per store in STATE_SNAPSHOT_DIR; none if that is unset)
+            storage: Where the store's rows are persisted (defaults to the
+                STORAGE_BACKEND backend for this store, see core/storage.py)
+        """
+        self.store_id = store_id
         self.shopkeeper_name = shopkeeper_name
         self.shopkeeper_honorific = shopkeeper_honorific
         self.low_stock_threshold = low_stock_threshold
 
+        # One writer per store; reentrant so a request can hold it around agent calls
+        self.lock = threading.RLock()
+
+        # Business day covered by the in-memory ledger; rolls over at the shop's midnight
+        self.tz = _load_timezone(timezone or SHOP_TIMEZONE)
+        self._set_day(self._now().date())
+
         self.inventory: dict[str, InventoryItem] = {}
-        self.expenses: list[ExpenseRecord] = []
-        self.sales: list[SaleRecord] = []
+        # Columnar, append-only (core/ledger.py); only today's rows are kept
+        self.expenses = ExpenseLedger()
+        self.sales = SalesLedger()
 
         self._saved_sales_count = 0
         self._saved_expenses_count = 0
+        # Inventory rows changed since the last save_to_db
+        self._dirty_items: set[str] = set()
+
+        # Running daily aggregates, kept in step by every mutation (see recompute_aggregates)
+        self._sales_total = 0.0
+        self._expense_total = 0.0
+        self._cogs = 0.0                       # Σ quantity × unit cost frozen at each sale
+        self._inventory_value = 0.0            # Σ quantity × avg cost over positive stock
+
+        # Bumped on every mutation; derived views are memoized against it
+        self.version = 0
+        self._views: dict[tuple, tuple[int, object]] = {}
+
+        self.atomic = ATOMIC_INVENTORY if atomic is None else atomic
+        write_behind = WRITE_BEHIND if write_behind is None else write_behind
+        if self.atomic and write_behind:
+            raise ValueError("Atomic inventory and write-behind persistence cannot be combined")
+
+        self._journal: Optional[Journal] = None
+        self._flusher: Optional[WriteBehindFlusher] = None
+        if write_behind:
+            if journal_path is None:
+                journal_path = JOURNAL_PATH if store_id == DEFAULT_STORE_ID else journal_path_for(store_id)
+            self._journal = Journal(journal_path)
+            self._flusher = WriteBehindFlusher(
+                self._journal,
+                self._write_journal_batch,
+                interval=WRITE_BEHIND_FLUSH_INTERVAL,
+                batch_size=WRITE_BEHIND_BATCH_SIZE,
+            )
 
-        self._init_tables()
+        self.storage = storage or open_backend(store_id, DEFAULT_STORE_ID, SHOP_TIMEZONE)
+        self._snapshot_path = snapshot_path or snapshot.snapshot_path_for(store_id)
+        self._snapshot_version: Optional[int] = None
 
-    def _get_conn(self):
-        return psycopg2.connect(os.getenv("DATABASE_URL"))
+        self._init_tables()
 
     def _init_tables(self):
-        conn = self._get_conn()
-        try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS inventory (
-                    item_name TEXT PRIMARY KEY,
-                    quantity DOUBLE PRECISION,
-                    unit TEXT,
-                    avg_cost DOUBLE PRECISION,
-                    updated_at TEXT
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS expenses (
-                    id SERIAL PRIMARY KEY,
-                    category TEXT,
-                    amount DOUBLE PRECISION,
-                    description TEXT,
-                    created_at TEXT,
-                    day TEXT
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS sales (
-                    id SERIAL PRIMARY KEY,
-                    item_name TEXT,
-                    quantity DOUBLE PRECISION,
-                    unit TEXT,
-                    price DOUBLE PRECISION,
-                    total DOUBLE PRECISION,
-                    created_at TEXT,
-                    day TEXT
-                )
-            """)
-            conn.commit()
-        finally:
-            conn.close()
+        self.storage.ensure_schema()
 
     def _normalize_item_name(self, item_name: str) -> str:
         """
@@ -85,10 +186,167 @@ class StoreState:
         """
         return normalize_item(item_name)
 
+    @staticmethod
+    def _item_value(item: InventoryItem) -> float:
+        return item.quantity * item.avg_cost_per_unit if item.quantity > 0 else 0.0
+
+    def recompute_aggregates(self) -> dict:
+        """Daily aggregates computed from scratch (consistency check for the running totals)."""
+        sales = self.sales.view()
+        return {
+            "sales_total": sales.sum("total"),
+            "expense_total": self.expenses.sum("amount"),
+            "cogs": sum(map(operator.mul, sales.column("quantity"), sales.column("unit_cost"))),
+            "inventory_value": sum(self._item_value(item) for item in self.inventory.values()),
+        }
+
+    def _reset_aggregates(self):
+        """Rebuild the running totals after bulk loads or resets."""
+        totals = self.recompute_aggregates()
+        self._sales_total = totals["sales_total"]
+        self._expense_total = totals["expense_total"]
+        self._cogs = totals["cogs"]
+        self._inventory_value = totals["inventory_value"]
+
+    def _bump_version(self):
+        self.version += 1
+
+    def _memoized(self, key: tuple, build: Callable):
+        """
+        Return the view cached for key if nothing changed since it was built.
+        Views are built under the lock, so a cache hit never sees a half-applied mutation.
+        """
+        cached = self._views.get(key)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        with self.lock:
+            cached = self._views.get(key)
+            if cached is not None and cached[0] == self.version:
+                return cached[1]
+            value = build()
+            self._views[key] = (self.version, value)
+            return value
+
+    def _now(self) -> datetime:
+        """Shop-local wall-clock time (naive, like the timestamps already stored)."""
+        return datetime.now(self.tz).replace(tzinfo=None)
+
+    def _stamp(self, timestamp: datetime) -> str:
+        """Shop-local naive timestamp → ISO-8601 with offset, for TIMESTAMPTZ columns and the journal."""
+        if self.tz is None:
+            return timestamp.astimezone().isoformat()
+        return timestamp.replace(tzinfo=self.tz).isoformat()
+
+    def _local(self, value) -> datetime:
+        """TIMESTAMPTZ (or a legacy ISO string) from Postgres → naive shop-local time."""
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        if value.tzinfo is None:
+            return value
+        return value.astimezone(self.tz).replace(tzinfo=None)
+
     def _get_today_str(self) -> str:
-        """Get today's date as YYYY-MM-DD string."""
-        return date.today().isoformat()
+        """Get the business day of the in-memory ledger as YYYY-MM-DD string."""
+        return self.day.isoformat()
+
+    def _set_day(self, day: date):
+        self.day = day
+        self._day_ends_at = datetime.combine(day + timedelta(days=1), time.min)
+
+    def roll_over_if_due(self) -> bool:
+        """Close the business day if the shop's midnight has passed. Cheap when it hasn't."""
+        if self._now() < self._day_ends_at:
+            return False
+        with self.lock:
+            if self._now() < self._day_ends_at:
+                return False
+            return self._roll_over()
+
+    def _roll_over(self) -> bool:
+        """
+        Persist the closed day(s), write their daily_summary rows and drop their
+        records from memory. If Postgres is unavailable the records are kept and
+        the rollover is retried later; rows are stamped with their own day either way.
+        """
+        new_day = self._now().date()
+        closed_days = {self.day}
+        closed_days.update(day for day in self.sales.days() if day < new_day)
+        closed_days.update(day for day in self.expenses.days() if day < new_day)
+
+        try:
+            self.save_to_db()
+            self.flush()
+            self._write_daily_summaries(sorted(closed_days))
+        except Exception as e:
+            logger.error(f"Day rollover for store {self.store_id} failed, keeping {self.day} in memory: {e}")
+            self._day_ends_at = self._now() + timedelta(seconds=ROLLOVER_RETRY_SECONDS)
+            return False
+
+        # Records from after midnight (possible when an earlier attempt failed) stay
+        evicted = len(self.sales) + len(self.expenses)
+        midnight = datetime.combine(new_day, time.min)
+        self.sales = self.sales.since(midnight)
+        self.expenses = self.expenses.since(midnight)
+        evicted -= len(self.sales) + len(self.expenses)
+        self._saved_sales_count = len(self.sales)
+        self._saved_expenses_count = len(self.expenses)
+
+        closed = self.day
+        self._set_day(new_day)
+        self._reset_aggregates()
+        self._views.clear()
+        self._bump_version()
+        metrics.inc("day_rollovers")
+        logger.info(f"🌙 Closed {closed} for store {self.store_id}: {evicted} records moved out of memory")
+        return True
+
+    def _write_daily_summaries(self, days: list[date]):
+        self.storage.write_daily_summaries(days, self._stamp(self._now()))
+
+    def _apply_item(self, item_name: str, quantity: float, unit: str, avg_cost: float,
+                    updated_at: datetime) -> InventoryItem:
+        """
+        Overwrite the local copy of an item (atomic mode), keeping aggregates and
+        version in step. An unchanged row leaves the version (and memoized views) alone.
+        """
+        item = self.inventory.get(item_name)
+        if item is not None and (item.quantity, item.unit, item.avg_cost_per_unit, item.last_updated) == \
+                (quantity, unit, avg_cost, updated_at):
+            return item
+        if item is None:
+            item = InventoryItem(
+                item_name=item_name,
+                quantity=quantity,
+                unit=unit,
+                avg_cost_per_unit=avg_cost,
+                last_updated=updated_at
+            )
+            self.inventory[item_name] = item
+            value_before = 0.0
+        else:
+            value_before = self._item_value(item)
+            item.quantity = quantity
+            item.unit = unit
+            item.avg_cost_per_unit = avg_cost
+            item.last_updated = updated_at
+        self._inventory_value += self._item_value(item) - value_before
+        self._bump_version()
+        return item
+
+    def _execute(self, op: str, params: dict):
+        """Run one atomic storage operation in its own transaction; returns the item row, if any."""
+        params = {"store_id": self.store_id, "now": self._stamp(self._now()), **params}
+        return self.storage.execute(op, params)
 
+    def _execute_item(self, op: str, params: dict) -> Optional[InventoryItem]:
+        """Run an inventory operation and refresh the local item from the row it returns."""
+        row = self._execute(op, params)
+        if row is None:
+            return None
+        quantity, unit, avg_cost, updated_at = row
+        return self._apply_item(params["item"], quantity, unit, avg_cost, self._local(updated_at))
+
+    @_serialized
     def add_stock(
         self,
         item_name: str,
@@ -101,10 +359,19 @@ class StoreState:
         If item exists: add quantity, recalculate weighted avg cost.
         If new: create entry.
         """
+        self.roll_over_if_due()
         item_name = self._normalize_item_name(item_name)
 
+        if self.atomic:
+            item = self._execute_item("add_stock", {
+                "item": item_name, "quantity": quantity, "unit": unit, "cost": cost_per_unit,
+            })
+            logger.info(f"Added stock (atomic): {item_name} → {item.quantity} {item.unit}")
+            return item
+
         if item_name in self.inventory:
             existing = self.inventory[item_name]
+            value_before = self._item_value(existing)
             total_existing_value = existing.quantity * existing.avg_cost_per_unit
             total_new_value = quantity * cost_per_unit
             new_total_qty = existing.quantity + quantity
@@ -117,7 +384,10 @@ class StoreState:
             existing.quantity = new_total_qty
             existing.avg_cost_per_unit = new_avg_cost
             existing.unit = unit
-            existing.last_updated = datetime.now()
+            existing.last_updated = self._now()
+            self._dirty_items.add(item_name)
+            self._inventory_value += self._item_value(existing) - value_before
+            self._bump_version()
 
             logger.info(f"Updated stock: {item_name} → {new_total_qty} {unit}")
             return existing
@@ -127,13 +397,17 @@ class StoreState:
                 quantity=quantity,
                 unit=unit,
                 avg_cost_per_unit=cost_per_unit,
-                last_updated=datetime.now()
+                last_updated=self._now()
             )
             self.inventory[item_name] = new_item
+            self._dirty_items.add(item_name)
+            self._inventory_value += self._item_value(new_item)
+            self._bump_version()
 
             logger.info(f"Added new stock: {item_name} → {quantity} {unit}")
             return new_item
 
+    @_serialized
     def update_stock(
         self,
         item_name: str,
@@ -145,35 +419,59 @@ class StoreState:
         Replace (not add to) an existing item's quantity and/or cost.
         Used for corrections.
         """
+        self.roll_over_if_due()
         item_name = self._normalize_item_name(item_name)
 
+        if self.atomic:
+            item = self._execute_item("update_stock", {
+                "item": item_name, "quantity": quantity, "unit": unit, "cost": cost_per_unit,
+            })
+            if item is None:
+                logger.warning(f"Correction for unknown item: {item_name}")
+            return item
+
         if item_name not in self.inventory:
             logger.warning(f"Correction for unknown item: {item_name}")
             return None
 
         item = self.inventory[item_name]
+        value_before = self._item_value(item)
         if quantity is not None:
             item.quantity = quantity
         if unit is not None:
             item.unit = unit
         if cost_per_unit is not None:
             item.avg_cost_per_unit = cost_per_unit
-        item.last_updated = datetime.now()
+        item.last_updated = self._now()
+        self._dirty_items.add(item_name)
+        self._inventory_value += self._item_value(item) - value_before
+        self._bump_version()
 
         logger.info(f"Corrected stock: {item_name} → qty={item.quantity}, cost={item.avg_cost_per_unit}")
         return item
 
+    @_serialized
     def remove_stock(self, item_name: str, quantity: float) -> Optional[InventoryItem]:
         """
         Remove stock from inventory.
         Allow negative (means sold more than tracked).
         """
+        self.roll_over_if_due()
         item_name = self._normalize_item_name(item_name)
 
+        if self.atomic:
+            item = self._execute_item("remove_stock", {"item": item_name, "delta": -quantity})
+            logger.info(f"Removed stock (atomic): {item_name} → {quantity} (remaining: {item.quantity})")
+            return item
+
         if item_name in self.inventory:
             item = self.inventory[item_name]
+            value_before = self._item_value(item)
             item.quantity -= quantity
-            item.last_updated = datetime.now()
+            item.last_updated = self._now()
+            self._dirty_items.add(item_name)
+            self._inventory_value += self._item_value(item) - value_before
+            self._bump_version()
 
             logger.info(f"Removed stock: {item_name} → {quantity} (remaining: {item.quantity})")
             return item
@@ -184,31 +482,40 @@ class StoreState:
                 quantity=-quantity,
                 unit="unit",
                 avg_cost_per_unit=0.0,
-                last_updated=datetime.now()
+                last_updated=self._now()
             )
             self.inventory[item_name] = new_item
+            self._dirty_items.add(item_name)
+            self._bump_version()
             return new_item
 
+    @_serialized
     def record_expense(
         self,
         category: str,
         amount: float,
         description: str = ""
-    ) -> ExpenseRecord:
+    ) -> ExpenseRow:
         """Record an expense."""
+        self.roll_over_if_due()
         normalized_category = normalize_category(category)
 
-        record = ExpenseRecord(
-            category=normalized_category,
-            amount=amount,
-            description=description,
-            timestamp=datetime.now()
-        )
-        self.expenses.append(record)
+        timestamp = self._now()
+        if self.atomic:
+            self._execute("record_expense", {
+                "category": normalized_category, "amount": amount, "description": description,
+                "now": self._stamp(timestamp), "day": timestamp.date().isoformat(),
+            })
+        record = self.expenses.append(normalized_category, amount, description, timestamp)
+        self._expense_total += amount
+        if self.atomic:
+            self._saved_expenses_count = len(self.expenses)
+        self._bump_version()
 
         logger.info(f"Recorded expense: {normalized_category} → ₹{amount}")
         return record
 
+    @_serialized
     def record_sale(
         self,
         item_name: str,
@@ -216,25 +523,44 @@ class StoreState:
         unit: str,
         price_per_unit: float,
         total: float = None
-    ) -> SaleRecord:
+    ) -> SaleRow:
         """
         Record a sale.
         Also removes stock from inventory.
         """
+        self.roll_over_if_due()
         if total is None:
             total = quantity * price_per_unit
 
-        record = SaleRecord(
-            item_name=self._normalize_item_name(item_name),
-            quantity=quantity,
-            unit=unit,
-            price_per_unit=price_per_unit,
-            total=total,
-            timestamp=datetime.now()
+        normalized_item = self._normalize_item_name(item_name)
+        timestamp = self._now()
+
+        if self.atomic:
+            # Stock decrement and sale row commit together in one statement
+            item = self._execute_item("record_sale", {
+                "item": normalized_item, "delta": -quantity, "quantity": quantity,
+                "sale_unit": unit, "price": price_per_unit, "total": total,
+                "now": self._stamp(timestamp), "day": timestamp.date().isoformat(),
+            })
+            record = self.sales.append(
+                normalized_item, quantity, unit, price_per_unit, total, timestamp, item.avg_cost_per_unit
+            )
+            self._saved_sales_count = len(self.sales)
+            self._sales_total += total
+            self._cogs += quantity * record.unit_cost
+            self._bump_version()
+            logger.info(f"Recorded sale (atomic): {item_name} → {quantity} {unit} @ ₹{price_per_unit} = ₹{total}")
+            return record
+
+        # COGS is frozen at the avg cost the item sells at; later restocks don't re-value it.
+        # A sale of an unknown item creates it at zero cost, adding nothing to COGS
+        item = self.remove_stock(item_name, quantity)
+        record = self.sales.append(
+            normalized_item, quantity, unit, price_per_unit, total, timestamp, item.avg_cost_per_unit
         )
-        self.sales.append(record)
-
-        self.remove_stock(item_name, quantity)
+        self._sales_total += total
+        self._cogs += quantity * record.unit_cost
+        self._bump_version()
 
         logger.info(f"Recorded sale: {item_name} → {quantity} {unit} @ ₹{price_per_unit} = ₹{total}")
         return record
@@ -247,27 +573,28 @@ class StoreState:
         """
         if item_name:
             item_name = self._normalize_item_name(item_name)
+            if self.atomic:
+                # Another worker may have sold or restocked it since
+                with self.lock:
+                    return self._execute_item("select_item", {"item": item_name})
             return self.inventory.get(item_name)
         else:
             return self.inventory.copy()
 
     def get_daily_sales_total(self) -> float:
         """Get total sales revenue for today."""
-        return sum(sale.total for sale in self.sales)
+        self.roll_over_if_due()
+        return self._sales_total
 
     def get_daily_expense_total(self) -> float:
         """Get total expenses for today."""
-        return sum(expense.amount for expense in self.expenses)
+        self.roll_over_if_due()
+        return self._expense_total
 
     def get_daily_cogs(self) -> float:
-        """Get cost of goods sold today (only items actually sold)."""
-        cogs = 0.0
-        for sale in self.sales:
-            item_name = self._normalize_item_name(sale.item_name)
-            if item_name in self.inventory:
-                avg_cost = self.inventory[item_name].avg_cost_per_unit
-                cogs += sale.quantity * avg_cost
-        return cogs
+        """Get cost of goods sold today (only items actually sold), at each item's avg cost when sold."""
+        self.roll_over_if_due()
+        return self._cogs
 
     def get_daily_profit(self) -> float:
         """
@@ -282,21 +609,47 @@ class StoreState:
 
     def get_total_inventory_value(self) -> float:
         """Get total value of current inventory."""
-        return sum(item.quantity * item.avg_cost_per_unit for item in self.inventory.values() if item.quantity > 0)
+        return self._inventory_value
 
-    def get_low_stock_items(self, threshold: float = None) -> list[str]:
-        """Get list of items below stock threshold."""
+    def get_low_stock_entries(self, threshold: float = None) -> list[InventoryItem]:
+        """Get inventory items below stock threshold."""
         if threshold is None:
             threshold = self.low_stock_threshold
 
-        low_stock = []
-        for item_name, item in self.inventory.items():
-            if 0 < item.quantity <= threshold:
-                low_stock.append(f"{item_name} ({item.quantity} {item.unit})")
-        return low_stock
+        return list(self._memoized(
+            ("low_stock", threshold),
+            lambda: [item for item in self.inventory.values() if 0 < item.quantity <= threshold]
+        ))
+
+    def get_low_stock_items(self, threshold: float = None) -> list[str]:
+        """Get list of items below stock threshold."""
+        return [
+            f"{item.item_name} ({item.quantity} {item.unit})"
+            for item in self.get_low_stock_entries(threshold)
+        ]
+
+    def get_inventory_snapshot(self) -> list[dict]:
+        """
+        Items with stock left, as {"item", "qty", "unit"} dicts. The memoized
+        view is read-only; callers get copies of its dicts and may change them.
+        """
+        view = self._memoized(("inventory_snapshot",), lambda: tuple(
+            {"item": k, "qty": v.quantity, "unit": v.unit}
+            for k, v in self.inventory.items()
+            if v.quantity > 0
+        ))
+        return [dict(entry) for entry in view]
 
     def get_daily_summary(self) -> DailySummary:
-        """Get complete daily summary."""
+        """
+        Get complete daily summary.
+        Memoized until the next mutation; treat the returned object as read-only.
+        """
+        self.roll_over_if_due()
+        key = ("daily_summary", self._get_today_str(), self.low_stock_threshold)
+        return self._memoized(key, self._build_daily_summary)
+
+    def _build_daily_summary(self) -> DailySummary:
         items_sold = [
             {
                 "item": sale.item_name,
@@ -328,102 +681,276 @@ class StoreState:
             inventory_value=self.get_total_inventory_value()
         )
 
+    def snapshot(self) -> StoreSnapshot:
+        """
+        Consistent copy of inventory, ledger and totals, safe to read without the lock.
+        Memoized until the next mutation.
+        """
+        self.roll_over_if_due()
+        return self._memoized(("snapshot",), self._build_snapshot)
+
+    def _build_snapshot(self) -> StoreSnapshot:
+        # Ledgers are append-only, so views of them need no copy; inventory items change in place
+        return StoreSnapshot.model_construct(
+            store_id=self.store_id,
+            version=self.version,
+            inventory={name: item.model_copy() for name, item in self.inventory.items()},
+            sales=self.sales.view(),
+            expenses=self.expenses.view(),
+            total_sales=self._sales_total,
+            total_expenses=self._expense_total,
+            cogs=self._cogs,
+            inventory_value=self._inventory_value,
+        )
+
+    def has_unsaved_changes(self) -> bool:
+        """True if save_to_db has anything to write."""
+        return bool(
+            self._dirty_items
+            or len(self.sales) > self._saved_sales_count
+            or len(self.expenses) > self._saved_expenses_count
+        )
+
+    @_serialized
     def save_to_db(self):
-        """Persist current state to PostgreSQL."""
-        conn = self._get_conn()
+        """
+        Persist changes since the last save to PostgreSQL.
+        Only dirty inventory rows are upserted; new ledger rows are inserted
+        in one multi-row statement per table. No-op turns skip the DB entirely.
+        """
+        if not self.has_unsaved_changes():
+            return
+
+        dirty_items = set(self._dirty_items)
+        sales_end = len(self.sales)
+        expenses_end = len(self.expenses)
+
+        inventory_rows = [
+            (self.store_id, name, item.quantity, item.unit, item.avg_cost_per_unit, self._stamp(item.last_updated))
+            for name in dirty_items
+            if (item := self.inventory.get(name)) is not None
+        ]
+        expense_rows = [
+            (self.store_id, exp.category, exp.amount, exp.description, self._stamp(exp.timestamp),
+             exp.timestamp.date().isoformat())
+            for exp in self.expenses.view(self._saved_expenses_count, expenses_end)
+        ]
+        sale_rows = [
+            (self.store_id, sale.item_name, sale.quantity, sale.unit, sale.price_per_unit, sale.total,
+             self._stamp(sale.timestamp), sale.timestamp.date().isoformat(), sale.unit_cost)
+            for sale in self.sales.view(self._saved_sales_count, sales_end)
+        ]
+
+        if self._journal is not None:
+            self._journal.append(
+                [list(r) for r in inventory_rows],
+                [list(r) for r in expense_rows],
+                [list(r) for r in sale_rows],
+            )
+        else:
+            self.storage.write_rows(inventory_rows, expense_rows, sale_rows)
+
+        # Only advance the cursors once the changes are durable
+        self._dirty_items -= dirty_items
+        self._saved_expenses_count = expenses_end
+        self._saved_sales_count = sales_end
+
+        if self._flusher is not None:
+            self._flusher.notify()
+            logger.debug(
+                f"📒 State journaled ({len(inventory_rows)} items, "
+                f"{len(sale_rows)} sales, {len(expense_rows)} expenses)"
+            )
+        else:
+            logger.info(
+                f"✅ State saved to database ({len(inventory_rows)} items, "
+                f"{len(sale_rows)} sales, {len(expense_rows)} expenses)"
+            )
+
+    def _write_journal_batch(self, journal_id: str, entries: list[dict]):
+        """
+        Commit journal entries in one transaction, skipping any the checkpoint
+        says are already there (crash between commit and truncate).
+        """
+        self.storage.write_journal_batch(journal_id, entries)
+
+    def flush(self) -> int:
+        """Push journaled changes to storage now (no-op in synchronous mode)."""
+        if self._flusher is None:
+            return 0
+        return self._flusher.flush()
+
+    def close(self):
+        """Final snapshot and flush, stop the background flusher and release the journal file and storage."""
         try:
-            cursor = conn.cursor()
-
-            for item_name, item in self.inventory.items():
-                cursor.execute("""
-                    INSERT INTO inventory (item_name, quantity, unit, avg_cost, updated_at)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (item_name) DO UPDATE SET
-                        quantity = EXCLUDED.quantity,
-                        unit = EXCLUDED.unit,
-                        avg_cost = EXCLUDED.avg_cost,
-                        updated_at = EXCLUDED.updated_at
-                """, (item_name, item.quantity, item.unit, item.avg_cost_per_unit, item.last_updated.isoformat()))
-
-            today = self._get_today_str()
-            new_expenses = self.expenses[self._saved_expenses_count:]
-            for exp in new_expenses:
-                cursor.execute("""
-                    INSERT INTO expenses (category, amount, description, created_at, day)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (exp.category, exp.amount, exp.description, exp.timestamp.isoformat(), today))
+            self.write_snapshot()
+        except Exception as e:
+            logger.error(f"Final snapshot of store {self.store_id} failed: {e}")
+        if self._flusher is not None:
+            self._flusher.stop()
+            self._journal.close()
+        self.storage.close()
+
+    def write_behind_stats(self) -> Optional[dict]:
+        return self._flusher.stats() if self._flusher is not None else None
+
+    def memory_estimate(self, sample: int = 32) -> int:
+        """Approximate bytes held in memory by this store (inventory records are sampled, not walked)."""
+        inventory = list(self.inventory.values())
+        return (
+            sys.getsizeof(self.inventory)
+            + _estimate_records(inventory, sample)
+            + self.sales.nbytes()
+            + self.expenses.nbytes()
+            + sys.getsizeof(self._dirty_items)
+            + sys.getsizeof(self._views)
+        )
+
+    @_serialized
+    def clear(self):
+        """Forget all in-memory state (the caller clears the tables)."""
+        self.inventory.clear()
+        self.sales = SalesLedger()
+        self.expenses = ExpenseLedger()
+        self._saved_sales_count = 0
+        self._saved_expenses_count = 0
+        self._dirty_items.clear()
+        self._reset_aggregates()
+        self._bump_version()
+
+    def _load_inventory(self):
+        """Replace inventory with every row in storage."""
+        self.inventory.clear()
+        try:
+            for item_name, quantity, unit, avg_cost, updated_at in self.storage.load_inventory():
+                self.inventory[item_name] = InventoryItem(
+                    item_name=item_name,
+                    quantity=quantity,
+                    unit=unit,
+                    avg_cost_per_unit=avg_cost,
+                    last_updated=self._local(updated_at)
+                )
+        except Exception:
+            pass
+
+    def _load_rows(self):
+        """Full load: every inventory row and today's ledger rows."""
+        self._load_inventory()
+
+        today = self._get_today_str()
+        try:
+            for category, amount, description, created_at in self.storage.load_expenses(today):
+                self.expenses.append(category, amount, description or "", self._local(created_at))
             self._saved_expenses_count = len(self.expenses)
+        except Exception:
+            pass
 
-            new_sales = self.sales[self._saved_sales_count:]
-            for sale in new_sales:
-                cursor.execute("""
-                    INSERT INTO sales (item_name, quantity, unit, price, total, created_at, day)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (sale.item_name, sale.quantity, sale.unit, sale.price_per_unit, sale.total, sale.timestamp.isoformat(), today))
+        try:
+            for item_name, quantity, unit, price, total, created_at, unit_cost in self.storage.load_sales(today):
+                self.sales.append(item_name, quantity, unit, price, total, self._local(created_at), unit_cost)
             self._saved_sales_count = len(self.sales)
+        except Exception:
+            pass
 
-            conn.commit()
-            logger.info("✅ State saved to database")
-        finally:
-            conn.close()
+    def _adopt_snapshot(self, snap: Snapshot) -> bool:
+        """
+        Take today's ledgers from a snapshot plus the rows written after it, and
+        the inventory from storage. Returns False (nothing changed) if storage
+        has ledger rows the snapshot can't account for.
+
+        Inventory is always read in full: rows are updated in place, so there is
+        no id watermark, and updated_at comes from the writer's clock, so a
+        concurrent commit can carry an older stamp than the snapshot's newest.
+        """
+        meta = snap.meta
+        if meta["store_id"] != self.store_id or meta.get("backend") != self.storage.name:
+            return False
+        same_day = snap.day == self.day
+        sales = snap.ledger("sales", SalesLedger) if same_day else SalesLedger()
+        expenses = snap.ledger("expenses", ExpenseLedger) if same_day else ExpenseLedger()
+        today = self._get_today_str()
+        sales_id = meta["sales_id"] if same_day else 0
+        expenses_id = meta["expenses_id"] if same_day else 0
+
+        if self.storage.snapshot_counts(today, sales_id, expenses_id) != (len(sales), len(expenses)):
+            metrics.inc("snapshot_mismatches")
+            logger.info(f"Snapshot for store {self.store_id} doesn't match {self.storage.name}, loading all rows")
+            return False
+
+        for category, amount, description, created_at in self.storage.load_expenses(today, after_id=expenses_id):
+            expenses.append(category, amount, description or "", self._local(created_at))
+        for item_name, quantity, unit, price, total, created_at, unit_cost in self.storage.load_sales(
+                today, after_id=sales_id):
+            sales.append(item_name, quantity, unit, price, total, self._local(created_at), unit_cost)
+
+        self._load_inventory()
+        self.sales, self.expenses = sales, expenses
+        self._saved_sales_count = len(sales)
+        self._saved_expenses_count = len(expenses)
+        metrics.inc("snapshot_loads")
+        return True
+
+    @_serialized
+    def write_snapshot(self) -> bool:
+        """
+        Save, flush and write a binary snapshot of today's ledgers.
+        Skipped (returns False) when snapshots are off, nothing changed since the
+        last one, or changes couldn't be flushed to storage.
+        """
+        if self._snapshot_path is None or self._snapshot_version == self.version:
+            return False
+        self.save_to_db()
+        self.flush()
+        if self.has_unsaved_changes() or (self._journal is not None and len(self._journal)):
+            return False
+
+        with metrics.timer("snapshot_write_seconds"):
+            sales_id, expenses_id = self.storage.snapshot_watermarks(self._get_today_str())
+            meta = {
+                "store_id": self.store_id,
+                "backend": self.storage.name,
+                "schema_version": self.storage.schema_version,
+                "day": self._get_today_str(),
+                "taken_at": self._stamp(self._now()),
+                "sales_id": sales_id,
+                "expenses_id": expenses_id,
+            }
+            data = snapshot.encode(meta, {"sales": self.sales, "expenses": self.expenses})
+            snapshot.write(self._snapshot_path, data)
 
+        self._snapshot_version = self.version
+        logger.debug(f"📸 Snapshot of store {self.store_id} written ({len(data)} bytes)")
+        return True
+
+    @_serialized
     def load_from_db(self):
-        """Restore state from PostgreSQL on startup."""
-        conn = self._get_conn()
-        try:
-            cursor = conn.cursor()
-
-            try:
-                cursor.execute("SELECT item_name, quantity, unit, avg_cost, updated_at FROM inventory")
-                for row in cursor.fetchall():
-                    item_name, quantity, unit, avg_cost, updated_at = row
-                    self.inventory[item_name] = InventoryItem(
-                        item_name=item_name,
-                        quantity=quantity,
-                        unit=unit,
-                        avg_cost_per_unit=avg_cost,
-                        last_updated=datetime.fromisoformat(updated_at)
-                    )
-            except Exception:
-                pass
-
-            today = self._get_today_str()
-            try:
-                cursor.execute(
-                    "SELECT category, amount, description, created_at FROM expenses WHERE day = %s",
-                    (today,)
-                )
-                for row in cursor.fetchall():
-                    category, amount, description, created_at = row
-                    self.expenses.append(ExpenseRecord(
-                        category=category,
-                        amount=amount,
-                        description=description,
-                        timestamp=datetime.fromisoformat(created_at)
-                    ))
-                self._saved_expenses_count = len(self.expenses)
-            except Exception:
-                pass
-
-            try:
-                cursor.execute(
-                    "SELECT item_name, quantity, unit, price, total, created_at FROM sales WHERE day = %s",
-                    (today,)
-                )
-                for row in cursor.fetchall():
-                    item_name, quantity, unit, price, total, created_at = row
-                    self.sales.append(SaleRecord(
-                        item_name=item_name,
-                        quantity=quantity,
-                        unit=unit,
-                        price_per_unit=price,
-                        total=total,
-                        timestamp=datetime.fromisoformat(created_at)
-                    ))
-                self._saved_sales_count = len(self.sales)
-            except Exception:
-                pass
-
-            logger.info(f"✅ State loaded: {len(self.inventory)} items, {len(self.sales)} sales, {len(self.expenses)} expenses")
-        finally:
-            conn.close()
+        """
+        Restore state from storage on startup.
+        In write-behind mode the journal left by the previous run is replayed
+        first, then the background flusher starts. With a usable snapshot only
+        the rows written after it are read from storage.
+        """
+        if self._flusher is not None:
+            replayed = self._flusher.flush()
+            if replayed:
+                logger.info(f"📒 Replayed {replayed} journal entries into Postgres")
+
+        started = perf_counter()
+        self._set_day(self._now().date())
+
+        source = self.storage.name
+        snap = snapshot.read(self._snapshot_path, self.storage.schema_version) if self._snapshot_path else None
+        if snap is not None and self._adopt_snapshot(snap):
+            source = "snapshot"
+        else:
+            self._load_rows()
+
+        self._reset_aggregates()
+        self._bump_version()
+        if source == "snapshot":
+            self._snapshot_version = self.version
+        metrics.observe("state_load_seconds", perf_counter() - started, labels={"source": source})
+        logger.info(f"✅ State loaded [{self.store_id}] from {source}: {len(self.inventory)} items, {len(self.sales)} sales, {len(self.expenses)} expenses")
+
+        if self._flusher is not None:
+            self._flusher.start()
@@ -0,0 +1,808 @@
+"""
+Storage backends under StoreState.
+
+StoreState keeps a store's business state in memory; everything that has to
+reach disk goes through a StorageBackend. Each StoreState owns one backend,
+bound to its store id:
+
+  PostgresBackend  every store in one shared database (DATABASE_URL, pooled
+                   by core.db); needed when several workers share stores
+  SQLiteBackend    one WAL-mode file per store under SQLITE_DIR, committed
+                   locally without a network round trip (single-shop or
+                   one-worker-per-store deployments, and hermetic tests)
+
+STORAGE_BACKEND=postgres|sqlite picks the backend open_backend() builds.
+Historical analytics (core.rollups queries) run through StorageBackend.fetch;
+the backfill and partition CLIs are Postgres-only.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import date
+from typing import Optional
+from loguru import logger
+from psycopg2.extras import execute_values
+from core import metrics, migrations, rollups
+from core.db import connection
+
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "postgres")
+SQLITE_DIR = os.getenv("SQLITE_DIR", "data")
+# NORMAL survives a process crash in WAL mode; FULL also survives power loss (an fsync per commit)
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+class StorageBackend(ABC):
+    """
+    Persistence for one store. Rows use the table layouts of the Postgres
+    schema (see core.migrations): timestamps are ISO-8601 strings with an
+    offset, days are YYYY-MM-DD.
+
+    Atomic-mode statements (execute) return the item's (quantity, unit,
+    avg_cost, updated_at) after the change, or None.
+    """
+
+    name = ""
+    # Snapshots record this and are ignored after a schema change (core.snapshot)
+    schema_version = 0
+
+    def __init__(self, store_id: str):
+        self.store_id = store_id
+
+    @abstractmethod
+    def ensure_schema(self):
+        """Create or upgrade the backend's tables (cheap when they are current)."""
+
+    @abstractmethod
+    def write_rows(self, inventory_rows: list, expense_rows: list, sale_rows: list):
+        """Upsert inventory rows and insert ledger rows (plus their rollups) in one transaction."""
+
+    @abstractmethod
+    def write_journal_batch(self, journal_id: str, entries: list[dict]):
+        """Commit journal entries and the journal's checkpoint together, skipping entries already applied."""
+
+    @abstractmethod
+    def write_daily_summaries(self, days: list[date], now: str):
+        """Upsert the daily_summary row of each closed day from the rows in storage."""
+
+    @abstractmethod
+    def execute(self, op: str, params: dict) -> Optional[tuple]:
+        """
+        Run one atomic inventory operation: add_stock, remove_stock,
+        record_sale, update_stock, select_item or record_expense.
+        """
+
+    @abstractmethod
+    def load_inventory(self) -> list[tuple]:
+        """(item_name, quantity, unit, avg_cost, updated_at) for every item."""
+
+    @abstractmethod
+    def load_expenses(self, day: str, after_id: Optional[int] = None) -> list[tuple]:
+        """(category, amount, description, created_at) for the day, in id order after after_id."""
+
+    @abstractmethod
+    def load_sales(self, day: str, after_id: Optional[int] = None) -> list[tuple]:
+        """(item_name, quantity, unit, price, total, created_at, unit_cost) for the day, in id order after after_id."""
+
+    @abstractmethod
+    def snapshot_watermarks(self, day: str) -> tuple:
+        """(newest sales id, newest expenses id) of the day, for a snapshot."""
+
+    @abstractmethod
+    def snapshot_counts(self, day: str, sales_id: int, expenses_id: int) -> tuple:
+        """(sales ≤ sales_id, expenses ≤ expenses_id) for the day."""
+
+    @abstractmethod
+    def fetch(self, sql: str, params: tuple) -> list[tuple]:
+        """Run a read-only query written for Postgres (%s placeholders)."""
+
+    @abstractmethod
+    def delete_store(self):
+        """Delete the store's inventory, ledgers, rollups and daily summaries."""
+
+    def close(self):
+        pass
+
+
+def merge_journal_entries(entries: list[dict]) -> tuple[list, list, list]:
+    """Journal entries → (inventory, expense, sale) rows; later entries carry the newer inventory row."""
+    inventory = {}
+    expense_rows, sale_rows = [], []
+    for entry in entries:
+        for r in entry["inventory"]:
+            inventory[r[1]] = tuple(r)
+        expense_rows.extend(tuple(r) for r in entry["expenses"])
+        for r in entry["sales"]:
+            if len(r) == 8:
+                # Journaled before sales carried unit_cost: the item's avg cost as of that entry
+                item = inventory.get(r[1])
+                r = [*r, item[4] if item else 0.0]
+            sale_rows.append(tuple(r))
+    return list(inventory.values()), expense_rows, sale_rows
+
+
+# Every table with per-store rows (delete_store)
+STORE_TABLES = ("inventory", "sales", "expenses", "sales_daily_item", "expenses_daily_category", "daily_summary")
+
+# Read queries shared by both backends (Postgres placeholders; see _sqlite_sql)
+_LOAD_INVENTORY_SQL = "SELECT item_name, quantity, unit, avg_cost, updated_at FROM inventory WHERE store_id = %(store_id)s"
+_LOAD_EXPENSES_SQL = (
+    "SELECT category, amount, description, created_at FROM expenses "
+    "WHERE store_id = %(store_id)s AND day = %(day)s"
+)
+_LOAD_EXPENSES_AFTER_SQL = _LOAD_EXPENSES_SQL + " AND id > %(after_id)s ORDER BY id"
+_LOAD_SALES_SQL = (
+    "SELECT item_name, quantity, unit, price, total, created_at, unit_cost FROM sales "
+    "WHERE store_id = %(store_id)s AND day = %(day)s"
+)
+_LOAD_SALES_AFTER_SQL = _LOAD_SALES_SQL + " AND id > %(after_id)s ORDER BY id"
+
+# Taken with the snapshot: newest ledger ids for the day and newest inventory change
+_SNAPSHOT_WATERMARK_SQL = """
+    SELECT (SELECT COALESCE(MAX(id), 0) FROM sales WHERE store_id = %(store_id)s AND day = %(day)s),
+           (SELECT COALESCE(MAX(id), 0) FROM expenses WHERE store_id = %(store_id)s AND day = %(day)s)
+"""
+
+# Rows at or below the watermarks must match the snapshot, or someone else wrote to the day
+_SNAPSHOT_COUNTS_SQL = """
+    SELECT (SELECT COUNT(*) FROM sales WHERE store_id = %(store_id)s AND day = %(day)s AND id <= %(sales_id)s),
+           (SELECT COUNT(*) FROM expenses WHERE store_id = %(store_id)s AND day = %(day)s AND id <= %(expenses_id)s)
+"""
+
+
+# ══════════════════════════════════════════════════════════════
+# POSTGRES
+# ══════════════════════════════════════════════════════════════
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def ensure_postgres_schema(default_store_id: str, timezone: str):
+    """Bring the Postgres schema up to date via core.migrations (once per process)."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        with connection() as conn:
+            # One cheap query on warm databases instead of the advisory lock + DDL
+            applied = 0 if migrations.is_current(conn) else migrations.migrate(conn, default_store_id, timezone)
+        if applied:
+            logger.info(f"🛠️ Schema at version {migrations.SCHEMA_VERSION} ({applied} migrations applied)")
+        _schema_ready = True
+
+
+# Atomic inventory statements (weighted avg cost computed in Postgres)
+
+_ADD_STOCK_SQL = """
+    INSERT INTO inventory AS inv (store_id, item_name, quantity, unit, avg_cost, updated_at)
+    VALUES (%(store_id)s, %(item)s, %(quantity)s, %(unit)s, %(cost)s, %(now)s)
+    ON CONFLICT (store_id, item_name) DO UPDATE SET
+        avg_cost = CASE WHEN inv.quantity + EXCLUDED.quantity > 0
+            THEN (inv.quantity * inv.avg_cost + EXCLUDED.quantity * EXCLUDED.avg_cost)
+                 / (inv.quantity + EXCLUDED.quantity)
+            ELSE inv.avg_cost END,
+        quantity = inv.quantity + EXCLUDED.quantity,
+        unit = EXCLUDED.unit,
+        updated_at = EXCLUDED.updated_at
+    RETURNING quantity, unit, avg_cost, updated_at
+"""
+
+# Unknown items are created at negative stock and zero cost, as in memory mode
+_REMOVE_STOCK_SQL = """
+    INSERT INTO inventory AS inv (store_id, item_name, quantity, unit, avg_cost, updated_at)
+    VALUES (%(store_id)s, %(item)s, %(delta)s, 'unit', 0, %(now)s)
+    ON CONFLICT (store_id, item_name) DO UPDATE SET
+        quantity = inv.quantity + EXCLUDED.quantity,
+        updated_at = EXCLUDED.updated_at
+    RETURNING quantity, unit, avg_cost, updated_at
+"""
+
+_RECORD_SALE_SQL = """
+    WITH stock AS (""" + _REMOVE_STOCK_SQL + """),
+    sale AS (
+        INSERT INTO sales (store_id, item_name, quantity, unit, price, total, created_at, day, unit_cost)
+        SELECT %(store_id)s, %(item)s, %(quantity)s, %(sale_unit)s, %(price)s, %(total)s,
+               %(now)s::timestamptz, %(day)s::date, stock.avg_cost
+        FROM stock
+    ),
+    rollup AS (
+        INSERT INTO sales_daily_item AS r (store_id, day, item_name, quantity, revenue, cogs, sale_count)
+        SELECT %(store_id)s, %(day)s::date, %(item)s, %(quantity)s, %(total)s, %(quantity)s * stock.avg_cost, 1
+        FROM stock
+        ON CONFLICT (store_id, day, item_name) DO UPDATE SET
+            quantity = r.quantity + EXCLUDED.quantity,
+            revenue = r.revenue + EXCLUDED.revenue,
+            cogs = r.cogs + EXCLUDED.cogs,
+            sale_count = r.sale_count + 1
+    )
+    SELECT quantity, unit, avg_cost, updated_at FROM stock
+"""
+
+_UPDATE_STOCK_SQL = """
+    UPDATE inventory SET
+        quantity = COALESCE(%(quantity)s, quantity),
+        unit = COALESCE(%(unit)s, unit),
+        avg_cost = COALESCE(%(cost)s, avg_cost),
+        updated_at = %(now)s
+    WHERE store_id = %(store_id)s AND item_name = %(item)s
+    RETURNING quantity, unit, avg_cost, updated_at
+"""
+
+_RECORD_EXPENSE_SQL = """
+    WITH expense AS (
+        INSERT INTO expenses (store_id, category, amount, description, created_at, day)
+        VALUES (%(store_id)s, %(category)s, %(amount)s, %(description)s, %(now)s, %(day)s)
+    )
+    INSERT INTO expenses_daily_category AS r (store_id, day, category, amount, expense_count)
+    VALUES (%(store_id)s, %(day)s, %(category)s, %(amount)s, 1)
+    ON CONFLICT (store_id, day, category) DO UPDATE SET
+        amount = r.amount + EXCLUDED.amount,
+        expense_count = r.expense_count + 1
+"""
+
+_SELECT_ITEM_SQL = """
+    SELECT quantity, unit, avg_cost, updated_at FROM inventory
+    WHERE store_id = %(store_id)s AND item_name = %(item)s
+"""
+
+# Totals for a closed day, from the rows every worker wrote (COGS at each sale's unit cost, as in memory)
+_DAILY_SUMMARY_SQL = """
+    INSERT INTO daily_summary AS d (
+        store_id, day, total_sales, total_expenses, cogs, profit, sales_count, expense_count, closed_at
+    )
+    SELECT %(store_id)s, %(day)s::date, s.total_sales, e.total_expenses, s.cogs,
+           s.total_sales - s.cogs - e.total_expenses, s.sales_count, e.expense_count, %(now)s::timestamptz
+    FROM (
+        SELECT COALESCE(SUM(sa.total), 0) AS total_sales,
+               COALESCE(SUM(sa.quantity * sa.unit_cost), 0) AS cogs,
+               COUNT(*) AS sales_count
+        FROM sales sa
+        WHERE sa.store_id = %(store_id)s AND sa.day = %(day)s
+    ) s, (
+        SELECT COALESCE(SUM(amount), 0) AS total_expenses, COUNT(*) AS expense_count
+        FROM expenses WHERE store_id = %(store_id)s AND day = %(day)s
+    ) e
+    ON CONFLICT (store_id, day) DO UPDATE SET
+        total_sales = EXCLUDED.total_sales,
+        total_expenses = EXCLUDED.total_expenses,
+        cogs = EXCLUDED.cogs,
+        profit = EXCLUDED.profit,
+        sales_count = EXCLUDED.sales_count,
+        expense_count = EXCLUDED.expense_count,
+        closed_at = EXCLUDED.closed_at
+"""
+
+
+_ATOMIC_SQL = {
+    "add_stock": _ADD_STOCK_SQL,
+    "remove_stock": _REMOVE_STOCK_SQL,
+    "record_sale": _RECORD_SALE_SQL,
+    "update_stock": _UPDATE_STOCK_SQL,
+    "select_item": _SELECT_ITEM_SQL,
+    "record_expense": _RECORD_EXPENSE_SQL,
+}
+
+
+def _write_rows(cursor, inventory_rows: list, expense_rows: list, sale_rows: list):
+    """Upsert inventory rows, insert ledger rows and fold them into the rollups, one statement per table."""
+    if inventory_rows:
+        execute_values(cursor, """
+            INSERT INTO inventory (store_id, item_name, quantity, unit, avg_cost, updated_at)
+            VALUES %s
+            ON CONFLICT (store_id, item_name) DO UPDATE SET
+                quantity = EXCLUDED.quantity,
+                unit = EXCLUDED.unit,
+                avg_cost = EXCLUDED.avg_cost,
+                updated_at = EXCLUDED.updated_at
+        """, inventory_rows, page_size=1000)
+
+    if expense_rows:
+        execute_values(cursor, """
+            INSERT INTO expenses (store_id, category, amount, description, created_at, day)
+            VALUES %s
+        """, expense_rows, page_size=1000)
+
+    if sale_rows:
+        execute_values(cursor, """
+            INSERT INTO sales (store_id, item_name, quantity, unit, price, total, created_at, day, unit_cost)
+            VALUES %s
+        """, sale_rows, page_size=1000)
+
+    rollups.write_rollups(cursor, expense_rows, sale_rows)
+
+
+class PostgresBackend(StorageBackend):
+    """Shared Postgres database; statements go through the per-worker pool."""
+
+    name = "postgres"
+    schema_version = migrations.SCHEMA_VERSION
+
+    def __init__(self, store_id: str, default_store_id: str, timezone: str):
+        """
+        Args:
+            default_store_id: Owner of rows from single-store databases (schema migrations)
+            timezone: Shop timezone that legacy TEXT timestamps were written in
+        """
+        super().__init__(store_id)
+        self.default_store_id = default_store_id
+        self.timezone = timezone
+
+    def ensure_schema(self):
+        ensure_postgres_schema(self.default_store_id, self.timezone)
+
+    def _fetchall(self, sql: str, params) -> list[tuple]:
+        with connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def _fetchone(self, sql: str, params) -> Optional[tuple]:
+        with connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return cursor.fetchone()
+
+    def write_rows(self, inventory_rows: list, expense_rows: list, sale_rows: list):
+        with metrics.timer("storage_commit_seconds", labels={"backend": self.name, "op": "save"}):
+            with connection() as conn:
+                _write_rows(conn.cursor(), inventory_rows, expense_rows, sale_rows)
+                conn.commit()
+
+    def write_journal_batch(self, journal_id: str, entries: list[dict]):
+        with metrics.timer("storage_commit_seconds", labels={"backend": self.name, "op": "journal"}), \
+                connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT seq FROM journal_checkpoint WHERE journal_id = %s FOR UPDATE",
+                (journal_id,)
+            )
+            row = cursor.fetchone()
+            applied = row[0] if row else 0
+            entries = [e for e in entries if e["seq"] > applied]
+            if not entries:
+                return
+
+            _write_rows(cursor, *merge_journal_entries(entries))
+            cursor.execute("""
+                INSERT INTO journal_checkpoint (journal_id, seq) VALUES (%s, %s)
+                ON CONFLICT (journal_id) DO UPDATE SET seq = EXCLUDED.seq
+            """, (journal_id, entries[-1]["seq"]))
+            conn.commit()
+
+    def write_daily_summaries(self, days: list[date], now: str):
+        with metrics.timer("storage_commit_seconds", labels={"backend": self.name, "op": "daily_summary"}), \
+                connection() as conn:
+            cursor = conn.cursor()
+            for day in days:
+                cursor.execute(_DAILY_SUMMARY_SQL, {"store_id": self.store_id, "day": day.isoformat(), "now": now})
+            conn.commit()
+
+    def execute(self, op: str, params: dict) -> Optional[tuple]:
+        with metrics.timer("storage_commit_seconds", labels={"backend": self.name, "op": "atomic"}), \
+                connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_ATOMIC_SQL[op], params)
+            row = cursor.fetchone() if cursor.description else None
+            conn.commit()
+        return row
+
+    def load_inventory(self) -> list[tuple]:
+        return self._fetchall(_LOAD_INVENTORY_SQL, {"store_id": self.store_id})
+
+    def load_expenses(self, day: str, after_id: Optional[int] = None) -> list[tuple]:
+        sql = _LOAD_EXPENSES_SQL if after_id is None else _LOAD_EXPENSES_AFTER_SQL
+        return self._fetchall(sql, {"store_id": self.store_id, "day": day, "after_id": after_id})
+
+    def load_sales(self, day: str, after_id: Optional[int] = None) -> list[tuple]:
+        sql = _LOAD_SALES_SQL if after_id is None else _LOAD_SALES_AFTER_SQL
+        return self._fetchall(sql, {"store_id": self.store_id, "day": day, "after_id": after_id})
+
+    def snapshot_watermarks(self, day: str) -> tuple:
+        return self._fetchone(_SNAPSHOT_WATERMARK_SQL, {"store_id": self.store_id, "day": day})
+
+    def snapshot_counts(self, day: str, sales_id: int, expenses_id: int) -> tuple:
+        return self._fetchone(_SNAPSHOT_COUNTS_SQL, {
+            "store_id": self.store_id, "day": day, "sales_id": sales_id, "expenses_id": expenses_id,
+        })
+
+    def fetch(self, sql: str, params: tuple) -> list[tuple]:
+        return self._fetchall(sql, params)
+
+    def delete_store(self):
+        with connection() as conn:
+            cursor = conn.cursor()
+            for table in STORE_TABLES:
+                cursor.execute(f"DELETE FROM {table} WHERE store_id = %s", (self.store_id,))
+            conn.commit()
+
+
+# ══════════════════════════════════════════════════════════════
+# SQLITE
+# ══════════════════════════════════════════════════════════════
+
+# Bumped (with a matching upgrade step) whenever _SQLITE_SCHEMA changes; kept in PRAGMA user_version
+SQLITE_SCHEMA_VERSION = 2
+
+_SQLITE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS inventory (
+        store_id TEXT NOT NULL,
+        item_name TEXT NOT NULL,
+        quantity REAL,
+        unit TEXT,
+        avg_cost REAL,
+        updated_at TEXT,
+        PRIMARY KEY (store_id, item_name)
+    );
+    CREATE TABLE IF NOT EXISTS expenses (
+        id INTEGER PRIMARY KEY,
+        store_id TEXT NOT NULL,
+        category TEXT,
+        amount REAL,
+        description TEXT,
+        created_at TEXT,
+        day TEXT
+    );
+    CREATE TABLE IF NOT EXISTS sales (
+        id INTEGER PRIMARY KEY,
+        store_id TEXT NOT NULL,
+        item_name TEXT,
+        quantity REAL,
+        unit TEXT,
+        price REAL,
+        total REAL,
+        created_at TEXT,
+        day TEXT,
+        unit_cost REAL NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS daily_summary (
+        store_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        total_sales REAL,
+        total_expenses REAL,
+        cogs REAL,
+        profit REAL,
+        sales_count INTEGER,
+        expense_count INTEGER,
+        closed_at TEXT,
+        PRIMARY KEY (store_id, day)
+    );
+    CREATE TABLE IF NOT EXISTS journal_checkpoint (
+        journal_id TEXT PRIMARY KEY,
+        seq INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS sales_daily_item (
+        store_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        item_name TEXT NOT NULL,
+        quantity REAL NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0,
+        cogs REAL NOT NULL DEFAULT 0,
+        sale_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (store_id, day, item_name)
+    );
+    CREATE TABLE IF NOT EXISTS expenses_daily_category (
+        store_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        category TEXT NOT NULL,
+        amount REAL NOT NULL DEFAULT 0,
+        expense_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (store_id, day, category)
+    );
+    CREATE INDEX IF NOT EXISTS expenses_store_day_idx ON expenses (store_id, day);
+    CREATE INDEX IF NOT EXISTS sales_store_day_idx ON sales (store_id, day);
+    CREATE INDEX IF NOT EXISTS sales_store_item_day_idx ON sales (store_id, item_name, day);
+"""
+
+# Upgrade steps for files created at an older version: target version → script (see core.migrations)
+_SQLITE_UPGRADES = {
+    # Sales carry the unit cost they sold at; existing rows get their rollup's, else the current avg cost
+    2: """
+        ALTER TABLE sales ADD COLUMN unit_cost REAL NOT NULL DEFAULT 0;
+        UPDATE sales SET unit_cost = COALESCE(
+            (SELECT r.cogs / NULLIF(r.quantity, 0) FROM sales_daily_item r
+             WHERE r.store_id = sales.store_id AND r.day = sales.day AND r.item_name = sales.item_name),
+            (SELECT i.avg_cost FROM inventory i
+             WHERE i.store_id = sales.store_id AND i.item_name = sales.item_name),
+            0);
+    """,
+}
+
+_SQLITE_UPSERT_INVENTORY_SQL = """
+    INSERT INTO inventory (store_id, item_name, quantity, unit, avg_cost, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (store_id, item_name) DO UPDATE SET
+        quantity = excluded.quantity,
+        unit = excluded.unit,
+        avg_cost = excluded.avg_cost,
+        updated_at = excluded.updated_at
+"""
+
+_SQLITE_INSERT_EXPENSE_SQL = """
+    INSERT INTO expenses (store_id, category, amount, description, created_at, day)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+_SQLITE_INSERT_SALE_SQL = """
+    INSERT INTO sales (store_id, item_name, quantity, unit, price, total, created_at, day, unit_cost)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Rollup rows from rollups.aggregate_*
+_SQLITE_UPSERT_SALES_ROLLUP_SQL = """
+    INSERT INTO sales_daily_item (store_id, day, item_name, quantity, revenue, cogs, sale_count)
+    VALUES (:store_id, :day, :item, :quantity, :revenue, :cogs, :count)
+    ON CONFLICT (store_id, day, item_name) DO UPDATE SET
+        quantity = quantity + excluded.quantity,
+        revenue = revenue + excluded.revenue,
+        cogs = cogs + excluded.cogs,
+        sale_count = sale_count + excluded.sale_count
+"""
+
+_SQLITE_UPSERT_EXPENSES_ROLLUP_SQL = """
+    INSERT INTO expenses_daily_category (store_id, day, category, amount, expense_count)
+    VALUES (:store_id, :day, :category, :amount, :count)
+    ON CONFLICT (store_id, day, category) DO UPDATE SET
+        amount = amount + excluded.amount,
+        expense_count = expense_count + excluded.expense_count
+"""
+
+# Atomic-mode statements; each operation runs inside BEGIN IMMEDIATE (the file's write lock)
+_SQLITE_ADD_STOCK_SQL = """
+    INSERT INTO inventory (store_id, item_name, quantity, unit, avg_cost, updated_at)
+    VALUES (:store_id, :item, :quantity, :unit, :cost, :now)
+    ON CONFLICT (store_id, item_name) DO UPDATE SET
+        avg_cost = CASE WHEN quantity + excluded.quantity > 0
+            THEN (quantity * avg_cost + excluded.quantity * excluded.avg_cost) / (quantity + excluded.quantity)
+            ELSE avg_cost END,
+        quantity = quantity + excluded.quantity,
+        unit = excluded.unit,
+        updated_at = excluded.updated_at
+"""
+
+_SQLITE_REMOVE_STOCK_SQL = """
+    INSERT INTO inventory (store_id, item_name, quantity, unit, avg_cost, updated_at)
+    VALUES (:store_id, :item, :delta, 'unit', 0, :now)
+    ON CONFLICT (store_id, item_name) DO UPDATE SET
+        quantity = quantity + excluded.quantity,
+        updated_at = excluded.updated_at
+"""
+
+_SQLITE_UPDATE_STOCK_SQL = """
+    UPDATE inventory SET
+        quantity = COALESCE(:quantity, quantity),
+        unit = COALESCE(:unit, unit),
+        avg_cost = COALESCE(:cost, avg_cost),
+        updated_at = :now
+    WHERE store_id = :store_id AND item_name = :item
+"""
+
+_SQLITE_SELECT_ITEM_SQL = """
+    SELECT quantity, unit, avg_cost, updated_at FROM inventory
+    WHERE store_id = :store_id AND item_name = :item
+"""
+
+_SQLITE_DAILY_SUMMARY_SQL = """
+    INSERT INTO daily_summary (
+        store_id, day, total_sales, total_expenses, cogs, profit, sales_count, expense_count, closed_at
+    )
+    SELECT :store_id, :day, s.total_sales, e.total_expenses, s.cogs,
+           s.total_sales - s.cogs - e.total_expenses, s.sales_count, e.expense_count, :now
+    FROM (
+        SELECT COALESCE(SUM(sa.total), 0) AS total_sales,
+               COALESCE(SUM(sa.quantity * sa.unit_cost), 0) AS cogs,
+               COUNT(*) AS sales_count
+        FROM sales sa
+        WHERE sa.store_id = :store_id AND sa.day = :day
+    ) s, (
+        SELECT COALESCE(SUM(amount), 0) AS total_expenses, COUNT(*) AS expense_count
+        FROM expenses WHERE store_id = :store_id AND day = :day
+    ) e
+    WHERE true
+    ON CONFLICT (store_id, day) DO UPDATE SET
+        total_sales = excluded.total_sales,
+        total_expenses = excluded.total_expenses,
+        cogs = excluded.cogs,
+        profit = excluded.profit,
+        sales_count = excluded.sales_count,
+        expense_count = excluded.expense_count,
+        closed_at = excluded.closed_at
+"""
+
+
+def _sqlite_sql(sql: str) -> str:
+    """Postgres query → SQLite: %(name)s → :name, %s → ?, and drop ::type casts."""
+    sql = re.sub(r"%\((\w+)\)s", r":\1", sql)
+    sql = re.sub(r"::\w+", "", sql)
+    return sql.replace("%s", "?")
+
+
+def _sqlite_params(params):
+    if isinstance(params, dict):
+        return {k: v.isoformat() if isinstance(v, date) else v for k, v in params.items()}
+    return tuple(v.isoformat() if isinstance(v, date) else v for v in params)
+
+
+def sqlite_path_for(store_id: str) -> str:
+    """Database file for a store. Store ids are validated by the registry, so they are safe in a file name."""
+    return os.path.join(SQLITE_DIR, f"{store_id}.sqlite3")
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    One SQLite file per store, in WAL mode so readers never block the writer.
+
+    Each save is one transaction of executemany batches over fixed SQL
+    strings, which sqlite3 keeps prepared in the connection's statement
+    cache. Writes take the file's write lock up front (BEGIN IMMEDIATE), so
+    several processes can share a store file in atomic mode.
+    """
+
+    name = "sqlite"
+    schema_version = SQLITE_SCHEMA_VERSION
+
+    def __init__(self, store_id: str, path: Optional[str] = None):
+        super().__init__(store_id)
+        self.path = path or sqlite_path_for(store_id)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Autocommit mode: transactions are explicit (BEGIN IMMEDIATE ... COMMIT)
+        self._conn = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False, cached_statements=256
+        )
+        self._conn.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+        # Registry, snapshot and request threads share the connection
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _fetchall(self, sql: str, params) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(_sqlite_sql(sql), _sqlite_params(params)).fetchall()
+
+    def _fetchone(self, sql: str, params) -> Optional[tuple]:
+        rows = self._fetchall(sql, params)
+        return rows[0] if rows else None
+
+    def ensure_schema(self):
+        with self._lock:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SQLITE_SCHEMA_VERSION:
+                return
+            if version:
+                for target in range(version + 1, SQLITE_SCHEMA_VERSION + 1):
+                    self._conn.executescript(_SQLITE_UPGRADES[target])
+            self._conn.executescript(_SQLITE_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version = {SQLITE_SCHEMA_VERSION}")
+        logger.info(f"🛠️ SQLite schema ready for store {self.store_id} ({self.path})")
+
+    @staticmethod
+    def _write_rows(conn, inventory_rows: list, expense_rows: list, sale_rows: list):
+        if inventory_rows:
+            conn.executemany(_SQLITE_UPSERT_INVENTORY_SQL, inventory_rows)
+        if expense_rows:
+            conn.executemany(_SQLITE_INSERT_EXPENSE_SQL, expense_rows)
+            conn.executemany(_SQLITE_UPSERT_EXPENSES_ROLLUP_SQL, [
+                {"store_id": s, "day": d, "category": c, "amount": a, "count": n}
+                for s, d, c, a, n in rollups.aggregate_expenses(expense_rows)
+            ])
+        if sale_rows:
+            conn.executemany(_SQLITE_INSERT_SALE_SQL, sale_rows)
+            conn.executemany(_SQLITE_UPSERT_SALES_ROLLUP_SQL, [
+                {"store_id": s, "day": d, "item": i, "quantity": q, "revenue": r, "cogs": c, "count": n}
+                for s, d, i, q, r, c, n in rollups.aggregate_sales(sale_rows)
+            ])
+
+    def write_rows(self, inventory_rows: list, expense_rows: list, sale_rows: list):
+        with metrics.timer("storage_commit_seconds", labels={"backend": self.name, "op": "save"}):
+            with self._transaction() as conn:
+                self._write_rows(conn, inventory_rows, expense_rows, sale_rows)
+
+    def write_journal_batch(self, journal_id: str, entries: list[dict]):
+        with metrics.timer("storage_commit_seconds", labels={"backend": self.name, "op": "journal"}), \
+                self._transaction() as conn:
+            row = conn.execute("SELECT seq FROM journal_checkpoint WHERE journal_id = ?", (journal_id,)).fetchone()
+            applied = row[0] if row else 0
+            entries = [e for e in entries if e["seq"] > applied]
+            if not entries:
+                return
+
+            self._write_rows(conn, *merge_journal_entries(entries))
+            conn.execute("""
+                INSERT INTO journal_checkpoint (journal_id, seq) VALUES (?, ?)
+                ON CONFLICT (journal_id) DO UPDATE SET seq = excluded.seq
+            """, (journal_id, entries[-1]["seq"]))
+
+    def write_daily_summaries(self, days: list[date], now: str):
+        with metrics.timer("storage_commit_seconds", labels={"backend": self.name, "op": "daily_summary"}), \
+                self._transaction() as conn:
+            for day in days:
+                conn.execute(_SQLITE_DAILY_SUMMARY_SQL, {"store_id": self.store_id, "day": day.isoformat(), "now": now})
+
+    def execute(self, op: str, params: dict) -> Optional[tuple]:
+        with metrics.timer("storage_commit_seconds", labels={"backend": self.name, "op": "atomic"}), \
+                self._transaction() as conn:
+            if op == "select_item":
+                return conn.execute(_SQLITE_SELECT_ITEM_SQL, params).fetchone()
+            if op == "update_stock":
+                if conn.execute(_SQLITE_UPDATE_STOCK_SQL, params).rowcount == 0:
+                    return None
+            elif op == "add_stock":
+                conn.execute(_SQLITE_ADD_STOCK_SQL, params)
+            elif op in ("remove_stock", "record_sale"):
+                conn.execute(_SQLITE_REMOVE_STOCK_SQL, params)
+            elif op == "record_expense":
+                self._write_rows(conn, [], [(
+                    params["store_id"], params["category"], params["amount"], params["description"],
+                    params["now"], params["day"],
+                )], [])
+                return None
+            else:
+                raise ValueError(f"Unknown storage operation: {op}")
+
+            item = conn.execute(_SQLITE_SELECT_ITEM_SQL, params).fetchone()
+            if op == "record_sale":
+                self._write_rows(conn, [], [], [(
+                    params["store_id"], params["item"], params["quantity"], params["sale_unit"],
+                    params["price"], params["total"], params["now"], params["day"], item[2],
+                )])
+            return item
+
+    def load_inventory(self) -> list[tuple]:
+        return self._fetchall(_LOAD_INVENTORY_SQL, {"store_id": self.store_id})
+
+    def load_expenses(self, day: str, after_id: Optional[int] = None) -> list[tuple]:
+        sql = _LOAD_EXPENSES_SQL if after_id is None else _LOAD_EXPENSES_AFTER_SQL
+        return self._fetchall(sql, {"store_id": self.store_id, "day": day, "after_id": after_id})
+
+    def load_sales(self, day: str, after_id: Optional[int] = None) -> list[tuple]:
+        sql = _LOAD_SALES_SQL if after_id is None else _LOAD_SALES_AFTER_SQL
+        return self._fetchall(sql, {"store_id": self.store_id, "day": day, "after_id": after_id})
+
+    def snapshot_watermarks(self, day: str) -> tuple:
+        return self._fetchone(_SNAPSHOT_WATERMARK_SQL, {"store_id": self.store_id, "day": day})
+
+    def snapshot_counts(self, day: str, sales_id: int, expenses_id: int) -> tuple:
+        return self._fetchone(_SNAPSHOT_COUNTS_SQL, {
+            "store_id": self.store_id, "day": day, "sales_id": sales_id, "expenses_id": expenses_id,
+        })
+
+    def fetch(self, sql: str, params: tuple) -> list[tuple]:
+        return self._fetchall(sql, params)
+
+    def delete_store(self):
+        with self._transaction() as conn:
+            for table in STORE_TABLES:
+                conn.execute(f"DELETE FROM {table} WHERE store_id = ?", (self.store_id,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_backend(store_id: str, default_store_id: str, timezone: str, kind: Optional[str] = None) -> StorageBackend:
+    """Backend for a store: STORAGE_BACKEND unless kind says otherwise."""
+    kind = kind or STORAGE_BACKEND
+    if kind == "postgres":
+        return PostgresBackend(store_id, default_store_id, timezone)
+    if kind == "sqlite":
+        return SQLiteBackend(store_id)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {kind!r}")
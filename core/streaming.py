@@ -0,0 +1,37 @@
+"""
+Helpers for the streaming /process endpoint: sentence chunking and SSE framing.
+"""
+
+import re
+import json
+from typing import Iterable, Iterator
+
+
+# Danda / ! / ? always end a sentence; "." only when not a decimal point
+_SENTENCE_END = re.compile(r"(?:[।!?]+|\.(?!\d))\s+")
+
+
+def iter_sentences(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Re-chunk streamed text deltas into whole sentences.
+    A sentence is emitted once the whitespace after its terminator arrives;
+    whatever is left at the end of the stream is flushed as the last sentence.
+    """
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        while True:
+            match = _SENTENCE_END.search(buffer)
+            if not match:
+                break
+            sentence = buffer[:match.end()].strip()
+            buffer = buffer[match.end():]
+            if sentence:
+                yield sentence
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
@@ -0,0 +1,28 @@
+"""
+Gunicorn settings (picked up automatically from the working directory).
+
+A /process turn spends most of its 3-5 s waiting on Anthropic, Sarvam or
+Postgres. The default gevent worker turns those waits into cooperative
+yields, so one worker keeps hundreds of voice turns in flight instead of one.
+Writes are still serialized per store: each turn holds that store's state.lock
+through registry.use(), so turns for different stores run concurrently.
+
+GUNICORN_WORKER_CLASS=sync restores one-request-per-worker behaviour.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+reuse_port = True
+workers = int(os.getenv("GUNICORN_WORKERS", "1"))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gevent")
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "500"))
+threads = int(os.getenv("GUNICORN_THREADS", "1"))  # only used by gthread
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+
+
+def post_fork(server, worker):
+    """Make psycopg2 cooperative before the app opens its first connection."""
+    if worker_class == "gevent":
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
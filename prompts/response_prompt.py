@@ -1,6 +1,7 @@
 """Response generation prompt for natural spoken replies."""
 
 import json
+from functools import lru_cache
 
 
 LANGUAGE_NAMES = {
@@ -37,28 +38,33 @@ Unknown: "{name_display}, यह समझ नहीं आया। फिर 
 """
 
 
+def get_name_display(
+    shopkeeper_name: str = "भैया",
+    shopkeeper_honorific: str = "",
+    language: str = "hi-IN"
+) -> str:
+    """How the assistant addresses the shopkeeper ("boss" / "भैया" by default)."""
+    if not shopkeeper_name or shopkeeper_name == "भैया":
+        return "boss" if language.startswith("en") else "भैया"
+    return f"{shopkeeper_name} {shopkeeper_honorific}".strip()
+
+
+@lru_cache(maxsize=64)
 def get_response_system_prompt(
     shopkeeper_name: str = "भैया",
     shopkeeper_honorific: str = "",
     store_name: str = "दुकान",
     language: str = "hi-IN"
 ) -> str:
-    """Build response generation system prompt with personalization and language."""
+    """
+    Build response generation system prompt with personalization and language.
+    Memoized: there are only a handful of (name, honorific, store, language) combinations.
+    """
 
-    name_display = f"{shopkeeper_name} {shopkeeper_honorific}".strip()
+    name_display = get_name_display(shopkeeper_name, shopkeeper_honorific, language)
     lang_name = LANGUAGE_NAMES.get(language, "Hindi")
     is_english = language.startswith("en")
 
-    if is_english:
-        boss_term = "boss"
-        default_name = "boss"
-    else:
-        boss_term = "भैया"
-        default_name = "भैया"
-
-    if not shopkeeper_name or shopkeeper_name == "भैया":
-        name_display = default_name
-
     return f"""You are "Dukaan Buddy", a friendly and quick shop assistant (chhotu/munshi) for an Indian shopkeeper.
 
 ## IDENTITY:
@@ -83,6 +89,7 @@ def get_response_system_prompt(
 - Profit = Sales Revenue - Cost of Goods SOLD - Operational Expenses
 - Inventory purchased but NOT sold is NOT a loss — it is still stock in the shop
 - For closing summary: mention sales, expenses, profit, and what's left in inventory
+- For period_summary (a past week/month etc.): name the period, then sales, profit and the top-selling item
 - If no sales happened, profit is 0 (not negative from inventory purchases)
 - inventory_value in the data shows total worth of remaining stock — this is an asset, NOT a loss
 
@@ -50,11 +50,18 @@ query_stock — Asking about current stock
 - If unsure of exact English name, use closest common English equivalent
 - NEVER use Hindi/Devanagari in item or category fields
 
-query_summary — Asking for daily summary / today's numbers
-  Triggers: "aaj ka hisab", "kitna bana", "kamai", "summary", "total bata"
+query_summary — Asking for daily summary / today's numbers, or sales over a past period
+  Triggers: "aaj ka hisab", "kitna bana", "kamai", "summary", "total bata", "is hafte kitna bika"
+  Extract: period (see PERIODS; omit for today)
 
 query_profit — Asking specifically about profit
-  Triggers: "munafa", "profit", "faayda", "kitna kamaya"
+  Triggers: "munafa", "profit", "faayda", "kitna kamaya", "pichhle mahine ka munafa"
+  Extract: period (see PERIODS; omit for today)
+
+## PERIODS (query_summary / query_profit only):
+"kal" → yesterday, "is hafte" → this_week, "pichhle hafte" → last_week,
+"is mahine" → this_month, "pichhle mahine" → last_month, "is saal" → this_year
+"kitna bika" about a past period is query_summary, NOT sale
 
 close_day — Shopkeeper closing the day
   Triggers: "din khatam", "dukaan band", "aaj bas", "chal nikal", "closing time"
@@ -81,5 +88,5 @@ kilo/kg → kg, litre/liter → litre, packet/pack → packet, piece/unit/dana 
 → TWO intents: [{"intent": "inventory_in", "item": "potato", "quantity": 50, "unit": "kg", "price_per_unit": 30}, {"intent": "expense", "category": "electricity", "total_amount": 200}]
 
 Respond with ONLY valid JSON:
-{"intents": [{"intent": "...", "item": "...", "quantity": ..., "unit": "...", "price_per_unit": ..., "total_amount": ..., "category": "...", "description": "...", "confidence": ...}]}
+{"intents": [{"intent": "...", "item": "...", "quantity": ..., "unit": "...", "price_per_unit": ..., "total_amount": ..., "category": "...", "description": "...", "period": "...", "confidence": ...}]}
 """
@@ -5,16 +5,19 @@ Integrates Sarvam STT/TTS (client-side) with full business logic backend
 """
 
 import os
-import requests as http_requests
-from flask import Flask, request, jsonify, send_from_directory, Response
+import time
+from flask import Flask, request, jsonify, send_from_directory, Response, g
 from flask_cors import CORS
 from loguru import logger
 from dotenv import load_dotenv
+from core import metrics
 
 load_dotenv()
 
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
+# Base URL of the Sarvam speech APIs (point at benchmarks/fake_apis.py for load tests)
+SARVAM_API_URL = os.getenv("SARVAM_API_URL", "https://api.sarvam.ai").rstrip("/")
 
 if not ANTHROPIC_API_KEY:
     logger.warning("ANTHROPIC_API_KEY not set - API features will not work until it is configured")
@@ -25,6 +28,38 @@ if not SARVAM_API_KEY:
 app = Flask(__name__, static_folder='static')
 CORS(app)
 
+# Cold start = module import → first response sent (autoscaling cares about this)
+_started_at = time.monotonic()
+_first_response_sent = False
+
+@app.after_request
+def record_cold_start(response):
+    global _first_response_sent
+    if not _first_response_sent:
+        _first_response_sent = True
+        cold_start = time.monotonic() - _started_at
+        metrics.observe("cold_start_seconds", cold_start)
+        logger.info(f"🚀 First response {cold_start:.2f}s after start")
+    return response
+
+@app.before_request
+def start_request_trace():
+    g.started_at = time.perf_counter()
+    metrics.begin_trace()
+
+@app.after_request
+def add_server_timing(response):
+    # Stages so far (streamed responses: everything before the first byte), shown in devtools → Network → Timing
+    elapsed = time.perf_counter() - g.started_at
+    stages = metrics.end_trace()
+    response.headers['Server-Timing'] = ", ".join(
+        f"{name};dur={seconds * 1000:.1f}" for name, seconds in [*stages, ("total", elapsed)]
+    )
+    metrics.observe("http_request_seconds", elapsed, {
+        "endpoint": request.endpoint or "none", "method": request.method, "status": str(response.status_code)
+    })
+    return response
+
 @app.after_request
 def add_cache_control(response):
     response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
@@ -32,10 +67,32 @@ def add_cache_control(response):
     response.headers['Expires'] = '0'
     return response
 
-# Global state (will be initialized after imports)
-from core.state import StoreState
-state = StoreState()
-state.load_from_db()
+# Pooled keep-alive session (Anthropic + Sarvam); imported after load_dotenv for its settings
+from core.llm import get_session
+
+# Pooled Postgres connections (per worker; unused when STORAGE_BACKEND=sqlite)
+from core.db import get_pool
+from core.storage import STORAGE_BACKEND
+
+# Per-shop state, loaded on first request for each store id
+from core.registry import get_registry, validate_store_id, InvalidStoreId
+registry = get_registry()
+
+# Requests overlap under gevent/threaded workers: each store's agents + save run
+# one turn at a time under state.lock, while other stores proceed in parallel
+
+
+def current_store_id() -> str:
+    """Store id from the X-Store-Id header, ?store_id= or the JSON body (default store if none)."""
+    store_id = request.headers.get('X-Store-Id') or request.args.get('store_id')
+    if not store_id and request.is_json:
+        store_id = (request.get_json(silent=True) or {}).get('store_id')
+    return validate_store_id(store_id)
+
+
+@app.errorhandler(InvalidStoreId)
+def invalid_store_id(e):
+    return jsonify({'error': str(e)}), 400
 
 
 @app.route('/')
@@ -53,6 +110,7 @@ def static_files(path):
 @app.route('/quick-ack', methods=['POST'])
 def quick_ack():
     """Fast acknowledgment endpoint (keyword-based, no LLM)"""
+    store_id = current_store_id()
     try:
         data = request.get_json()
         text = data.get('text', '')
@@ -66,12 +124,13 @@ def quick_ack():
         from core.quick_ack import detect_quick_intent, get_ack_response
 
         quick_intent = detect_quick_intent(text)
-        ack_text = get_ack_response(
-            quick_intent,
-            state.shopkeeper_name,
-            state.shopkeeper_honorific,
-            language=language
-        )
+        with registry.use(store_id) as state:
+            ack_text = get_ack_response(
+                quick_intent,
+                state.shopkeeper_name,
+                state.shopkeeper_honorific,
+                language=language
+            )
 
         return jsonify({
             'ack_text': ack_text,
@@ -83,9 +142,76 @@ def quick_ack():
         return jsonify({'error': str(e)}), 500
 
 
+def execute_intents(state, router_output) -> list:
+    """Run each routed intent through its agent and collect the results."""
+    from agents.inventory import InventoryAgent
+    from agents.sales import SalesAgent
+    from agents.expense import ExpenseAgent
+    from agents.summary import SummaryAgent
+
+    inventory_agent = InventoryAgent(state)
+    sales_agent = SalesAgent(state)
+    expense_agent = ExpenseAgent(state)
+    summary_agent = SummaryAgent(state)
+
+    agent_results = []
+    for intent in router_output.intents:
+        try:
+            if intent.intent.value in ["inventory_in", "inventory_out", "query_stock", "correction"]:
+                result = inventory_agent.handle(intent)
+                agent_results.append(result)
+
+            elif intent.intent.value == "expense":
+                result = expense_agent.handle(intent)
+                agent_results.append(result)
+
+            elif intent.intent.value == "sale":
+                result = sales_agent.handle(intent)
+                agent_results.append(result)
+
+            elif intent.intent.value in ["query_summary", "query_profit", "close_day"]:
+                if SummaryAgent.reads_history(intent):
+                    # Past periods are read from storage: land this turn's earlier entries first
+                    state.save_to_db()
+                    state.flush()
+                result = summary_agent.handle(intent)
+                agent_results.append(result)
+
+            elif intent.intent.value == "greeting":
+                agent_results.append({"action": "greeting"})
+
+            else:
+                agent_results.append({"action": "unknown", "intent": intent.intent.value})
+
+        except Exception as e:
+            logger.error(f"Agent error for {intent.intent}: {e}")
+            agent_results.append({"action": "error", "error": str(e)})
+
+    return agent_results
+
+
+def render_locally(state, agent_results: list, language: str):
+    """Template reply for simple turns (None → ask Claude)."""
+    from core.renderer import render_response, RENDERER_ENABLED
+
+    if not RENDERER_ENABLED:
+        return None
+    response_text = render_response(
+        agent_results,
+        state.get_low_stock_entries(),
+        state.shopkeeper_name,
+        state.shopkeeper_honorific,
+        language=language
+    )
+    if response_text is not None:
+        metrics.inc("responses_generated", labels={"source": "template"})
+    return response_text
+
+
 @app.route('/process', methods=['POST'])
 def process():
     """Main processing endpoint: router → agents → response generation"""
+    store_id = current_store_id()
     try:
         data = request.get_json()
         text = data.get('text', '')
@@ -98,113 +224,161 @@ def process():
 
         # Import agents and router
         from core.router import route_intent
-        from core.llm import call_claude
-        from agents.inventory import InventoryAgent
-        from agents.sales import SalesAgent
-        from agents.expense import ExpenseAgent
-        from agents.summary import SummaryAgent
+        from core.llm import call_claude, cacheable_system
         from agents.alert import AlertAgent
         from prompts.response_prompt import get_response_system_prompt, build_response_user_prompt
 
         # 1. Route intents
-        router_output = route_intent(text, ANTHROPIC_API_KEY)
+        with metrics.stage("router"):
+            router_output = route_intent(text, ANTHROPIC_API_KEY)
         logger.info(f"Router output: {len(router_output.intents)} intent(s)")
 
-        # 2. Execute agents
-        inventory_agent = InventoryAgent(state)
-        sales_agent = SalesAgent(state)
-        expense_agent = ExpenseAgent(state)
-        summary_agent = SummaryAgent(state)
-        alert_agent = AlertAgent(state)
+        # 2-4. Execute agents, check alerts and save, one turn at a time
+        waited_from = time.perf_counter()
+        with registry.use(store_id) as state, state.lock:
+            metrics.record_stage("store_wait", time.perf_counter() - waited_from)
+            with metrics.stage("agents"):
+                agent_results = execute_intents(state, router_output)
+                alerts = AlertAgent(state).check_alerts()
+                response_text = render_locally(state, agent_results, language)
+                shopkeeper_name, honorific = state.shopkeeper_name, state.shopkeeper_honorific
+            with metrics.stage("save"):
+                state.save_to_db()
+
+        # 5. Generate response (local template when possible, else Claude)
+        if response_text is None:
+            system_prompt = get_response_system_prompt(
+                shopkeeper_name,
+                honorific,
+                language=language
+            )
+            user_prompt = build_response_user_prompt(text, agent_results, [alerts])
+
+            with metrics.stage("response_llm"):
+                response_text = call_claude(
+                    system_prompt=cacheable_system(system_prompt),
+                    user_text=user_prompt,
+                    api_key=ANTHROPIC_API_KEY,
+                    max_tokens=300,
+                    temperature=0.2
+                )
+            metrics.inc("responses_generated", labels={"source": "llm"})
 
-        agent_results = []
-        for intent in router_output.intents:
-            try:
-                if intent.intent.value in ["inventory_in", "inventory_out", "query_stock", "correction"]:
-                    result = inventory_agent.handle(intent)
-                    agent_results.append(result)
+        logger.info(f"Generated response: {response_text}")
 
-                elif intent.intent.value == "expense":
-                    result = expense_agent.handle(intent)
-                    agent_results.append(result)
+        # 6. Return results
+        return jsonify({
+            'response_text': response_text,
+            'intents': [{"intent": i.intent.value, "confidence": i.confidence} for i in router_output.intents],
+            'alerts': alerts
+        })
 
-                elif intent.intent.value == "sale":
-                    result = sales_agent.handle(intent)
-                    agent_results.append(result)
+    except Exception as e:
+        logger.error(f"Error in process: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
 
-                elif intent.intent.value in ["query_summary", "query_profit", "close_day"]:
-                    result = summary_agent.handle(intent)
-                    agent_results.append(result)
 
-                elif intent.intent.value == "greeting":
-                    agent_results.append({"action": "greeting"})
+@app.route('/process/stream', methods=['POST'])
+def process_stream():
+    """
+    Streaming variant of /process (server-sent events):
+      results  → intents + agent_results, as soon as the agents finish
+      sentence → one per response sentence, while Claude is still generating
+      done     → full response_text, intents and alerts (same shape as /process)
+    """
+    store_id = current_store_id()
+    try:
+        data = request.get_json()
+        text = data.get('text', '')
+        language = data.get('language', 'hi-IN')
+
+        if not text:
+            return jsonify({'error': 'No text provided'}), 400
 
-                else:
-                    agent_results.append({"action": "unknown", "intent": intent.intent.value})
+        logger.info(f"Processing (stream): '{text}' (lang: {language})")
 
-            except Exception as e:
-                logger.error(f"Agent error for {intent.intent}: {e}")
-                agent_results.append({"action": "error", "error": str(e)})
+        from core.router import route_intent
+        from core.llm import stream_claude, cacheable_system
+        from core.streaming import iter_sentences, sse_event
+        from agents.alert import AlertAgent
+        from prompts.response_prompt import get_response_system_prompt, build_response_user_prompt
 
-        # 3. Check for alerts
-        alerts = alert_agent.check_alerts()
+        with metrics.stage("router"):
+            router_output = route_intent(text, ANTHROPIC_API_KEY)
+
+        # Save before streaming: a client that hangs up mid-response must not lose the entry
+        waited_from = time.perf_counter()
+        with registry.use(store_id) as state, state.lock:
+            metrics.record_stage("store_wait", time.perf_counter() - waited_from)
+            with metrics.stage("agents"):
+                agent_results = execute_intents(state, router_output)
+                alerts = AlertAgent(state).check_alerts()
+                rendered_text = render_locally(state, agent_results, language)
+                shopkeeper_name, honorific = state.shopkeeper_name, state.shopkeeper_honorific
+            with metrics.stage("save"):
+                state.save_to_db()
 
-        # 4. Generate response
         system_prompt = get_response_system_prompt(
-            state.shopkeeper_name,
-            state.shopkeeper_honorific,
+            shopkeeper_name,
+            honorific,
             language=language
         )
         user_prompt = build_response_user_prompt(text, agent_results, [alerts])
-
-        response_text = call_claude(
-            system_prompt=system_prompt,
-            user_text=user_prompt,
-            api_key=ANTHROPIC_API_KEY,
-            max_tokens=300,
-            temperature=0.2
-        )
-
-        logger.info(f"Generated response: {response_text}")
-
-        # 5. Save state
-        state.save_to_db()
-
-        # 6. Return results
-        return jsonify({
-            'response_text': response_text,
-            'intents': [{"intent": i.intent.value, "confidence": i.confidence} for i in router_output.intents],
-            'alerts': alerts
-        })
+        intents = [{"intent": i.intent.value, "confidence": i.confidence} for i in router_output.intents]
 
     except Exception as e:
-        logger.error(f"Error in process: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error(f"Error in process stream: {e}")
         return jsonify({'error': str(e)}), 500
 
+    def generate():
+        yield sse_event("results", {"intents": intents, "agent_results": agent_results})
+
+        # Headers are already sent: the response stage only reaches the histograms
+        sentences = []
+        started = time.perf_counter()
+        try:
+            if rendered_text is not None:
+                chunks = [rendered_text]
+            else:
+                chunks = stream_claude(
+                    system_prompt=cacheable_system(system_prompt),
+                    user_text=user_prompt,
+                    api_key=ANTHROPIC_API_KEY,
+                    max_tokens=300,
+                    temperature=0.2
+                )
+                metrics.inc("responses_generated", labels={"source": "llm"})
+            for sentence in iter_sentences(chunks):
+                sentences.append(sentence)
+                yield sse_event("sentence", {"text": sentence})
+        except Exception as e:
+            logger.error(f"Error streaming response: {e}")
+            yield sse_event("error", {"error": str(e)})
+        if rendered_text is None:
+            metrics.record_stage("response_llm_stream", time.perf_counter() - started)
+
+        response_text = " ".join(sentences)
+        logger.info(f"Generated response (stream): {response_text}")
+        yield sse_event("done", {"response_text": response_text, "intents": intents, "alerts": alerts})
+
+    return Response(generate(), mimetype='text/event-stream', headers={'X-Accel-Buffering': 'no'})
+
 
 @app.route('/demo/reset', methods=['POST'])
 def demo_reset():
-    """Clear all data from inventory, sales, and expenses."""
+    """Clear all of this store's inventory, sales, and expenses."""
+    store_id = current_store_id()
     try:
-        conn = state._get_conn()
-        try:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM inventory")
-            cursor.execute("DELETE FROM sales")
-            cursor.execute("DELETE FROM expenses")
-            conn.commit()
-        finally:
-            conn.close()
-
-        state.inventory.clear()
-        state.sales.clear()
-        state.expenses.clear()
-        state._saved_sales_count = 0
-        state._saved_expenses_count = 0
-
-        logger.info("🗑️ Demo reset: all data cleared")
+        with registry.use(store_id) as state, state.lock:
+            # Journaled rows must land before the wipe, not after it
+            state.flush()
+            state.storage.delete_store()
+
+            state.clear()
+
+        logger.info(f"🗑️ Demo reset: all data cleared for store {state.store_id}")
         return jsonify({'status': 'ok', 'message': 'All data cleared'})
     except Exception as e:
         logger.error(f"Error in demo reset: {e}")
@@ -214,6 +388,7 @@ def demo_reset():
 @app.route('/demo/seed', methods=['POST'])
 def demo_seed():
     """Seed database with realistic kirana store inventory."""
+    store_id = current_store_id()
     try:
         seed_items = [
             {"name": "gehun_atta", "display": "Gehun Atta (Wheat Flour)", "qty": 200, "unit": "kg", "cost": 32},
@@ -225,10 +400,11 @@ def demo_seed():
             {"name": "maggi", "display": "Maggi Noodles", "qty": 120, "unit": "packet", "cost": 12},
         ]
 
-        for item in seed_items:
-            state.add_stock(item["name"], item["qty"], item["unit"], item["cost"])
+        with registry.use(store_id) as state, state.lock:
+            for item in seed_items:
+                state.add_stock(item["name"], item["qty"], item["unit"], item["cost"])
 
-        state.save_to_db()
+            state.save_to_db()
 
         logger.info(f"🏪 Demo seed: added {len(seed_items)} kirana items")
         return jsonify({
@@ -244,13 +420,19 @@ def demo_seed():
 @app.route('/state', methods=['GET'])
 def get_state():
     """Get current store state (for debugging)"""
+    with registry.use(current_store_id()) as state:
+        snapshot = state.snapshot()
+
+    # Rendered from the copy, so polling /state never holds up a turn
     return jsonify({
+        'store_id': snapshot.store_id,
+        'version': snapshot.version,
         'inventory': {k: {
             'quantity': v.quantity,
             'unit': v.unit,
             'avg_cost_per_unit': v.avg_cost_per_unit,
             'last_updated': v.last_updated.isoformat()
-        } for k, v in state.inventory.items()},
+        } for k, v in snapshot.inventory.items()},
         'sales': [{
             'item_name': s.item_name,
             'quantity': s.quantity,
@@ -258,16 +440,75 @@ def get_state():
             'price_per_unit': s.price_per_unit,
             'total': s.total,
             'timestamp': s.timestamp.isoformat()
-        } for s in state.sales],
+        } for s in snapshot.sales],
         'expenses': [{
             'category': e.category,
             'amount': e.amount,
             'description': e.description,
             'timestamp': e.timestamp.isoformat()
-        } for e in state.expenses]
+        } for e in snapshot.expenses]
     })
 
 
+@app.route('/analytics', methods=['GET'])
+def get_analytics():
+    """
+    Sales/profit history from the daily rollups.
+    ?period=this_week|last_month|... or ?from=YYYY-MM-DD&to=YYYY-MM-DD, optional ?top=N
+    """
+    from datetime import date
+    from core import rollups
+
+    store_id = current_store_id()
+    try:
+        with registry.use(store_id) as state:
+            today = state.day
+        if request.args.get('from'):
+            start = date.fromisoformat(request.args['from'])
+            end = date.fromisoformat(request.args.get('to') or today.isoformat())
+        else:
+            start, end = rollups.period_range(request.args.get('period', 'this_week'), today)
+        top = int(request.args.get('top', 5))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        with registry.use(store_id) as state, metrics.timer("analytics_query_seconds"):
+            summary = rollups.period_summary(store_id, start, end, top_n=top, storage=state.storage)
+        return jsonify({'store_id': store_id, **summary})
+    except Exception as e:
+        logger.error(f"Error in analytics: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/stats', methods=['GET'])
+def get_stats():
+    """Runtime counters and latencies (for debugging)"""
+    from core.router import get_fast_path_stats
+    from core.router_cache import get_router_cache
+    from core.llm import get_pool_stats
+
+    return jsonify({
+        'llm_pool': get_pool_stats(),
+        'storage_backend': STORAGE_BACKEND,
+        'db_pool': get_pool().stats() if STORAGE_BACKEND == "postgres" else None,
+        'stores': registry.stats(),
+        'responses': {
+            'template': metrics.get('responses_generated', {'source': 'template'}),
+            'llm': metrics.get('responses_generated', {'source': 'llm'}),
+        },
+        'router_fast_path': get_fast_path_stats(),
+        'router_cache': get_router_cache().stats(),
+        **metrics.snapshot()
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus scrape endpoint (counters and histograms of this worker process)"""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/api/stt', methods=['POST'])
 def stt_proxy():
     if not SARVAM_API_KEY:
@@ -284,13 +525,14 @@ def stt_proxy():
             'language_code': request.form.get('language_code', 'unknown'),
         }
 
-        resp = http_requests.post(
-            'https://api.sarvam.ai/speech-to-text',
-            headers={'api-subscription-key': SARVAM_API_KEY},
-            files=files,
-            data=data,
-            timeout=30
-        )
+        with metrics.stage("sarvam_stt"):
+            resp = get_session().post(
+                f'{SARVAM_API_URL}/speech-to-text',
+                headers={'api-subscription-key': SARVAM_API_KEY},
+                files=files,
+                data=data,
+                timeout=30
+            )
         return Response(resp.content, status=resp.status_code, content_type=resp.headers.get('Content-Type', 'application/json'))
     except Exception as e:
         logger.error(f"STT proxy error: {e}")
@@ -303,15 +545,16 @@ def tts_proxy():
         return jsonify({'error': 'SARVAM_API_KEY not configured'}), 500
     try:
         payload = request.get_json()
-        resp = http_requests.post(
-            'https://api.sarvam.ai/text-to-speech',
-            headers={
-                'api-subscription-key': SARVAM_API_KEY,
-                'Content-Type': 'application/json'
-            },
-            json=payload,
-            timeout=30
-        )
+        with metrics.stage("sarvam_tts"):
+            resp = get_session().post(
+                f'{SARVAM_API_URL}/text-to-speech',
+                headers={
+                    'api-subscription-key': SARVAM_API_KEY,
+                    'Content-Type': 'application/json'
+                },
+                json=payload,
+                timeout=30
+            )
         return Response(resp.content, status=resp.status_code, content_type=resp.headers.get('Content-Type', 'application/json'))
     except Exception as e:
         logger.error(f"TTS proxy error: {e}")
@@ -320,6 +563,7 @@ def tts_proxy():
 
 if __name__ == '__main__':
     logger.info("Starting Dukaan Buddy Server...")
+    state = registry.get(validate_store_id(None))
     logger.info(f"Inventory: {len(state.inventory)} items")
     logger.info(f"Today's sales: {len(state.sales)}")
     logger.info(f"Today's expenses: {len(state.expenses)}")
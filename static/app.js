@@ -86,6 +86,12 @@ function getTrans(key) {
     return TRANSLATIONS[currentLang][key];
 }
 
+// Per-stage server time (router, agents, save, response_llm, ...); also in devtools → Network → Timing
+function logServerTiming(label, res) {
+    const timing = res.headers.get('Server-Timing');
+    if (timing) console.debug(`${label} Server-Timing:`, timing);
+}
+
 function openDrawer() {
     drawer.classList.add('open');
     drawerOverlay.classList.add('open');
@@ -255,6 +261,7 @@ async function sendToSarvam(wavBlob) {
             throw new Error(`STT API ${res.status}: ${errText}`);
         }
 
+        logServerTiming('STT', res);
         const data = await res.json();
         console.log('Sarvam STT response:', data);
 
@@ -273,37 +280,42 @@ async function sendToSarvam(wavBlob) {
         statusText.textContent = getTrans('understanding');
         showSoundWave('processing');
 
-        const processPromise = fetch('/process', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                text: transcript,
-                language: detectedLanguage
-            })
-        });
-
-        statusText.textContent = getTrans('speaking');
-        showSoundWave('speaking');
-        await playPrerecordedAck(detectedLanguage);
-
-        statusText.textContent = getTrans('generating');
-        const processRes = await processPromise;
-
-        if (!processRes.ok) {
-            const errText = await processRes.text();
-            throw new Error(`Process API ${processRes.status}: ${errText}`);
-        }
+        if (PROCESS_STREAMING) {
+            await processAndSpeakStreaming(transcript, detectedLanguage);
+        } else {
+            const processPromise = fetch('/process', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json', 'X-Store-Id': STORE_ID },
+                body: JSON.stringify({
+                    text: transcript,
+                    language: detectedLanguage
+                })
+            });
+
+            statusText.textContent = getTrans('speaking');
+            showSoundWave('speaking');
+            await playPrerecordedAck(detectedLanguage);
+
+            statusText.textContent = getTrans('generating');
+            const processRes = await processPromise;
+
+            if (!processRes.ok) {
+                const errText = await processRes.text();
+                throw new Error(`Process API ${processRes.status}: ${errText}`);
+            }
 
-        const processData = await processRes.json();
-        console.log('Process response:', processData);
+            logServerTiming('Process', processRes);
+            const processData = await processRes.json();
+            console.log('Process response:', processData);
 
-        const responseText = processData.response_text || getTrans('responseError');
+            const responseText = processData.response_text || getTrans('responseError');
 
-        addMessage('buddy', responseText);
+            addMessage('buddy', responseText);
 
-        statusText.textContent = getTrans('speaking');
-        showSoundWave('speaking');
-        await speakText(responseText);
+            statusText.textContent = getTrans('speaking');
+            showSoundWave('speaking');
+            await speakText(responseText);
+        }
 
         statusText.innerHTML = '&nbsp;';
         statusText.className = '';
@@ -317,6 +329,84 @@ async function sendToSarvam(wavBlob) {
     }
 }
 
+async function processStreaming(text, language, onSentence) {
+    const res = await fetch('/process/stream', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'X-Store-Id': STORE_ID },
+        body: JSON.stringify({ text, language })
+    });
+
+    if (!res.ok) {
+        const errText = await res.text();
+        throw new Error(`Process API ${res.status}: ${errText}`);
+    }
+    logServerTiming('Process (stream)', res);
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+            const raw = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            for (const line of raw.split('\n')) {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            }
+            const payload = data ? JSON.parse(data) : {};
+
+            if (event === 'results') console.log('Process results:', payload);
+            else if (event === 'sentence') onSentence(payload.text);
+            else if (event === 'error') console.warn('Process stream error:', payload.error);
+            else if (event === 'done') result = payload;
+        }
+    }
+    return result;
+}
+
+async function processAndSpeakStreaming(transcript, language) {
+    statusText.textContent = getTrans('speaking');
+    showSoundWave('speaking');
+
+    // Sentences are synthesized as soon as they arrive and played in order after the ack
+    const ackPromise = playPrerecordedAck(language);
+    let speechChain = ackPromise;
+    let sentenceCount = 0;
+
+    const processPromise = processStreaming(transcript, language, (sentence) => {
+        sentenceCount++;
+        const audioPromise = synthesizeSpeech(sentence, language);
+        audioPromise.catch(() => {});  // surfaced through speechChain
+        speechChain = speechChain.then(() => audioPromise).then(playAudioUrl);
+    });
+
+    await ackPromise;
+    statusText.textContent = getTrans('generating');
+
+    const processData = await processPromise;
+    console.log('Process response:', processData);
+
+    const responseText = (processData && processData.response_text) || getTrans('responseError');
+    addMessage('buddy', responseText);
+
+    statusText.textContent = getTrans('speaking');
+    showSoundWave('speaking');
+    if (sentenceCount === 0) {
+        speechChain = speechChain.then(() => speakText(responseText));
+    }
+    await speechChain;
+}
+
 async function playPrerecordedAck(language = 'hi-IN') {
     const prefix = language.startsWith('en') ? 'en' : 'hi';
     let idx = Math.floor(Math.random() * ACK_COUNT);
@@ -339,6 +429,11 @@ async function playPrerecordedAck(language = 'hi-IN') {
 }
 
 async function speakText(text, languageCode = null) {
+    const url = await synthesizeSpeech(text, languageCode);
+    return playAudioUrl(url);
+}
+
+async function synthesizeSpeech(text, languageCode = null) {
     const targetLang = languageCode || detectedLanguage || 'hi-IN';
 
     const res = await fetch(SARVAM_TTS_URL, {
@@ -361,12 +456,15 @@ async function speakText(text, languageCode = null) {
         throw new Error(`TTS API ${res.status}: ${errText}`);
     }
 
+    logServerTiming('TTS', res);
     const data = await res.json();
     const audioBase64 = data.audios[0];
     const audioBytes = Uint8Array.from(atob(audioBase64), c => c.charCodeAt(0));
     const blob = new Blob([audioBytes], { type: 'audio/wav' });
-    const url = URL.createObjectURL(blob);
+    return URL.createObjectURL(blob);
+}
 
+function playAudioUrl(url) {
     const audio = new Audio(url);
 
     return new Promise((resolve, reject) => {
@@ -411,7 +509,7 @@ demoReset.addEventListener('click', async () => {
     demoReset.disabled = true;
     demoReset.textContent = '...';
     try {
-        const res = await fetch('/demo/reset', { method: 'POST' });
+        const res = await fetch('/demo/reset', { method: 'POST', headers: { 'X-Store-Id': STORE_ID } });
         if (res.ok) {
             showToast('All data cleared');
         } else {
@@ -428,7 +526,7 @@ demoSeed.addEventListener('click', async () => {
     demoSeed.disabled = true;
     demoSeed.textContent = '...';
     try {
-        const res = await fetch('/demo/seed', { method: 'POST' });
+        const res = await fetch('/demo/seed', { method: 'POST', headers: { 'X-Store-Id': STORE_ID } });
         if (res.ok) {
             const data = await res.json();
             showToast(data.message + ' to inventory');
@@ -460,7 +558,7 @@ demoCloseShop.addEventListener('click', async () => {
 
         const res = await fetch('/process', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: { 'Content-Type': 'application/json', 'X-Store-Id': STORE_ID },
             body: JSON.stringify({ text: closeText, language: closeLang })
         });
 
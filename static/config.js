@@ -6,3 +6,9 @@ const SARVAM_TTS_MODEL = "bulbul:v3";
 const SARVAM_TTS_SPEAKER = "shubh";
 const SARVAM_TTS_LANG = "hi-IN";  // Fallback default, overridden by STT-detected language
 const SARVAM_TTS_PACE = 1.2;
+
+// Stream /process responses sentence-by-sentence and start TTS on the first one
+const PROCESS_STREAMING = true;
+
+// Shop this page talks to (?store=shop_42); the server uses its default store when empty
+const STORE_ID = new URLSearchParams(window.location.search).get("store") || "";
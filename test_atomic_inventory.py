@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test DB-authoritative (atomic) inventory mode.
+
+Each "worker" is a StoreState with its own connection to one SQLite file
+(see conftest.py), whose write lock serializes the atomic statements the way
+row locks do in Postgres. The stress test also runs against real Postgres when
+TEST_DATABASE_URL is set (e.g. TEST_DATABASE_URL=postgres://localhost/kirana_test).
+"""
+
+import os
+import uuid
+import threading
+import pytest
+
+import core.db as db_module
+from core.state import StoreState
+
+
+def hammer(make_worker, workers: int = 4, sales_per_worker: int = 50) -> list:
+    """Several StoreStates (one per 'gunicorn worker') selling the same item concurrently."""
+    states = [make_worker() for _ in range(workers)]
+    states[0].add_stock("potato", 1000, "kg", 20)
+    barrier = threading.Barrier(workers)
+
+    def sell(state):
+        barrier.wait()
+        for _ in range(sales_per_worker):
+            state.record_sale("potato", 1, "kg", 30)
+
+    threads = [threading.Thread(target=sell, args=(s,)) for s in states]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return states
+
+
+def sales_count(state) -> int:
+    return state.storage.fetch("SELECT COUNT(*) FROM sales WHERE store_id = %s", (state.store_id,))[0][0]
+
+
+def test_weighted_average_cost(make_state):
+    state = make_state(atomic=True)
+    state.add_stock("potato", 10, "kg", 20)
+    item = state.add_stock("potato", 10, "kg", 40)
+    assert item.quantity == 20
+    assert item.avg_cost_per_unit == 30
+
+
+def test_sale_refreshes_local_copy_from_db(make_state):
+    worker_a, worker_b = make_state(atomic=True), make_state(atomic=True)
+    worker_a.add_stock("onion", 10, "kg", 30)
+    worker_b.record_sale("onion", 3, "kg", 40)
+    worker_a.record_sale("onion", 2, "kg", 40)
+
+    assert worker_a.get_stock("onion").quantity == 5
+    assert worker_b.get_stock("onion").quantity == 5
+    assert sales_count(worker_a) == 2
+    assert not worker_a.has_unsaved_changes()
+
+
+def test_reading_unchanged_stock_keeps_memoized_views(make_state):
+    worker_a, worker_b = make_state(atomic=True), make_state(atomic=True)
+    worker_a.add_stock("onion", 10, "kg", 30)
+    summary = worker_a.get_daily_summary()
+    version = worker_a.version
+
+    worker_a.get_stock("onion")
+    assert worker_a.version == version
+    assert worker_a.get_daily_summary() is summary
+
+    worker_b.record_sale("onion", 3, "kg", 40)
+    assert worker_a.get_stock("onion").quantity == 7
+    assert worker_a.version > version
+
+
+def test_aggregates_stay_consistent(make_state):
+    state = make_state(atomic=True)
+    state.add_stock("rice", 10, "kg", 50)
+    state.record_sale("rice", 4, "kg", 60)
+    state.add_stock("rice", 10, "kg", 70)
+    state.update_stock("rice", cost_per_unit=55)
+    state.record_sale("unknown_thing", 1, "unit", 10)
+    state.record_expense("rent", 100)
+
+    expected = state.recompute_aggregates()
+    assert state.get_daily_cogs() == pytest.approx(expected["cogs"])
+    assert state.get_total_inventory_value() == pytest.approx(expected["inventory_value"])
+    assert state.update_stock("nothing_here", quantity=1) is None
+    assert [row[1] for row in state.storage.load_expenses(state._get_today_str())] == [100]
+
+
+def test_no_lost_decrements_across_workers(make_state):
+    states = hammer(lambda: make_state(atomic=True))
+    fresh = make_state()
+    fresh.load_from_db()
+    assert fresh.get_stock("potato").quantity == 1000 - 4 * 50
+    assert sales_count(fresh) == 4 * 50
+    assert states[0].get_stock("potato").quantity == 800
+
+
+def test_atomic_and_write_behind_are_exclusive(make_state, tmp_path):
+    with pytest.raises(ValueError):
+        make_state(atomic=True, write_behind=True, journal_path=str(tmp_path / "j.jsonl"))
+
+
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL not set")
+def test_no_lost_decrements_on_postgres(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", os.environ["TEST_DATABASE_URL"])
+    monkeypatch.setattr(db_module, "_pool", None)
+    store_id = f"stress_{uuid.uuid4().hex[:8]}"
+
+    try:
+        states = hammer(lambda: StoreState(store_id=store_id, atomic=True), workers=8, sales_per_worker=100)
+        fresh = StoreState(store_id=store_id, atomic=True)
+        assert fresh.get_stock("potato").quantity == 1000 - 8 * 100
+        with db_module.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM sales WHERE store_id = %s", (store_id,))
+            assert cursor.fetchone()[0] == 8 * 100
+        assert sum(len(s.sales) for s in states) == 8 * 100
+    finally:
+        with db_module.connection() as conn:
+            cursor = conn.cursor()
+            for table in ("inventory", "sales", "expenses"):
+                cursor.execute(f"DELETE FROM {table} WHERE store_id = %s", (store_id,))
+            conn.commit()
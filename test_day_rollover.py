@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Test the midnight rollover: closed days are summarized in storage and leave memory."""
+
+from datetime import datetime, timedelta
+import pytest
+
+from core.state import StoreState
+
+
+class Clock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def advance(self, **kwargs):
+        self.now += timedelta(**kwargs)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(datetime(2025, 3, 10, 21, 0))
+    monkeypatch.setattr(StoreState, "_now", lambda self: clock.now)
+    return clock
+
+
+def closed_days(state) -> list[str]:
+    return [day for (day,) in state.storage.fetch(
+        "SELECT day FROM daily_summary WHERE store_id = %s ORDER BY day", (state.store_id,)
+    )]
+
+
+def sale_days(state) -> list[str]:
+    return [day for (day,) in state.storage.fetch(
+        "SELECT day FROM sales WHERE store_id = %s ORDER BY id", (state.store_id,)
+    )]
+
+
+def test_midnight_closes_the_day(clock, make_state):
+    state = make_state()
+    state.add_stock("potato", 100, "kg", 20)
+    state.record_sale("potato", 10, "kg", 30)
+    state.record_expense("rent", 500)
+
+    clock.advance(hours=4)
+    state.record_sale("potato", 1, "kg", 30)
+
+    assert closed_days(state) == ["2025-03-10"]
+    assert [s.quantity for s in state.sales] == [1]
+    assert len(state.expenses) == 0
+    assert state.get_daily_sales_total() == 30
+    assert state.get_daily_cogs() == 20
+    assert state.get_daily_expense_total() == 0
+    assert state.get_stock("potato").quantity == 89
+    assert state.get_daily_summary().date == "2025-03-11"
+
+    state.save_to_db()
+    assert sale_days(state) == ["2025-03-10", "2025-03-11"]
+    assert state.storage.fetch(
+        "SELECT total_sales, cogs, total_expenses FROM daily_summary WHERE store_id = %s", ("default",)
+    ) == [(300.0, 200.0, 500.0)]
+
+
+def test_reads_roll_over_an_idle_store(clock, make_state):
+    state = make_state()
+    state.record_sale("onion", 2, "kg", 40)
+    clock.advance(days=1)
+
+    assert state.get_daily_sales_total() == 0
+    assert len(state.sales) == 0
+    assert not state.has_unsaved_changes()
+
+
+def test_failed_save_keeps_records_and_retries(clock, make_state, monkeypatch):
+    state = make_state()
+    state.record_sale("onion", 2, "kg", 40)
+    clock.advance(hours=4)
+
+    write_rows = state.storage.write_rows
+    outage = {"down": True}
+
+    def flaky_write_rows(*rows):
+        if outage["down"]:
+            raise RuntimeError("db down")
+        write_rows(*rows)
+    monkeypatch.setattr(state.storage, "write_rows", flaky_write_rows)
+
+    state.record_sale("onion", 1, "kg", 40)
+    assert len(state.sales) == 2
+    assert closed_days(state) == []
+
+    outage["down"] = False
+    clock.advance(minutes=5)
+    assert state.roll_over_if_due()
+    assert closed_days(state) == ["2025-03-10"]
+    assert [s.timestamp.day for s in state.sales] == [11]
+    assert state.get_daily_sales_total() == 40
+    assert sale_days(state) == ["2025-03-10", "2025-03-11"]
+
+
+def test_memory_stays_flat_over_many_days(clock, make_state):
+    state = make_state()
+    state.add_stock("rice", 10_000, "kg", 50)
+    for _ in range(30):
+        for _ in range(20):
+            state.record_sale("rice", 1, "kg", 60)
+            state.save_to_db()
+            clock.advance(minutes=30)
+        clock.advance(hours=14)
+
+    assert len(state.sales) <= 20
+    assert len(sale_days(state)) == 30 * 20
+    assert len(closed_days(state)) == 30
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Test the pooled connection manager (no Postgres needed: connections are injected)."""
+
+import threading
+import psycopg2
+import psycopg2.extensions
+import pytest
+
+from core.db import ConnectionPool, PoolTimeout
+
+
+class FakeConn:
+    """Just enough of a psycopg2 connection for the pool."""
+
+    def __init__(self):
+        self.closed = 0
+        self.alive = True
+
+    def cursor(self):
+        conn = self
+
+        class Cursor:
+            def execute(self, sql):
+                if not conn.alive:
+                    raise psycopg2.OperationalError("server closed the connection")
+
+            def fetchone(self):
+                return (1,)
+        return Cursor()
+
+    def get_transaction_status(self):
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+def test_reuses_connections():
+    opened = []
+    pool = ConnectionPool(lambda: opened.append(FakeConn()) or opened[-1], minconn=1, maxconn=2)
+    for _ in range(5):
+        with pool.connection():
+            pass
+    assert len(opened) == 1
+
+
+def test_replaces_dead_connection_after_restart():
+    opened = []
+    pool = ConnectionPool(lambda: opened.append(FakeConn()) or opened[-1],
+                          minconn=1, maxconn=2, health_check_interval=0)
+    opened[0].alive = False  # DB restarted while the connection sat idle
+    with pool.connection() as conn:
+        assert conn is opened[1]
+    assert opened[0].closed
+
+
+def test_discards_on_operational_error():
+    opened = []
+    pool = ConnectionPool(lambda: opened.append(FakeConn()) or opened[-1], minconn=0, maxconn=1)
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection():
+            raise psycopg2.OperationalError("boom")
+    assert opened[0].closed and pool.stats()["open"] == 0
+
+
+def test_blocks_until_timeout_when_exhausted():
+    pool = ConnectionPool(FakeConn, minconn=0, maxconn=1, timeout=0.05)
+    conn = pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+
+    threading.Timer(0.01, pool.putconn, args=(conn,)).start()
+    pool.timeout = 1.0
+    assert pool.getconn() is conn
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Test the local Anthropic/Sarvam stand-ins used for load testing."""
+
+import os
+import sys
+import json
+import random
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from fake_apis import FakeConfig, FaultConfig, parse_latency, start_fake_apis
+from core import llm, metrics
+from core.router import ROUTER_SYSTEM_BLOCKS
+from core.schemas import RouterOutput, IntentType
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    servers = []
+    # Own keep-alive pool, so test_llm's per-host connection counts stay exact
+    monkeypatch.setattr(llm, "_session", None)
+
+    def start(**kwargs):
+        server = start_fake_apis(FakeConfig(**kwargs))
+        servers.append(server)
+        base = f"http://127.0.0.1:{server.server_port}"
+        monkeypatch.setattr(llm, "ANTHROPIC_API_URL", f"{base}/v1/messages")
+        return base
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def test_latency_distributions():
+    rng = random.Random(1)
+    assert parse_latency("fixed:0.25")(rng) == 0.25
+    assert 0.1 <= parse_latency("uniform:0.1,0.2")(rng) <= 0.2
+    samples = sorted(parse_latency("lognormal:0.5,0.3")(rng) for _ in range(2001))
+    assert 0.45 < samples[1000] < 0.55
+    with pytest.raises(ValueError):
+        parse_latency("gamma:1")
+
+
+def test_router_and_streaming_replies(fake):
+    fake()
+    creations = metrics.get("llm_tokens", {"type": "cache_creation"})
+    reply = llm.call_claude(ROUTER_SYSTEM_BLOCKS, "2 kilo cheeni becha 45 ka", api_key="fake")
+    intent = RouterOutput(**json.loads(reply)).intents[0]
+    assert (intent.intent, intent.item, intent.quantity) == (IntentType.SALE, "sugar", 2)
+    assert metrics.get("llm_tokens", {"type": "cache_creation"}) > creations
+
+    text = "".join(llm.stream_claude("You are a helpful shop assistant.", "hisaab", api_key="fake"))
+    assert text.strip()
+
+
+def test_injected_faults(fake):
+    base = fake(faults=FaultConfig(rate_429=1.0))
+    response = requests.post(f"{base}/text-to-speech", json={"text": "namaste"}, timeout=5)
+    assert response.status_code == 429 and response.headers["retry-after"] == "1"
+
+    base = fake(faults=FaultConfig(rate_timeout=1.0, hang=0.5), transcripts=["aloo kitna bacha"])
+    with pytest.raises(requests.exceptions.Timeout):
+        requests.post(f"{base}/speech-to-text", files={"file": ("a.wav", b"RIFF")}, timeout=0.2)
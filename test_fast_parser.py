@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Test the deterministic fast-path router."""
+
+from core.fast_parser import parse_fast, parse_number, tokenize
+from core.schemas import IntentType
+
+
+def _single(text):
+    output = parse_fast(text)
+    assert output is not None, text
+    assert len(output.intents) == 1
+    return output.intents[0]
+
+
+def test_numbers():
+    cases = [
+        ("50", 50), ("dhai sau", 250), ("saadhe teen", 3.5), ("do sau pachas", 250),
+        ("dedh hazaar", 1500), ("paanch hazaar do sau", 5200), ("ढाई सौ", 250), ("५०", 50),
+    ]
+    for text, expected in cases:
+        words = tokenize(text)
+        value, end = parse_number(words, 0)
+        assert value == expected, text
+        assert end == len(words), text
+
+
+def test_stock_in():
+    intent = _single("50 kilo aloo aaya 30 rupaye kilo")
+    assert intent.intent == IntentType.INVENTORY_IN
+    assert (intent.item, intent.quantity, intent.unit) == ("potato", 50, "kg")
+    assert intent.price_per_unit == 30 and intent.total_amount == 1500
+
+
+def test_sale_total():
+    intent = _single("2 kilo cheeni becha 45 ka")
+    assert intent.intent == IntentType.SALE
+    assert (intent.item, intent.quantity, intent.total_amount) == ("sugar", 2, 45)
+    assert intent.price_per_unit is None
+
+
+def test_devanagari():
+    intent = _single("५० किलो आलू आया ३० रुपये किलो")
+    assert (intent.item, intent.quantity, intent.price_per_unit) == ("potato", 50, 30)
+
+
+def test_multi_intent():
+    output = parse_fast("50 kilo aloo aaya 30 rupaye kilo aur 200 ka bijli bill bhara")
+    assert [i.intent for i in output.intents] == [IntentType.INVENTORY_IN, IntentType.EXPENSE]
+    assert output.intents[1].category == "electricity"
+    assert output.intents[1].total_amount == 200
+
+
+def test_queries():
+    assert _single("aaj ka hisab batao").intent == IntentType.QUERY_SUMMARY
+    stock = _single("aloo kitna bacha")
+    assert (stock.intent, stock.item) == (IntentType.QUERY_STOCK, "potato")
+
+
+def test_falls_back_when_unsure():
+    assert parse_fast("10 kilo aloo becha 40 rupaye") is None  # per-kilo or total?
+    assert parse_fast("aloo nahi pyaaz tha") is None            # correction
+    assert parse_fast("5 kg potahto") is None                   # typo needs fuzzy match
+    assert parse_fast("kal wale customer ka udhaar likh do") is None
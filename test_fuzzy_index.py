@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Test the indexed fuzzy matcher against the linear SequenceMatcher scan it replaced."""
+
+import random
+from difflib import SequenceMatcher
+
+from core.fuzzy_index import FuzzyIndex
+from core.normalizer import CANONICAL_ITEMS, fuzzy_match_item, normalize_item, normalize_category
+
+
+def linear_match(item: str, threshold: float = 0.8) -> str:
+    """The old fuzzy_match_item (ties broken alphabetically)."""
+    best_match, best_score = "", 0
+    for canonical in sorted(CANONICAL_ITEMS):
+        score = SequenceMatcher(None, item, canonical).ratio()
+        if score > best_score:
+            best_score, best_match = score, canonical
+    return best_match if best_score >= threshold else ""
+
+
+def test_normalization_cases_unchanged():
+    cases = {
+        "आलू": "potato", "aloo": "potato", "Potatoes": "potato",
+        "potahto": "potato", "potatos": "potato",
+        "tamatar": "tomato", "Tomatoes": "tomato", "pyaaz": "onion",
+    }
+    for spoken, expected in cases.items():
+        assert normalize_item(spoken) == expected
+    assert normalize_category("bijli") == "electricity"
+    assert normalize_category("kuch bhi") == "other"
+
+
+def test_matches_linear_scan_on_typos():
+    rng = random.Random(1)
+    items = sorted(CANONICAL_ITEMS)
+    letters = "abcdefghijklmnopqrstuvwxyz_"
+    for _ in range(3000):
+        word = list(rng.choice(items))
+        for _ in range(rng.randint(1, 2)):
+            i = rng.randrange(len(word))
+            op = rng.random()
+            if op < 0.33:
+                word[i] = rng.choice(letters)
+            elif op < 0.66 and len(word) > 1:
+                del word[i]
+            else:
+                word.insert(i, rng.choice(letters))
+        query = "".join(word)
+        assert fuzzy_match_item(query) == linear_match(query), query
+
+
+def test_no_match_below_threshold():
+    index = FuzzyIndex(["potato", "tomato", "onion"])
+    assert index.best_match("xyz") == ""
+    assert index.best_match("") == ""
+    assert index.best_match("onoin") == "onion"
+
+
+def test_length_window_at_boundary():
+    # 2·4 / (4 + 6) is exactly 0.8
+    assert FuzzyIndex(["radish"]).best_match("adih") == "radish"
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Test the write-behind journal and flusher (storage is a SQLite file, see conftest.py)."""
+
+import pytest
+
+from core.journal import Journal, JournalInUse, WriteBehindFlusher
+
+
+def test_entries_survive_reopen(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = Journal(path)
+    journal.append([["potato", 10, "kg", 20, "2025-01-01T10:00:00"]], [], [])
+    journal.append([], [["rent", 500, "", "2025-01-01T10:05:00", "2025-01-01"]], [])
+    journal.close()
+
+    reopened = Journal(path)
+    assert reopened.journal_id == journal.journal_id
+    assert [e["seq"] for e in reopened.pending()] == [1, 2]
+
+
+def test_one_journal_per_file(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    first = Journal(path)
+    # A second worker would rewrite the file from its own pending list and reuse seq numbers
+    with pytest.raises(JournalInUse):
+        Journal(path)
+    first.append([], [], [["default", "potato", 2.0, "kg", 30.0, 60.0, "t", "d", 20.0]])
+    first.discard_through(0)
+    with pytest.raises(JournalInUse):
+        Journal(path)
+
+    first.close()
+    assert len(Journal(path)) == 1
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = Journal(path)
+    journal.append([], [], [["potato", 1, "kg", 30, 30, "2025-01-01T10:00:00", "2025-01-01"]])
+    journal.close()
+    with open(path, "a") as f:
+        f.write('{"seq": 2, "inventory": [')
+
+    assert len(Journal(path)) == 1
+
+
+def test_discard_keeps_sequence_across_restart(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = Journal(path)
+    journal.append([], [], [])
+    journal.append([], [], [])
+    journal.discard_through(2)
+    journal.close()
+
+    reopened = Journal(path)
+    assert len(reopened) == 0
+    assert reopened.append([], [], []) == 3
+
+
+def test_flush_batches_and_truncates(tmp_path):
+    journal = Journal(str(tmp_path / "journal.jsonl"))
+    for _ in range(5):
+        journal.append([], [], [])
+    batches = []
+    flusher = WriteBehindFlusher(journal, lambda jid, entries: batches.append(len(entries)), batch_size=2)
+
+    assert flusher.flush() == 5
+    assert batches == [2, 2, 1]
+    assert len(journal) == 0
+
+
+def test_failed_flush_keeps_entries(tmp_path):
+    journal = Journal(str(tmp_path / "journal.jsonl"))
+    journal.append([], [], [])
+
+    def fail(journal_id, entries):
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        WriteBehindFlusher(journal, fail).flush()
+    assert len(journal) == 1
+
+
+def test_save_returns_before_storage(tmp_path, make_state):
+    state = make_state(write_behind=True, journal_path=str(tmp_path / "journal.jsonl"))
+    state.add_stock("potato", 10, "kg", 20)
+    state.save_to_db()
+
+    assert state.storage.load_inventory() == []
+    assert not state.has_unsaved_changes()
+
+    state.record_sale("potato", 2, "kg", 30)
+    state.save_to_db()
+    assert state.flush() == 2
+    assert [(row[0], row[1]) for row in state.storage.load_inventory()] == [("potato", 8)]
+    assert len(state.storage.load_sales(state._get_today_str())) == 1
+
+
+def test_replay_after_crash_is_exactly_once(tmp_path, make_state):
+    path = str(tmp_path / "journal.jsonl")
+    state = make_state(write_behind=True, journal_path=path)
+    state.record_expense("rent", 500)
+    state.save_to_db()
+
+    # Crash after the commit but before the journal was truncated
+    entries = state._journal.pending()
+    state._write_journal_batch(state._journal.journal_id, entries)
+    state._journal.close()
+
+    restarted = make_state(write_behind=True, journal_path=path)
+    assert len(restarted._journal) == 1
+    restarted.flush()
+    assert len(restarted.storage.load_expenses(restarted._get_today_str())) == 1
+    assert restarted.storage.fetch(
+        "SELECT amount, expense_count FROM expenses_daily_category WHERE store_id = %s", ("default",)
+    ) == [(500.0, 1)]
+    assert len(restarted._journal) == 0
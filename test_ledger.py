@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Test the columnar sales/expense ledgers."""
+
+from datetime import datetime, timedelta
+import pytest
+
+from core.ledger import ColumnarLedger, SalesLedger, ExpenseLedger, SaleRow
+
+T0 = datetime(2025, 3, 10, 9, 30, 15, 123456)
+
+
+@pytest.fixture
+def sales():
+    ledger = SalesLedger()
+    ledger.append("potato", 2, "kg", 30, 60, T0)
+    ledger.append("onion", 1, "kg", 40, 40, T0 + timedelta(hours=1))
+    ledger.append("potato", 3, "kg", 30, 90, T0 + timedelta(days=1))
+    return ledger
+
+
+def test_rows_round_trip(sales):
+    assert len(sales) == 3
+    assert sales[0] == SaleRow("potato", 2.0, "kg", 30.0, 60.0, T0)
+    assert sales[-1].timestamp == T0 + timedelta(days=1)
+    assert [r.item_name for r in sales] == ["potato", "onion", "potato"]
+    assert len(sales.strings) == 3  # potato, kg, onion
+
+
+def test_sum_and_group_by(sales):
+    assert sales.sum("total") == 190
+    assert sales.group_sum("quantity", by="item_name") == {"potato": 5, "onion": 1}
+    assert sales.view(1).sum("total") == 130
+
+
+def test_view_ignores_later_appends(sales):
+    view = sales.view()
+    sales.append("rice", 1, "kg", 50, 50, T0)
+    assert len(view) == 3
+    assert [r.total for r in view] == [60, 40, 90]
+    assert view[-1].item_name == "potato"
+
+
+def test_since_keeps_rows_from_cutoff(sales):
+    kept = sales.since(datetime(2025, 3, 11))
+    assert [r.total for r in kept] == [90]
+    assert len(sales) == 3
+    assert sorted(sales.days()) == [T0.date(), T0.date() + timedelta(days=1)]
+
+
+def test_expense_ledger():
+    expenses = ExpenseLedger()
+    row = expenses.append("rent", 500, "", T0)
+    assert row.amount == 500.0 and isinstance(row.amount, float)
+    assert list(expenses) == [row]
+    assert expenses.sum("amount") == 500
+
+
+def test_ledgers_must_spell_out_append():
+    class NoAppend(ColumnarLedger):
+        schema = {"amount": "d"}
+
+    with pytest.raises(TypeError):
+        NoAppend()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Test the pooled Claude HTTP client against a local server."""
+
+import json
+import threading
+import time
+import pytest
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from core import llm, metrics
+from core.streaming import iter_sentences
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    statuses = []
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        status = self.statuses.pop(0) if self.statuses else 200
+        body = json.dumps({"content": [{"type": "text", "text": "ok"}]}).encode()
+        self.send_response(status)
+        self.send_header("retry-after", "0")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_retries_and_connection_reuse():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v1/messages"
+    try:
+        _FlakyHandler.statuses = [529, 429]
+        response = llm.post_with_retries(url, {}, {"x": 1})
+        assert response.status_code == 200
+        assert _FlakyHandler.statuses == []
+
+        _FlakyHandler.statuses = [503] * (llm.LLM_MAX_RETRIES + 1)
+        assert llm.post_with_retries(url, {}, {"x": 1}).status_code == 503
+
+        stats = llm.get_pool_stats(url)
+        assert stats["requests"] == 6
+        assert stats["connections_opened"] == 1
+    finally:
+        server.shutdown()
+
+
+class _HungHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests_seen = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        _HungHandler.requests_seen += 1
+        time.sleep(3)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_retries_stop_at_the_deadline(monkeypatch):
+    monkeypatch.setattr(llm, "LLM_DEADLINE", 1.0)
+    monkeypatch.setattr(llm, "LLM_CONNECT_TIMEOUT", 0.2)
+    monkeypatch.setattr(llm, "LLM_BACKOFF_BASE", 0.0)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _HungHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        started = time.monotonic()
+        with pytest.raises(requests.exceptions.Timeout):
+            llm.post_with_retries(f"http://127.0.0.1:{server.server_port}/v1/messages", {}, {"x": 1})
+        # Read timeout cut to the budget (not LLM_READ_TIMEOUT per attempt), and no retry past it
+        assert time.monotonic() - started < 1.5
+        assert _HungHandler.requests_seen == 1
+    finally:
+        server.shutdown()
+
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        usage = {"input_tokens": 12, "cache_read_input_tokens": 1500, "cache_creation_input_tokens": 0}
+        events = [{"type": "message_start", "message": {"usage": usage}}] + [
+            {"type": "content_block_delta", "delta": {"type": "text_delta", "text": t}}
+            for t in ["लिख लिया — 50 किलो ", "आलू। बाकी 2.5", " किलो बचा है।"]
+        ] + [{"type": "message_delta", "usage": {"output_tokens": 20}}, {"type": "message_stop"}]
+        body = "".join(f"event: {e['type']}\ndata: {json.dumps(e, ensure_ascii=False)}\n\n" for e in events).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_stream_claude_sentences(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StreamHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(llm, "ANTHROPIC_API_URL", f"http://127.0.0.1:{server.server_port}/v1/messages")
+    cache_reads = metrics.get("llm_tokens", {"type": "cache_read"})
+    try:
+        chunks = llm.stream_claude(llm.cacheable_system("system"), "user", api_key="test")
+        assert list(iter_sentences(chunks)) == ["लिख लिया — 50 किलो आलू।", "बाकी 2.5 किलो बचा है।"]
+        assert metrics.get("llm_tokens", {"type": "cache_read"}) == cache_reads + 1500
+    finally:
+        server.shutdown()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Test the Prometheus exposition and per-request stage traces."""
+
+import threading
+
+from core import metrics
+
+
+def test_prometheus_text_format():
+    metrics.inc("test_exposition_events", 3, {"kind": 'say "hi"'})
+    metrics.observe("test_exposition_seconds", 0.003, {"stage": "router"})
+    metrics.observe("test_exposition_seconds", 20.0, {"stage": "router"})
+    lines = metrics.render_prometheus().splitlines()
+
+    assert "# TYPE test_exposition_events_total counter" in lines
+    assert 'test_exposition_events_total{kind="say \\"hi\\""} 3' in lines
+    assert "# TYPE test_exposition_seconds histogram" in lines
+    # Buckets are cumulative and end with +Inf
+    assert 'test_exposition_seconds_bucket{stage="router",le="0.0025"} 0' in lines
+    assert 'test_exposition_seconds_bucket{stage="router",le="0.005"} 1' in lines
+    assert 'test_exposition_seconds_bucket{stage="router",le="10"} 1' in lines
+    assert 'test_exposition_seconds_bucket{stage="router",le="+Inf"} 2' in lines
+    assert 'test_exposition_seconds_sum{stage="router"} 20.003000' in lines
+    assert 'test_exposition_seconds_count{stage="router"} 2' in lines
+
+
+def test_stage_trace_is_per_thread():
+    before = metrics.get_histogram("request_stage_seconds", {"stage": "save"})
+    count = before.count if before else 0
+    metrics.begin_trace()
+    with metrics.stage("router"):
+        pass
+    metrics.record_stage("save", 0.25)
+    # Stages from another request's thread stay out of this trace
+    other = threading.Thread(target=metrics.record_stage, args=("response_llm", 1.0))
+    other.start()
+    other.join()
+
+    stages = metrics.end_trace()
+    assert [name for name, _ in stages] == ["router", "save"]
+    assert stages[1][1] == 0.25
+    assert metrics.get_histogram("request_stage_seconds", {"stage": "save"}).count == count + 1
+    assert metrics.end_trace() == []
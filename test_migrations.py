@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Test the schema migration runner and timestamp round-trips (no Postgres needed)."""
+
+from datetime import datetime, date, timezone, timedelta
+import pytest
+
+from core import migrations
+from core.state import StoreState
+
+
+class FakeCatalog:
+    """Answers the catalog queries migrate() makes and records every other statement."""
+
+    def __init__(self, version=None, column_type="text"):
+        self.version = version  # None: no schema_migrations table yet
+        self.column_type = column_type
+        self.statements = []
+        self.committed = False
+
+    def cursor(self):
+        db = self
+
+        class Cursor:
+            def execute(self, sql, params=None):
+                sql = " ".join(sql.split())
+                self.result = None
+                if "to_regclass" in sql:
+                    self.result = (db.version is not None,)
+                elif "MAX(version)" in sql:
+                    self.result = (db.version or 0,)
+                elif "information_schema.columns" in sql:
+                    self.result = (db.column_type,)
+                elif "pg_partitioned_table" in sql:
+                    self.result = None
+                else:
+                    db.statements.append((sql, params))
+
+            def fetchone(self):
+                return self.result
+        return Cursor()
+
+    def commit(self):
+        self.committed = True
+
+    def recorded_versions(self):
+        return [p[0] for sql, p in self.statements if sql.startswith("INSERT INTO schema_migrations")]
+
+
+def test_fresh_database_applies_all_in_order():
+    db = FakeCatalog()
+    assert migrations.migrate(db, "default", "Asia/Kolkata") == len(migrations.MIGRATIONS)
+    assert db.recorded_versions() == [number for number, _, _ in migrations.MIGRATIONS]
+    assert db.committed
+
+
+def test_applied_migrations_are_skipped():
+    db = FakeCatalog(version=migrations.SCHEMA_VERSION)
+    assert migrations.migrate(db, "default", "Asia/Kolkata") == 0
+    assert db.recorded_versions() == []
+    assert not any(sql.startswith("ALTER TABLE") for sql, _ in db.statements)
+
+
+def test_text_columns_are_converted_in_shop_time():
+    db = FakeCatalog(version=1)
+    migrations.migrate(db, "default", "Asia/Kolkata")
+    alters = [(sql, p) for sql, p in db.statements if "ALTER COLUMN" in sql and " TYPE " in sql]
+    assert len(alters) == len(migrations._TEMPORAL_COLUMNS)
+    sql, params = next(a for a in alters if "sales ALTER COLUMN created_at" in a[0])
+    assert "TYPE TIMESTAMPTZ" in sql and params == {"tz": "Asia/Kolkata"}
+    assert any("sales_store_item_day_idx" in sql for sql, _ in db.statements)
+    assert db.recorded_versions() == [2, 3]
+
+
+def test_converted_columns_are_left_alone():
+    db = FakeCatalog(version=1, column_type="date")
+    migrations.migrate(db, "default", "Asia/Kolkata")
+    assert not any("ALTER COLUMN" in sql and " TYPE " in sql for sql, _ in db.statements)
+
+
+def test_existing_sales_keep_their_rolled_up_cogs():
+    db = FakeCatalog(version=2)
+    migrations.migrate(db, "default", "Asia/Kolkata")
+    statements = [sql for sql, _ in db.statements]
+    assert "ALTER TABLE sales ADD COLUMN IF NOT EXISTS unit_cost DOUBLE PRECISION" in statements
+    backfill = next(sql for sql in statements if sql.startswith("UPDATE sales"))
+    # The rollup's per-unit COGS wins over the (since restocked) current avg cost
+    assert backfill.index("sales_daily_item") < backfill.index("inventory")
+    assert db.recorded_versions() == [3]
+
+
+def test_month_start_wraps_years():
+    assert migrations._month_start(date(2025, 11, 17), 0) == date(2025, 11, 1)
+    assert migrations._month_start(date(2025, 11, 17), 3) == date(2026, 2, 1)
+
+
+@pytest.fixture
+def state(monkeypatch):
+    monkeypatch.setattr(StoreState, "_init_tables", lambda self: None)
+    return StoreState(timezone="Asia/Kolkata")
+
+
+def test_timestamps_round_trip_through_timestamptz(state):
+    local = datetime(2025, 3, 1, 23, 30)
+    stamped = state._stamp(local)
+    assert stamped == "2025-03-01T23:30:00+05:30"
+    # psycopg2 returns TIMESTAMPTZ in the session timezone, e.g. UTC
+    from_db = datetime.fromisoformat(stamped).astimezone(timezone.utc)
+    assert state._local(from_db) == local
+    assert state._local(stamped) == local
+
+
+def test_legacy_naive_strings_are_shop_local(state):
+    assert state._local("2025-03-01T10:00:00") == datetime(2025, 3, 1, 10)
+    assert state._local(datetime(2025, 3, 1, 10, tzinfo=timezone(timedelta(hours=5, minutes=30)))) == datetime(2025, 3, 1, 10)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Test the per-store registry: lazy load, LRU eviction, pinning (no Postgres needed)."""
+
+import threading
+import pytest
+
+from core.registry import StoreRegistry, validate_store_id, InvalidStoreId
+from core.state import StoreState, DEFAULT_STORE_ID
+
+
+class FakeStore(StoreState):
+    """StoreState that records saves/closes instead of touching Postgres."""
+
+    def _init_tables(self):
+        pass
+
+    def save_to_db(self):
+        self.saved = getattr(self, "saved", 0) + 1
+        if getattr(self, "fail_save", False):
+            raise RuntimeError("db down")
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def loads():
+    return []
+
+
+@pytest.fixture
+def registry(loads):
+    def loader(store_id):
+        loads.append(store_id)
+        return FakeStore(store_id=store_id)
+    return StoreRegistry(loader=loader, max_hot=2)
+
+
+def test_loads_once_per_store(registry, loads):
+    a = registry.get("shop_a")
+    assert registry.get("shop_a") is a
+    assert a.store_id == "shop_a"
+    assert loads == ["shop_a"]
+
+
+def test_evicts_least_recently_used(registry, loads):
+    a = registry.get("shop_a")
+    registry.get("shop_b")
+    registry.get("shop_a")
+    b = registry._stores["shop_b"]
+    registry.get("shop_c")
+
+    assert "shop_b" not in registry
+    assert b.saved == 1 and b.closed
+    assert "shop_a" in registry and not getattr(a, "closed", False)
+
+    registry.get("shop_b")
+    assert loads == ["shop_a", "shop_b", "shop_c", "shop_b"]
+
+
+def test_stores_in_use_are_not_evicted(registry):
+    with registry.use("shop_a") as a:
+        registry.get("shop_b")
+        registry.get("shop_c")
+        assert "shop_a" in registry
+        a.add_stock("potato", 10, "kg", 20)
+    assert len(registry) == 2
+
+
+def test_failed_flush_keeps_store_hot(registry):
+    registry.get("shop_a").fail_save = True
+    registry.get("shop_b")
+    registry.get("shop_c")
+    assert "shop_a" in registry
+    assert len(registry) == 3
+
+
+def test_eviction_saves_outside_the_registry_lock(registry, loads):
+    a = registry.get("shop_a")
+    registry.get("shop_b")
+    saving, release = threading.Event(), threading.Event()
+
+    def slow_save():
+        saving.set()
+        release.wait(5)
+        a.saved_at_reload = list(loads)
+    a.save_to_db = slow_save
+
+    evicting = threading.Thread(target=registry.get, args=("shop_c",))
+    evicting.start()
+    assert saving.wait(5)
+    # Other stores are served while shop_a's save is in flight...
+    assert registry.get("shop_b").store_id == "shop_b"
+    # ...but reloading shop_a waits for it
+    reload = threading.Thread(target=registry.get, args=("shop_a",))
+    reload.start()
+    reload.join(0.2)
+    assert reload.is_alive() and loads == ["shop_a", "shop_b", "shop_c"]
+
+    release.set()
+    evicting.join(5)
+    reload.join(5)
+    assert a.closed and a.saved_at_reload == ["shop_a", "shop_b", "shop_c"]
+    assert loads == ["shop_a", "shop_b", "shop_c", "shop_a"]
+    assert registry.get("shop_a") is not a
+
+
+def test_stores_are_isolated(registry):
+    registry.get("shop_a").add_stock("potato", 10, "kg", 20)
+    assert registry.get("shop_b").get_stock("potato") is None
+
+
+def test_memory_estimate_grows_with_ledger(registry):
+    state = registry.get("shop_a")
+    empty = state.memory_estimate()
+    for i in range(200):
+        state.add_stock(f"item_{i}", 10, "kg", 20)
+        state.record_sale(f"item_{i}", 1, "kg", 25)
+    assert state.memory_estimate() > empty
+    assert registry.stats()["largest"][0]["store_id"] == "shop_a"
+
+
+def test_store_id_validation():
+    assert validate_store_id(None) == DEFAULT_STORE_ID
+    assert validate_store_id("shop-42_x") == "shop-42_x"
+    for bad in ["../etc", "a b", "x" * 65, "shop;drop"]:
+        with pytest.raises(InvalidStoreId):
+            validate_store_id(bad)
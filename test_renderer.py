@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Test the local response renderer."""
+
+from core.renderer import render_response, format_number
+from core.schemas import InventoryItem
+
+
+STOCK_ADDED = {
+    "action": "stock_added", "item": "potato", "quantity": 50.0, "unit": "kg",
+    "price_per_unit": 30.0, "total_value": 1500.0, "current_stock": 50.0, "current_unit": "kg",
+}
+
+
+def test_format_number():
+    assert [format_number(v) for v in (50.0, 2.5, 33.333, None)] == ["50", "2.5", "33.33", "0"]
+
+
+def test_stock_added_hindi_and_english():
+    assert render_response([STOCK_ADDED], []) == "लिख लिया भैया — 50 किलो आलू, ₹30 किलो। कुल ₹1500 का माल।"
+    assert render_response([STOCK_ADDED], [], language="en-IN") == \
+        "Got it boss — 50 kg potato at ₹30 per kg. Total ₹1500 worth of stock."
+
+
+def test_expense_and_low_stock_suffix():
+    low = [InventoryItem(item_name="sugar", quantity=2, unit="kg", avg_cost_per_unit=40)]
+    result = {"action": "expense_recorded", "category": "electricity", "amount": 200.0, "description": ""}
+    assert render_response([result], low) == "₹200 बिजली का खर्चा लिखा। ध्यान दें, कम स्टॉक: चीनी 2 किलो।"
+
+
+def test_summary_loss():
+    result = {"action": "summary", "total_sales": 100, "total_expenses": 300, "profit": -250}
+    assert render_response([result], [], language="en-IN") == \
+        "Today's summary — sales ₹100, expenses ₹300, loss ₹250."
+
+
+def test_falls_back_to_llm():
+    assert render_response([{"action": "greeting"}], []) is None
+    assert render_response([{"action": "sale_recorded", "error": "missing_data"}], []) is None
+    assert render_response([STOCK_ADDED], [], language="ta-IN") is None
+    assert render_response([], []) is None
+
+
+def test_oversold_stock_is_left_to_the_llm():
+    sale = {"action": "sale_recorded", "item": "onion", "quantity": 5.0, "unit": "kg",
+            "revenue": 200.0, "remaining_stock": -3.0, "remaining_unit": "kg"}
+    assert render_response([sale], []) is None
+    assert render_response([{**sale, "remaining_stock": 0.0}], [], language="en-IN") == \
+        "Done, sold 5 kg onion for ₹200. 0 kg left in stock."
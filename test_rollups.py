@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Test the daily rollups: aggregation, period ranges, the summary agent's history path."""
+
+import os
+import time
+import uuid
+from datetime import date, datetime, timedelta
+import pytest
+
+import core.db as db_module
+from core import rollups
+from core.schemas import RouterOutput, SingleIntent, IntentType
+from core.state import StoreState
+from agents.summary import SummaryAgent
+
+
+def test_sales_are_grouped_per_store_day_item():
+    rows = [
+        ("s1", "potato", 2.0, "kg", 30.0, 60.0, "2025-03-10T09:00:00", "2025-03-10", 20.0),
+        ("s1", "potato", 1.0, "kg", 30.0, 30.0, "2025-03-10T10:00:00", "2025-03-10", 26.0),
+        ("s1", "potato", 1.0, "kg", 30.0, 30.0, "2025-03-11T09:00:00", "2025-03-11", 26.0),
+        ("s1", "onion", 5.0, "kg", 40.0, 200.0, "2025-03-10T11:00:00", "2025-03-10", 30.0),
+    ]
+    # COGS sums each sale's own unit cost, not one cost per item
+    assert sorted(rollups.aggregate_sales(rows)) == [
+        ("s1", "2025-03-10", "onion", 5.0, 200.0, 150.0, 1),
+        ("s1", "2025-03-10", "potato", 3.0, 90.0, 66.0, 2),
+        ("s1", "2025-03-11", "potato", 1.0, 30.0, 26.0, 1),
+    ]
+
+
+def test_expenses_are_grouped_per_store_day_category():
+    rows = [
+        ("s1", "rent", 500.0, "", "2025-03-10T09:00:00", "2025-03-10"),
+        ("s1", "rent", 100.0, "extra", "2025-03-10T12:00:00", "2025-03-10"),
+        ("s2", "rent", 50.0, "", "2025-03-10T12:00:00", "2025-03-10"),
+    ]
+    assert sorted(rollups.aggregate_expenses(rows)) == [
+        ("s1", "2025-03-10", "rent", 600.0, 2),
+        ("s2", "2025-03-10", "rent", 50.0, 1),
+    ]
+
+
+@pytest.mark.parametrize("period, expected", [
+    ("today", (date(2025, 3, 12), date(2025, 3, 12))),
+    ("yesterday", (date(2025, 3, 11), date(2025, 3, 11))),
+    ("this_week", (date(2025, 3, 10), date(2025, 3, 12))),
+    ("last_week", (date(2025, 3, 3), date(2025, 3, 9))),
+    ("this_month", (date(2025, 3, 1), date(2025, 3, 12))),
+    ("last_month", (date(2025, 2, 1), date(2025, 2, 28))),
+    ("this_year", (date(2025, 1, 1), date(2025, 3, 12))),
+])
+def test_period_range(period, expected):
+    assert rollups.period_range(period, date(2025, 3, 12)) == expected  # a Wednesday
+
+
+def test_summary_agent_answers_past_periods_from_rollups(monkeypatch):
+    monkeypatch.setattr(StoreState, "_init_tables", lambda self: None)
+    state = StoreState(store_id="shop_1")
+    calls = []
+
+    def fake_period_summary(store_id, start, end, storage=None):
+        calls.append((store_id, start, end))
+        return {"total_sales": 900.0, "profit": 200.0, "top_items": [], "daily": []}
+    monkeypatch.setattr(rollups, "period_summary", fake_period_summary)
+
+    result = SummaryAgent(state).handle(SingleIntent(intent=IntentType.QUERY_PROFIT, period="last_month"))
+    assert result["action"] == "period_summary"
+    assert result["profit"] == 200.0
+    assert calls == [("shop_1", *rollups.period_range("last_month", state.day))]
+
+    today = SummaryAgent(state).handle(SingleIntent(intent=IntentType.QUERY_SUMMARY, period="today"))
+    assert today["action"] == "summary"
+    unknown = SummaryAgent(state).handle(SingleIntent(intent=IntentType.QUERY_SUMMARY, period="fortnight"))
+    assert unknown["error"] == "unknown_period"
+
+
+def test_history_intents_see_earlier_entries_of_the_turn(make_state, tmp_path):
+    from server import execute_intents
+    state = make_state(write_behind=True, journal_path=str(tmp_path / "journal.jsonl"))
+    state.add_stock("potato", 10, "kg", 20)
+    turn = RouterOutput(intents=[
+        SingleIntent(intent=IntentType.SALE, item="potato", quantity=2, unit="kg", price_per_unit=30),
+        SingleIntent(intent=IntentType.QUERY_PROFIT, period="this_week"),
+    ])
+
+    sale, week = execute_intents(state, turn)
+    assert sale["action"] == "sale_recorded"
+    assert week["action"] == "period_summary"
+    assert week["total_sales"] == 60 and week["cost_of_goods_sold"] == 40
+
+
+@pytest.mark.parametrize("mode", ["sync", "write_behind", "atomic"])
+def test_cogs_agree_after_a_restock_following_a_sale(make_state, tmp_path, mode):
+    kwargs = {
+        "sync": {},
+        "write_behind": {"write_behind": True, "journal_path": str(tmp_path / "journal.jsonl")},
+        "atomic": {"atomic": True},
+    }[mode]
+    state = make_state(**kwargs)
+    state.add_stock("potato", 10, "kg", 20)
+    state.record_sale("potato", 5, "kg", 30)
+    state.save_to_db()
+    state.add_stock("potato", 5, "kg", 50)
+    state.save_to_db()
+    state.flush()
+
+    # In memory, in the rollups, in daily_summary and after a reload: 5 kg sold at ₹20
+    assert state.get_daily_cogs() == 100
+    summary = rollups.period_summary(state.store_id, state.day, state.day, storage=state.storage)
+    assert summary["cost_of_goods_sold"] == 100
+    state.storage.write_daily_summaries([state.day], state._stamp(state._now()))
+    assert state.storage.fetch("SELECT cogs FROM daily_summary WHERE store_id = %s", (state.store_id,)) == [(100.0,)]
+    restored = make_state()
+    restored.load_from_db()
+    assert restored.get_daily_cogs() == 100
+
+
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL not set")
+def test_incremental_rollups_match_backfill_on_postgres(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", os.environ["TEST_DATABASE_URL"])
+    monkeypatch.setattr(db_module, "_pool", None)
+    store_id = f"rollup_{uuid.uuid4().hex[:8]}"
+    clock = {"now": datetime(2024, 1, 1, 10, 0)}
+    monkeypatch.setattr(StoreState, "_now", lambda self: clock["now"])
+
+    def snapshot_rollups():
+        with db_module.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT day, item_name, quantity, revenue, cogs, sale_count FROM sales_daily_item "
+                           "WHERE store_id = %s ORDER BY day, item_name", (store_id,))
+            sales = cursor.fetchall()
+            cursor.execute("SELECT day, category, amount, expense_count FROM expenses_daily_category "
+                           "WHERE store_id = %s ORDER BY day, category", (store_id,))
+            return sales, cursor.fetchall()
+
+    try:
+        state = StoreState(store_id=store_id, write_behind=False)
+        for item in ("potato", "onion", "rice"):
+            state.add_stock(item, 100_000, "kg", 20)
+        for day in range(366):
+            if day % 30 == 0:
+                # Restocks move the avg cost; past days' COGS must not follow it
+                state.add_stock("potato", 1_000, "kg", 20 + day // 30)
+            for item in ("potato", "onion", "rice"):
+                state.record_sale(item, 2, "kg", 30)
+            state.record_expense("transport", 15)
+            state.save_to_db()
+            clock["now"] += timedelta(days=1)
+
+        incremental = snapshot_rollups()
+        rollups.backfill(store_id)
+        assert snapshot_rollups() == incremental
+
+        start = time.perf_counter()
+        summary = rollups.period_summary(store_id, date(2024, 1, 1), date(2024, 12, 31))
+        elapsed = time.perf_counter() - start
+        assert summary["total_sales"] == 366 * 3 * 60
+        assert summary["top_items"][0]["revenue"] == 366 * 60
+        assert elapsed < 0.5
+    finally:
+        with db_module.connection() as conn:
+            cursor = conn.cursor()
+            for table in ("inventory", "sales", "expenses", "daily_summary",
+                          "sales_daily_item", "expenses_daily_category"):
+                cursor.execute(f"DELETE FROM {table} WHERE store_id = %s", (store_id,))
+            conn.commit()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Test the router result cache."""
+
+from core.router_cache import RouterCache, canonicalize_transcript
+from core.schemas import RouterOutput, SingleIntent, IntentType
+
+
+def _sale():
+    return RouterOutput(intents=[SingleIntent(intent=IntentType.SALE, item="potato", quantity=2, unit="kg")])
+
+
+def test_canonical_key():
+    assert canonicalize_transcript("Aaj ka  HISAB batao?") == canonicalize_transcript("aaj ka hisab batao")
+    assert canonicalize_transcript("५० किलो आलू।") == canonicalize_transcript("50 किलो आलू")
+
+
+def test_hit_returns_private_copy():
+    cache = RouterCache(maxsize=8, ttl=60)
+    cache.put("2 kilo aloo becha", _sale())
+
+    first = cache.get("2 Kilo Aloo Becha!")
+    first.intents[0].quantity = 99
+    second = cache.get("2 kilo aloo becha")
+    assert second.intents[0].quantity == 2  # callers can't corrupt the cached parse
+
+
+def test_lru_and_ttl():
+    cache = RouterCache(maxsize=2, ttl=60)
+    for text in ["a one", "b two", "c three"]:
+        cache.put(text, _sale())
+    assert cache.get("a one") is None and len(cache) == 2
+
+    expired = RouterCache(maxsize=2, ttl=-1)
+    expired.put("a one", _sale())
+    assert expired.get("a one") is None
+
+
+def test_unknown_not_cached():
+    cache = RouterCache()
+    cache.put("gibberish", RouterOutput(intents=[SingleIntent(intent=IntentType.UNKNOWN, confidence=0.0)]))
+    assert cache.get("gibberish") is None
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "router_cache.db")
+    RouterCache(path=path).put("aloo kitna bacha", _sale())
+    assert RouterCache(path=path).get("aloo kitna bacha").intents[0].item == "potato"
+
+
+def test_disk_tier_drops_other_parser_versions(tmp_path):
+    path = str(tmp_path / "router_cache.db")
+    RouterCache(path=path, version="old").put("aloo kitna bacha", _sale())
+    assert RouterCache(path=path, version="new").get("aloo kitna bacha") is None
+    # The stale row was purged on open, not just skipped
+    assert RouterCache(path=path, version="old").get("aloo kitna bacha") is None
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Test binary state snapshots and warm-start reconciliation (storage is a SQLite file, see conftest.py)."""
+
+import core.state as state_module
+from core import migrations, snapshot
+from core.ledger import SalesLedger
+
+
+def seeded(make_state, path):
+    state = make_state(snapshot_path=str(path))
+    state.add_stock("potato", 50, "kg", 20)
+    state.add_stock("rice", 20, "kg", 45)
+    state.record_sale("potato", 3, "kg", 30)
+    state.record_sale("rice", 1, "kg", 60)
+    state.record_expense("transport", 120, "auto")
+    assert state.write_snapshot()
+    return state
+
+
+def test_encode_read_round_trip(tmp_path):
+    ledger = SalesLedger()
+    ledger.append("potato", 2, "kg", 30, 60, state_module.datetime(2025, 1, 2, 10, 30))
+    ledger.append("चीनी", 1, "kg", 45, 45, state_module.datetime(2025, 1, 2, 11))
+    path = str(tmp_path / "s.snap")
+    meta = {"store_id": "x", "schema_version": migrations.SCHEMA_VERSION, "day": "2025-01-02"}
+    snapshot.write(path, snapshot.encode(meta, {"sales": ledger}))
+
+    snap = snapshot.read(path, migrations.SCHEMA_VERSION)
+    assert snap.meta["store_id"] == "x"
+    assert list(snap.ledger("sales", SalesLedger)) == list(ledger)
+
+
+def test_unusable_files_are_ignored(tmp_path):
+    path = str(tmp_path / "s.snap")
+    assert snapshot.read(path, 1) is None
+
+    meta = {"store_id": "x", "schema_version": 1, "day": "2025-01-02"}
+    snapshot.write(path, snapshot.encode(meta, {}))
+    assert snapshot.read(path, 2) is None
+
+    data = bytearray(open(path, "rb").read())
+    data[-1] ^= 0xFF
+    open(path, "wb").write(bytes(data))
+    assert snapshot.read(path, 1) is None
+
+
+def test_warm_start_reads_only_newer_rows(make_state, tmp_path, monkeypatch):
+    path = tmp_path / "default.snap"
+    before = seeded(make_state, path)
+    # Written after the snapshot (e.g. by the same store before a crash)
+    before.storage.write_rows([], [], [("default", "potato", 2.0, "kg", 30.0, 60.0,
+                                        before._stamp(before._now()), before._get_today_str(), 20.0)])
+
+    restored = make_state(snapshot_path=str(path))
+    reads = []
+
+    def recording(name):
+        load = getattr(restored.storage, name)
+
+        def read(day, after_id=None):
+            reads.append((name, after_id))
+            return load(day, after_id)
+        return read
+    for name in ("load_sales", "load_expenses"):
+        monkeypatch.setattr(restored.storage, name, recording(name))
+    restored.load_from_db()
+
+    assert [s.item_name for s in restored.sales] == ["potato", "rice", "potato"]
+    assert len(restored.expenses) == 1
+    assert restored.get_stock("rice").quantity == 19
+    assert restored.get_daily_sales_total() == before.get_daily_sales_total() + 60
+    assert restored.get_daily_cogs() == before.get_daily_cogs() + 40
+    assert not restored.has_unsaved_changes()
+    # Everything came from the snapshot except the rows after its watermarks
+    assert sorted(reads) == [("load_expenses", 1), ("load_sales", 2)]
+
+
+def test_rows_the_snapshot_cannot_explain_force_full_load(make_state, tmp_path):
+    path = tmp_path / "default.snap"
+    state = seeded(make_state, path)
+    # Another writer's row that landed below the watermark
+    state.storage._conn.execute(
+        "INSERT INTO sales (id, store_id, item_name, quantity, unit, price, total, created_at, day) "
+        "SELECT 0, store_id, item_name, quantity, unit, price, total, created_at, day FROM sales WHERE id = 1"
+    )
+
+    restored = make_state(snapshot_path=str(path))
+    restored.load_from_db()
+    assert len(restored.sales) == 3
+
+
+def test_unchanged_state_is_not_rewritten(make_state, tmp_path):
+    state = seeded(make_state, tmp_path / "default.snap")
+    assert not state.write_snapshot()
+    state.record_sale("potato", 1, "kg", 30)
+    assert state.write_snapshot()
+
+
+def test_inventory_is_read_from_storage_not_the_snapshot(make_state, tmp_path):
+    path = tmp_path / "default.snap"
+    before = seeded(make_state, path)
+    # Another worker's stock change stamped earlier than the snapshot's newest row
+    before.storage._conn.execute(
+        "UPDATE inventory SET quantity = 7, updated_at = '2000-01-01T00:00:00' WHERE item_name = 'potato'"
+    )
+
+    restored = make_state(snapshot_path=str(path))
+    restored.load_from_db()
+    assert restored.get_stock("potato").quantity == 7
+    assert restored.get_stock("rice").quantity == 19
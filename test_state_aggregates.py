@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Test StoreState's running daily aggregates and version-memoized views."""
+
+import math
+import random
+import pytest
+
+from core.state import StoreState
+
+ITEMS = ["potato", "onion", "rice", "sugar", "maggi", "mystery_item"]
+
+
+@pytest.fixture
+def state(monkeypatch):
+    monkeypatch.setattr(StoreState, "_init_tables", lambda self: None)
+    return StoreState()
+
+
+def assert_consistent(state: StoreState):
+    expected = state.recompute_aggregates()
+    actual = {
+        "sales_total": state.get_daily_sales_total(),
+        "expense_total": state.get_daily_expense_total(),
+        "cogs": state.get_daily_cogs(),
+        "inventory_value": state.get_total_inventory_value(),
+    }
+    for key, value in actual.items():
+        assert math.isclose(value, expected[key], rel_tol=1e-9, abs_tol=1e-6), key
+
+
+def test_sale_of_existing_item(state):
+    state.add_stock("potato", 50, "kg", 20)
+    state.record_sale("potato", 5, "kg", 30)
+    assert state.get_daily_sales_total() == 150
+    assert state.get_daily_cogs() == 100
+    assert state.get_total_inventory_value() == 900
+    assert_consistent(state)
+
+
+def test_restock_after_a_sale_keeps_its_cogs(state):
+    state.add_stock("potato", 10, "kg", 20)
+    state.record_sale("potato", 5, "kg", 30)
+    state.add_stock("potato", 5, "kg", 50)
+    # COGS is frozen at the avg cost the units sold at
+    assert state.get_daily_cogs() == 100
+    assert_consistent(state)
+    state.update_stock("potato", cost_per_unit=25)
+    assert state.get_daily_cogs() == 100
+    state.record_sale("potato", 2, "kg", 30)
+    assert state.get_daily_cogs() == 150
+    assert_consistent(state)
+
+
+def test_oversold_and_unknown_items(state):
+    state.add_stock("onion", 2, "kg", 30)
+    state.record_sale("onion", 5, "kg", 40)
+    state.record_sale("mystery_item", 1, "unit", 10)
+    assert state.get_total_inventory_value() == 0
+    assert_consistent(state)
+
+
+def test_random_mutations_stay_consistent(state):
+    rng = random.Random(7)
+    for _ in range(2000):
+        item = rng.choice(ITEMS)
+        op = rng.random()
+        if op < 0.3:
+            state.add_stock(item, rng.randint(-5, 40), "kg", rng.uniform(5, 100))
+        elif op < 0.6:
+            state.record_sale(item, rng.randint(1, 10), "kg", rng.uniform(5, 120))
+        elif op < 0.7:
+            state.remove_stock(item, rng.randint(1, 10))
+        elif op < 0.8:
+            state.update_stock(
+                item,
+                quantity=rng.choice([None, rng.uniform(-5, 50)]),
+                cost_per_unit=rng.choice([None, rng.uniform(5, 100)]),
+            )
+        else:
+            state.record_expense(rng.choice(["rent", "transport", "other"]), rng.uniform(10, 500))
+    assert_consistent(state)
+
+
+def test_clear_resets_aggregates(state):
+    state.add_stock("rice", 10, "kg", 50)
+    state.record_sale("rice", 2, "kg", 60)
+    state.record_expense("rent", 100)
+    state.clear()
+    assert state.get_daily_sales_total() == 0
+    assert state.get_daily_expense_total() == 0
+    assert state.get_total_inventory_value() == 0
+    assert_consistent(state)
+
+
+def test_views_are_memoized_until_the_next_mutation(state):
+    state.add_stock("potato", 3, "kg", 20)
+    version = state.version
+    summary = state.get_daily_summary()
+
+    assert state.get_daily_summary() is summary
+    assert state.get_low_stock_entries()[0].item_name == "potato"
+    assert state.version == version
+
+    state.record_sale("potato", 1, "kg", 30)
+    assert state.version > version
+    refreshed = state.get_daily_summary()
+    assert refreshed is not summary
+    assert refreshed.total_sales == 30
+    assert state.get_inventory_snapshot() == [{"item": "potato", "qty": 2, "unit": "kg"}]
+
+
+def test_memoized_lists_are_copies(state):
+    state.add_stock("onion", 2, "kg", 30)
+    state.get_low_stock_entries().clear()
+    state.get_inventory_snapshot().clear()
+    state.get_inventory_snapshot()[0]["qty"] = 99
+    assert len(state.get_low_stock_entries()) == 1
+    assert state.get_inventory_snapshot() == [{"item": "onion", "qty": 2, "unit": "kg"}]
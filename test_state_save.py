@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Test incremental save_to_db against a SQLite store (see conftest.py)."""
+
+import pytest
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """Wrap a state's storage so every write_rows batch is recorded before it commits."""
+    def spy(state) -> list:
+        batches = []
+        write_rows = state.storage.write_rows
+
+        def recording(inventory_rows, expense_rows, sale_rows):
+            batches.append({"inventory": inventory_rows, "expenses": expense_rows, "sales": sale_rows})
+            write_rows(inventory_rows, expense_rows, sale_rows)
+        monkeypatch.setattr(state.storage, "write_rows", recording)
+        return batches
+    return spy
+
+
+def test_noop_save_skips_database(make_state, writes):
+    state = make_state()
+    batches = writes(state)
+    state.save_to_db()
+    assert batches == []
+    assert not state.has_unsaved_changes()
+
+
+def test_only_changed_items_are_upserted(make_state, writes):
+    state = make_state()
+    batches = writes(state)
+    for i in range(50):
+        state.add_stock(f"item_{i}", 10, "kg", 20)
+    state.save_to_db()
+    assert len(batches[0]["inventory"]) == 50
+
+    state.record_sale("item_7", 2, "kg", 30)
+    state.save_to_db()
+
+    assert [row[1] for row in batches[1]["inventory"]] == ["item_7"]
+    assert len(batches[1]["sales"]) == 1
+    assert batches[1]["expenses"] == []
+    stored = {row[0]: row[1] for row in state.storage.load_inventory()}
+    assert len(stored) == 50 and stored["item_7"] == 8
+
+
+def test_ledger_rows_are_batched_once(make_state, writes):
+    state = make_state()
+    batches = writes(state)
+    state.record_expense("rent", 500)
+    state.record_expense("transport", 50)
+    state.save_to_db()
+    state.save_to_db()
+
+    assert len(batches) == 1
+    assert len(batches[0]["expenses"]) == 2
+    assert len(state.storage.load_expenses(state._get_today_str())) == 2
+    assert state.storage.fetch(
+        "SELECT category, amount FROM expenses_daily_category WHERE store_id = %s ORDER BY category",
+        ("default",)
+    ) == [("rent", 500.0), ("transport", 50.0)]
+
+
+def test_failed_commit_keeps_changes_pending(make_state, monkeypatch):
+    state = make_state()
+    state.add_stock("potato", 10, "kg", 20)
+    write_rows = state.storage._write_rows
+
+    def fail_after_writing(conn, *rows):
+        write_rows(conn, *rows)
+        raise RuntimeError("connection lost")
+    monkeypatch.setattr(state.storage, "_write_rows", fail_after_writing)
+
+    with pytest.raises(RuntimeError):
+        state.save_to_db()
+    assert state.has_unsaved_changes()
+    assert state._dirty_items == {"potato"}
+    # The transaction was rolled back
+    assert state.storage.load_inventory() == []
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Test StoreState on the embedded SQLite backend (no Postgres needed: every store is a temp file)."""
+
+import sqlite3
+from datetime import date, timedelta
+import pytest
+
+from core import rollups
+from core.storage import STORE_TABLES, SQLiteBackend, StorageBackend, open_backend, _sqlite_sql
+
+
+def test_postgres_placeholders_are_rewritten():
+    assert _sqlite_sql("SELECT a FROM t WHERE x = %(store_id)s AND d = %s::date") == \
+        "SELECT a FROM t WHERE x = :store_id AND d = ?"
+    with pytest.raises(ValueError):
+        open_backend("shop_1", "default", "Asia/Kolkata", kind="mysql")
+
+
+def test_save_and_load_round_trip(make_state):
+    state = make_state("shop_1")
+    state.add_stock("potato", 50, "kg", 20)
+    state.record_sale("potato", 3, "kg", 30)
+    state.record_expense("transport", 120, "auto")
+    state.save_to_db()
+    assert not state.has_unsaved_changes()
+    state.close()
+
+    restored = make_state("shop_1")
+    restored.load_from_db()
+    assert restored.get_stock("potato").quantity == 47
+    assert restored.get_daily_sales_total() == 90
+    assert restored.get_daily_expense_total() == 120
+    assert restored.get_stock("potato").last_updated == state.get_stock("potato").last_updated
+
+
+def test_schema_is_created_once(db_path):
+    backend = SQLiteBackend("shop_1", db_path)
+    backend.ensure_schema()
+    backend.ensure_schema()
+    assert backend._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert backend._conn.execute("PRAGMA user_version").fetchone()[0] == backend.schema_version
+
+
+def test_rollover_writes_daily_summary(make_state):
+    state = make_state("shop_1")
+    state.add_stock("potato", 10, "kg", 20)
+    state.record_sale("potato", 2, "kg", 30)
+    state.save_to_db()
+    day = state.day
+    state._write_daily_summaries([day])
+
+    row = state.storage.fetch(
+        "SELECT total_sales, cogs, profit, sales_count FROM daily_summary WHERE store_id = %s AND day = %s",
+        ("shop_1", day)
+    )
+    assert row == [(60.0, 40.0, 20.0, 1)]
+
+
+def test_history_queries_read_the_rollups(make_state):
+    state = make_state("shop_1")
+    state.add_stock("potato", 10, "kg", 20)
+    state.record_sale("potato", 2, "kg", 30)
+    state.record_expense("transport", 15)
+    state.save_to_db()
+
+    summary = rollups.period_summary("shop_1", state.day - timedelta(days=6), state.day, storage=state.storage)
+    assert summary["total_sales"] == 60
+    assert summary["profit"] == 60 - 40 - 15
+    assert summary["top_items"] == [{"item": "potato", "quantity": 2.0, "revenue": 60.0, "profit": 20.0}]
+    assert summary["daily"][0]["day"] == state.day.isoformat()
+    assert rollups.period_summary("shop_1", date(2000, 1, 1), date(2000, 1, 2), storage=state.storage)["active_days"] == 0
+
+
+def test_warm_start_from_snapshot(make_state, tmp_path):
+    snap = str(tmp_path / "shop_1.snap")
+    state = make_state("shop_1", snapshot_path=snap)
+    state.add_stock("potato", 50, "kg", 20)
+    state.record_sale("potato", 3, "kg", 30)
+    assert state.write_snapshot()
+    state.record_sale("potato", 1, "kg", 30)
+    state.save_to_db()
+
+    restored = make_state("shop_1", snapshot_path=snap)
+    restored.load_from_db()
+    assert restored._snapshot_version == restored.version
+    assert restored.get_stock("potato").quantity == 46
+    assert len(restored.sales) == 2
+
+
+def test_demo_reset_deletes_only_this_store(make_state):
+    state = make_state("shop_1")
+    other = make_state("shop_2")
+    for store in (state, other):
+        store.add_stock("potato", 10, "kg", 20)
+        store.record_sale("potato", 2, "kg", 30)
+        store.record_expense("rent", 100)
+        store.save_to_db()
+        store._write_daily_summaries([store.day])
+
+    def rows(store) -> dict:
+        return {
+            table: store.storage.fetch(f"SELECT COUNT(*) FROM {table} WHERE store_id = %s", (store.store_id,))[0][0]
+            for table in STORE_TABLES
+        }
+
+    state.storage.delete_store()
+    assert rows(state) == dict.fromkeys(STORE_TABLES, 0)
+    assert rows(other) == dict.fromkeys(STORE_TABLES, 1)
+
+
+def test_version_1_files_get_per_sale_unit_costs(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE inventory (store_id TEXT NOT NULL, item_name TEXT NOT NULL, quantity REAL, unit TEXT,
+                                avg_cost REAL, updated_at TEXT, PRIMARY KEY (store_id, item_name));
+        CREATE TABLE sales (id INTEGER PRIMARY KEY, store_id TEXT NOT NULL, item_name TEXT, quantity REAL,
+                            unit TEXT, price REAL, total REAL, created_at TEXT, day TEXT);
+        CREATE TABLE sales_daily_item (store_id TEXT NOT NULL, day TEXT NOT NULL, item_name TEXT NOT NULL,
+                                       quantity REAL NOT NULL DEFAULT 0, revenue REAL NOT NULL DEFAULT 0,
+                                       cogs REAL NOT NULL DEFAULT 0, sale_count INTEGER NOT NULL DEFAULT 0,
+                                       PRIMARY KEY (store_id, day, item_name));
+        INSERT INTO inventory VALUES ('shop_1', 'potato', 10, 'kg', 50, '2025-03-10T09:00:00+05:30'),
+                                     ('shop_1', 'onion', 10, 'kg', 30, '2025-03-10T09:00:00+05:30');
+        INSERT INTO sales VALUES (1, 'shop_1', 'potato', 5, 'kg', 30, 150, '2025-03-10T09:00:00+05:30', '2025-03-10'),
+                                 (2, 'shop_1', 'onion', 1, 'kg', 40, 40, '2025-03-10T09:00:00+05:30', '2025-03-10');
+        INSERT INTO sales_daily_item VALUES ('shop_1', '2025-03-10', 'potato', 5, 150, 100, 1);
+        PRAGMA user_version = 1;
+    """)
+    conn.close()
+
+    storage = SQLiteBackend("shop_1", db_path)
+    storage.ensure_schema()
+    try:
+        # The rollup's cost wins over today's avg cost; items without one fall back to it
+        assert [row[-1] for row in storage.load_sales("2025-03-10")] == [20.0, 30.0]
+    finally:
+        storage.close()
+
+
+def test_backends_must_implement_the_whole_interface():
+    class Partial(StorageBackend):
+        def ensure_schema(self):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial("shop_1")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Hammer one StoreState from many threads; the ledger and the SQLite store must match exactly."""
+
+import sys
+import random
+import threading
+import pytest
+
+ITEMS = ["potato", "onion", "rice", "sugar"]
+
+
+@pytest.fixture
+def fast_switching():
+    """Switch threads far more often than usual to widen race windows."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_ledger_and_db_match_under_concurrency(make_state, fast_switching):
+    state = make_state()
+    for item in ITEMS:
+        state.add_stock(item, 1000, "kg", 20)
+    errors = []
+    stop = threading.Event()
+
+    def turn_worker(seed):
+        rng = random.Random(seed)
+        for _ in range(60):
+            item = rng.choice(ITEMS)
+            # What a /process turn does: agents, then save, holding the store's lock
+            with state.lock:
+                state.record_sale(item, rng.randint(1, 3), "kg", 30)
+                if rng.random() < 0.3:
+                    state.add_stock(item, 5, "kg", rng.choice([18, 22]))
+                if rng.random() < 0.2:
+                    state.record_expense("transport", 10)
+                state.save_to_db()
+
+    def background_saver():
+        while not stop.is_set():
+            state.save_to_db()
+
+    def reader():
+        while not stop.is_set():
+            snapshot = state.snapshot()
+            if abs(snapshot.total_sales - sum(s.total for s in snapshot.sales)) > 1e-6:
+                errors.append("sales total does not match snapshot ledger")
+            if abs(snapshot.total_expenses - sum(e.amount for e in snapshot.expenses)) > 1e-6:
+                errors.append("expense total does not match snapshot ledger")
+
+    workers = [threading.Thread(target=turn_worker, args=(i,)) for i in range(8)]
+    helpers = [threading.Thread(target=background_saver) for _ in range(2)]
+    helpers += [threading.Thread(target=reader) for _ in range(2)]
+    for t in workers + helpers:
+        t.start()
+    for t in workers:
+        t.join()
+    stop.set()
+    for t in helpers:
+        t.join()
+    state.save_to_db()
+
+    assert errors == []
+    assert len(state.sales) == 8 * 60
+    today = state._get_today_str()
+    assert [(r[0], r[1], r[4], r[5]) for r in state.storage.load_sales(today, after_id=0)] == [
+        (s.item_name, s.quantity, s.total, state._stamp(s.timestamp)) for s in state.sales
+    ]
+    assert [(r[1], r[3]) for r in state.storage.load_expenses(today, after_id=0)] == [
+        (e.amount, state._stamp(e.timestamp)) for e in state.expenses
+    ]
+    stored = {r[0]: r for r in state.storage.load_inventory()}
+    for name, item in state.inventory.items():
+        assert stored[name][1] == item.quantity
+        assert stored[name][3] == item.avg_cost_per_unit
+    # The rollups were folded in the same transactions as the rows
+    (revenue, count), = state.storage.fetch(
+        "SELECT SUM(revenue), SUM(sale_count) FROM sales_daily_item WHERE store_id = %s", ("default",)
+    )
+    assert count == 8 * 60 and revenue == pytest.approx(state.get_daily_sales_total())
+
+
+def test_snapshot_is_a_stable_copy(make_state):
+    state = make_state()
+    state.add_stock("potato", 10, "kg", 20)
+    snapshot = state.snapshot()
+    assert state.snapshot() is snapshot
+
+    state.record_sale("potato", 4, "kg", 30)
+    assert snapshot.inventory["potato"].quantity == 10
+    assert len(snapshot.sales) == 0
+    fresh = state.snapshot()
+    assert fresh.version > snapshot.version
+    assert fresh.inventory["potato"].quantity == 6
+    assert fresh.total_sales == 120